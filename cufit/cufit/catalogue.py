@@ -0,0 +1,110 @@
+"""
+Catalogue version tokens shared through the Django cache.
+
+Read-mostly catalogues (meal plans, campus meals, the exercise library) carry
+a version token that is bumped on every write: model signals bump it for
+single-row writes, and bulk loaders that bypass signals bump it themselves.
+
+Process-local read models compare the token they were built from with the
+current one and reload when it changed, and ``conditional_catalogue`` turns
+the tokens into strong ETags for the catalogue endpoints.
+
+Each process keeps the tokens it read and asks the cache again at most once
+per ``CATALOGUE_VERSION_TTL`` seconds, so a warm read model costs no cache
+round trip. A bump made in this process is seen at once, one made by
+another worker within the TTL. That needs a cache every worker shares:
+settings.py uses Redis when REDIS_URL is set and falls back to the
+per-process local-memory cache, which only suits a single worker (see the
+deployment check below).
+"""
+import functools
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+MEAL_PLANS = 'meal_plans'
+MEALS = 'meals'
+EXERCISES = 'exercises'
+
+
+def _key(catalogue):
+    return f'catalogue-version:{catalogue}'
+
+
+# catalogue -> (token, time.monotonic() when read from the cache)
+_tokens = {}
+
+
+def catalogue_version(catalogue, fresh=False):
+    """
+    Return the catalogue's current version token, creating one if the cache
+    lost it. The token read within the last ``CATALOGUE_VERSION_TTL`` seconds
+    is reused unless ``fresh`` is set.
+    """
+    now = time.monotonic()
+    known = _tokens.get(catalogue)
+    if not fresh and known and now - known[1] < getattr(settings, 'CATALOGUE_VERSION_TTL', 1.0):
+        return known[0]
+    version = cache.get(_key(catalogue))
+    if version is None:
+        # add() so concurrent first readers agree on a single token
+        cache.add(_key(catalogue), uuid.uuid4().hex, timeout=None)
+        version = cache.get(_key(catalogue))
+    _tokens[catalogue] = (version, now)
+    return version
+
+
+def bump_catalogue_version(catalogue):
+    """Mark every cached copy of the catalogue as stale."""
+    version = uuid.uuid4().hex
+    cache.set(_key(catalogue), version, timeout=None)
+    _tokens[catalogue] = (version, time.monotonic())
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    backend = settings.CACHES['default']['BACKEND']
+    if backend.endswith(('LocMemCache', 'DummyCache')):
+        return [checks.Warning(
+            'Catalogue version tokens live in a per-process cache, so a catalogue write in one '
+            'worker never reaches the others.',
+            hint='Set REDIS_URL when running more than one worker.',
+            id='cufit.W001',
+        )]
+    return []
+
+
+def catalogue_etag(request, *catalogues):
+    """Strong ETag over the catalogue versions, the path, the query string and the Accept header."""
+    parts = [catalogue_version(catalogue) for catalogue in catalogues]
+    parts += [request.path, request.GET.urlencode(), request.META.get('HTTP_ACCEPT', '')]
+    return quote_etag(hashlib.sha256('\n'.join(parts).encode()).hexdigest()[:32])
+
+
+def conditional_catalogue(*catalogues):
+    """
+    Decorate a DRF function view that only reads ``catalogues``: answer a
+    matching If-None-Match with 304 before the view runs, and tag 200s with
+    the ETag. Put it below ``@api_view`` so authentication runs first.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            etag = catalogue_etag(request, *catalogues)
+            if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+            if if_none_match and (etag in parse_etags(if_none_match) or if_none_match.strip() == '*'):
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+            response = view(request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                response['ETag'] = etag
+            return response
+        return wrapper
+    return decorator
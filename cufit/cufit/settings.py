@@ -46,7 +46,7 @@ REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
-    "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated"),
+    "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
 }
 
 
@@ -85,6 +85,18 @@ DATABASES = {
         "NAME": BASE_DIR / "db.sqlite3",
     }
 }
+# The catalogue version tokens in cufit/catalogue.py must change for every worker
+# process at once. Redis when REDIS_URL is set; without it the per-process default
+# cache only suits a single worker (`manage.py check --deploy` warns about it).
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+# Seconds a process reuses a catalogue version token before asking the cache again
+CATALOGUE_VERSION_TTL = float(os.getenv("CATALOGUE_VERSION_TTL", "1"))
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"
@@ -105,5 +117,13 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 AUTH_USER_MODEL = "users.CustomUser"
 
 
+# Meal plan engine: "sampler" (in-memory candidate pools), "sql" (window-function query)
+# or "columnar" (NumPy index, also used by macro plans and the chatbot)
+MEAL_PLAN_ENGINE = os.getenv("MEAL_PLAN_ENGINE", "sampler")
+
+# Exercise search: "fts5" (SQLite FTS5 index, where available) or "like" (icontains scan)
+EXERCISE_SEARCH = os.getenv("EXERCISE_SEARCH", "fts5")
+
+
 STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY")
 WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
@@ -0,0 +1,206 @@
+"""
+Process-local columnar read model of the MealPlan catalogue.
+
+The catalogue is loaded once into NumPy arrays: categorical columns are
+integer-coded against a per-column vocabulary, goals are kept as the
+``goal_mask`` bits, cooking time as its ``min_minutes``/``max_minutes``
+range and macros as one float matrix. Segment filters and
+macro ranges are answered with boolean masks, without touching the
+database. The arrays are rebuilt on MealPlan signals and whenever the
+shared catalogue version changes (see ``cufit/catalogue.py``).
+
+Enabled with ``MEAL_PLAN_ENGINE = 'columnar'``, which also routes macro
+plan candidates and the chatbot ``get_meals`` tool through the index.
+"""
+import threading
+
+import numpy as np
+from django.conf import settings
+
+from cufit.catalogue import MEAL_PLANS, catalogue_version
+
+from .models import MealPlan
+
+CATEGORICAL = ('meal_type', 'diet_selection', 'diet_preference', 'cooking_time')
+MACROS = ('calories', 'protein', 'carbs', 'fat')
+RANGE_LOOKUPS = {
+    'gt': np.greater,
+    'gte': np.greater_equal,
+    'lt': np.less,
+    'lte': np.less_equal,
+}
+
+
+def columnar_enabled():
+    return getattr(settings, 'MEAL_PLAN_ENGINE', 'sampler') == 'columnar'
+
+
+class MealPlanColumns:
+    """One immutable snapshot of the catalogue, ordered by meal_id."""
+
+    def __init__(self, rows, version):
+        self.version = version
+        self.meal_ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self.names = np.array([row[1] for row in rows], dtype=object)
+        self.vocabularies = {}
+        self.codes = {}
+        for offset, column in enumerate(CATEGORICAL, start=2):
+            vocabulary = {}
+            self.codes[column] = np.array(
+                [vocabulary.setdefault(row[offset], len(vocabulary)) for row in rows], dtype=np.int32
+            )
+            self.vocabularies[column] = vocabulary
+        goals_offset = 2 + len(CATEGORICAL)
+        self.goal_masks = np.array([row[goals_offset] for row in rows], dtype=np.int64)
+        # Unknown minimum never matches (NaN); open-ended maximum is +inf
+        self.min_minutes = np.array([row[goals_offset + 1] for row in rows], dtype=float)
+        self.max_minutes = np.array(
+            [np.inf if row[goals_offset + 2] is None else row[goals_offset + 2] for row in rows], dtype=float
+        )
+        self.macros = np.array([row[goals_offset + 3:] for row in rows], dtype=float).reshape(-1, len(MACROS))
+
+    def __len__(self):
+        return len(self.meal_ids)
+
+    def equals(self, column, value):
+        code = self.vocabularies[column].get(value)
+        if code is None:
+            return np.zeros(len(self), dtype=bool)
+        return self.codes[column] == code
+
+    def within(self, minutes):
+        """Rows whose cooking time lies inside ``minutes``, as ``models.cooking_time_q``."""
+        low, high = minutes
+        return (self.min_minutes >= low) & (self.max_minutes <= (np.inf if high is None else high))
+
+
+class MealPlanIndex:
+    """
+    Boolean-mask queries over a columnar copy of the catalogue.
+
+    ``mask`` takes ORM-style lookups (``meal_type='lunch'``,
+    ``cooking_time__in=[...]``, ``calories__lte=600``,
+    ``protein__range=(20, 40)``) plus ``diet=(selection, preference)``
+    to match either diet field, ``goals`` to match any GOAL_BITS and
+    ``minutes=(min, max or None)`` to match a cooking time window.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._columns = None
+
+    def invalidate(self):
+        """Drop the arrays; they are rebuilt on the next query."""
+        with self._lock:
+            self._columns = None
+
+    def columns(self):
+        """Return the current snapshot, reloading it if the catalogue version moved on."""
+        version = catalogue_version(MEAL_PLANS)
+        columns = self._columns
+        if columns is not None and columns.version == version:
+            return columns
+        with self._lock:
+            if self._columns is None or self._columns.version != version:
+                self._columns = self._load(version)
+            return self._columns
+
+    def _load(self, version):
+        rows = list(
+            MealPlan.objects.order_by('meal_id')
+            .values_list('meal_id', 'name', *CATEGORICAL, 'goal_mask', 'min_minutes', 'max_minutes', *MACROS)
+            .iterator(chunk_size=2000)
+        )
+        return MealPlanColumns(rows, version)
+
+    def mask(self, diet=None, goals=0, minutes=None, columns=None, **lookups):
+        if columns is None:
+            columns = self.columns()
+        selected = np.ones(len(columns), dtype=bool)
+        if diet is not None:
+            diet_selection, diet_preference = diet
+            selected &= columns.equals('diet_selection', diet_selection) | columns.equals('diet_preference', diet_preference)
+        if goals:
+            selected &= (columns.goal_masks & goals) != 0
+        if minutes is not None:
+            selected &= columns.within(minutes)
+
+        for lookup, value in lookups.items():
+            column, _, operator = lookup.partition('__')
+            if column in CATEGORICAL and not operator:
+                selected &= columns.equals(column, value)
+            elif column in CATEGORICAL and operator == 'in':
+                matches = np.zeros(len(columns), dtype=bool)
+                for item in value:
+                    matches |= columns.equals(column, item)
+                selected &= matches
+            elif column in MACROS:
+                macro = columns.macros[:, MACROS.index(column)]
+                if not operator:
+                    selected &= macro == value
+                elif operator == 'range':
+                    low, high = value
+                    selected &= (macro >= low) & (macro <= high)
+                elif operator in RANGE_LOOKUPS:
+                    selected &= RANGE_LOOKUPS[operator](macro, value)
+                else:
+                    raise ValueError(f"Unsupported lookup: {lookup}")
+            else:
+                raise ValueError(f"Unsupported lookup: {lookup}")
+        return selected
+
+    def values(self, mask, *fields, limit=None, columns=None):
+        """Return ``[{field: value}]`` for the masked rows in meal_id order, like ``QuerySet.values()``."""
+        if columns is None:
+            columns = self.columns()
+        positions = np.flatnonzero(mask)[:limit]
+        data = {}
+        for field in fields:
+            if field == 'meal_id':
+                data[field] = columns.meal_ids[positions].tolist()
+            elif field == 'name':
+                data[field] = columns.names[positions].tolist()
+            elif field == 'goal_mask':
+                data[field] = columns.goal_masks[positions].tolist()
+            elif field in CATEGORICAL:
+                vocabulary = list(columns.vocabularies[field])
+                data[field] = [vocabulary[code] for code in columns.codes[field][positions]]
+            elif field in MACROS:
+                macro = columns.macros[positions, MACROS.index(field)]
+                data[field] = (macro.astype(np.int64) if field == 'calories' else macro).tolist()
+            else:
+                raise ValueError(f"Unknown field: {field}")
+        return [dict(zip(fields, row)) for row in zip(*data.values())] if fields else []
+
+    def sample(self, meal_type, diet_selection, diet_preference, minutes=None, goals=0, k=3, exclude=(), columns=None):
+        """
+        Draw up to k meal_ids with the sampler's tiers: rows are scored goal
+        match (2) + cooking time match (1), best score first, ties broken randomly.
+        """
+        if columns is None:
+            columns = self.columns()
+        selected = self.mask(diet=(diet_selection, diet_preference), meal_type=meal_type, columns=columns)
+        if exclude:
+            selected &= ~np.isin(columns.meal_ids, list(exclude))
+        positions = np.flatnonzero(selected)
+
+        score = np.zeros(len(positions), dtype=np.int8)
+        if goals:
+            score += 2 * ((columns.goal_masks[positions] & goals) != 0)
+        if minutes:
+            score += columns.within(minutes)[positions]
+        # lexsort sorts by the last key first: score descending, then random
+        order = np.lexsort((np.random.random(len(positions)), -score))[:k]
+        return columns.meal_ids[positions[order]].tolist()
+
+    def sample_many(self, meal_types, diet_selection, diet_preference, minutes=None, goals=0, k=3, exclude=()):
+        """``{meal_type: sample(meal_type, ...)}`` over one snapshot."""
+        columns = self.columns()
+        return {
+            meal_type: self.sample(meal_type, diet_selection, diet_preference, minutes, goals, k, exclude, columns)
+            for meal_type in meal_types
+        }
+
+
+
+meal_plan_index = MealPlanIndex()
@@ -0,0 +1,111 @@
+"""
+Nearest-restaurant lookups for the campus ``Meal`` catalogue.
+
+Restaurants with coordinates are bucketed into a uniform latitude/longitude
+grid. A radius query only visits the cells overlapping the search circle's
+bounding box, computes haversine distances for that handful of candidates
+with NumPy and sorts only the nearest ones, so its cost depends on how
+dense the area is, not on the size of the catalogue.
+
+The grid is process-local and rebuilt when the ``meals`` catalogue version
+changes (see ``cufit/catalogue.py``).
+"""
+import math
+import threading
+
+import numpy as np
+
+from cufit.catalogue import MEALS, catalogue_version
+from cufit.fast_json import serializer_rows
+
+from .models import Meal
+from .serializers import MealSerializer
+
+EARTH_RADIUS_M = 6_371_000
+METERS_PER_DEGREE = 111_320
+
+# ~1.1 km of latitude per cell
+CELL_DEGREES = 0.01
+
+
+def haversine(lat, lon, lats, lons):
+    """Distance in metres from (lat, lon) to each point of the ``lats``/``lons`` arrays."""
+    lat, lon = math.radians(lat), math.radians(lon)
+    lats, lons = np.radians(lats), np.radians(lons)
+    a = np.sin((lats - lat) / 2) ** 2 + math.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+
+class RestaurantGrid:
+    """Uniform grid over restaurant rows (dicts with latitude, longitude and price)."""
+
+    def __init__(self, rows, cell_degrees=CELL_DEGREES):
+        self.rows = [row for row in rows if row['latitude'] is not None and row['longitude'] is not None]
+        self.cell_degrees = cell_degrees
+        self.latitudes = np.array([row['latitude'] for row in self.rows], dtype=float)
+        self.longitudes = np.array([row['longitude'] for row in self.rows], dtype=float)
+        self.prices = np.array([row['price'] for row in self.rows], dtype=float)
+
+        cells = np.stack([self._cell(self.latitudes), self._cell(self.longitudes)], axis=1)
+        order = np.lexsort((cells[:, 1], cells[:, 0]))
+        keys, starts = np.unique(cells[order], axis=0, return_index=True)
+        self.cells = {
+            (int(row), int(column)): positions
+            for (row, column), positions in zip(keys, np.split(order, starts[1:]))
+        } if len(self.rows) else {}
+
+    def _cell(self, degrees):
+        return np.floor(np.asarray(degrees) / self.cell_degrees).astype(np.int64)
+
+    def nearby(self, latitude, longitude, radius, max_price=None, limit=None):
+        """Return up to ``limit`` ``[(row, distance in metres)]`` within ``radius`` metres, nearest first."""
+        lat_span = radius / METERS_PER_DEGREE
+        lon_span = radius / (METERS_PER_DEGREE * max(math.cos(math.radians(latitude)), 1e-6))
+        rows = range(int(self._cell(latitude - lat_span)), int(self._cell(latitude + lat_span)) + 1)
+        columns = range(int(self._cell(longitude - lon_span)), int(self._cell(longitude + lon_span)) + 1)
+
+        if len(rows) * len(columns) > len(self.cells):
+            # Huge radius: cheaper to walk the occupied cells than the bounding box
+            buckets = [
+                positions for (row, column), positions in self.cells.items()
+                if row in rows and column in columns
+            ]
+        else:
+            buckets = [self.cells[key] for key in ((row, column) for row in rows for column in columns) if key in self.cells]
+        if not buckets:
+            return []
+
+        candidates = np.concatenate(buckets)
+        if max_price is not None:
+            candidates = candidates[self.prices[candidates] <= max_price]
+        distances = haversine(latitude, longitude, self.latitudes[candidates], self.longitudes[candidates])
+        within = distances <= radius
+        candidates, distances = candidates[within], distances[within]
+        if limit is not None and len(distances) > limit:
+            # Only the nearest ``limit`` need sorting
+            nearest = np.argpartition(distances, limit - 1)[:limit]
+            candidates, distances = candidates[nearest], distances[nearest]
+        order = np.argsort(distances, kind='stable')
+        return [(self.rows[position], float(distance)) for position, distance in zip(candidates[order], distances[order])]
+
+
+class CampusMealIndex:
+    """The grid for the current ``Meal`` catalogue, rebuilt when the catalogue version changes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._grid = None
+        self._version = None
+
+    def grid(self):
+        version = catalogue_version(MEALS)
+        if self._grid is not None and self._version == version:
+            return self._grid
+        with self._lock:
+            if self._grid is None or self._version != version:
+                rows = serializer_rows(Meal.objects.filter(latitude__isnull=False, longitude__isnull=False), MealSerializer)
+                self._grid, self._version = RestaurantGrid(rows), version
+            return self._grid
+
+
+campus_meal_index = CampusMealIndex()
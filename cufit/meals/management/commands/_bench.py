@@ -0,0 +1,48 @@
+"""
+Shared helpers for the benchmark commands.
+
+Benchmarks run against a throwaway test database so the development
+database is never touched.
+"""
+import io
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.core.management import call_command
+from django.db import connection
+
+from .add_mealplans import COMBINATIONS
+
+
+@contextmanager
+def scratch_database():
+    """Create a migrated test database, point the default connection at it, then drop it."""
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def seed_catalogue(scale):
+    """Seed ``scale`` copies of the 8,640-row catalogue with add_mealplans."""
+    call_command('add_mealplans', scale=scale, seed=0, stdout=io.StringIO())
+    return COMBINATIONS * scale
+
+
+def time_calls(func, iterations):
+    """Run ``func`` ``iterations`` times and return the timings in milliseconds."""
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def summarize(timings):
+    timings = sorted(timings)
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    return f"mean {statistics.mean(timings):8.3f} ms   p95 {p95:8.3f} ms"
@@ -1,116 +1,139 @@
-from django.core.management.base import BaseCommand
-from meals.models import MealPlan
+import itertools
 import random
 
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from cufit.catalogue import MEAL_PLANS, bump_catalogue_version
+from meals.models import GOAL_BITS, MealPlan, parse_cooking_time
+
+MEAL_TYPES = ['breakfast', 'lunch', 'dinner', 'snacks']
+
+# Dictionary of meal names for each meal type
+MEAL_NAMES = {
+    'breakfast': [
+        "Oatmeal with Berries", "Scrambled Eggs with Toast", 
+        "Greek Yogurt Parfait", "Breakfast Burrito",
+        "Pancakes with Maple Syrup", "Avocado Toast with Eggs",
+        "Smoothie Bowl", "Breakfast Sandwich",
+        "French Toast", "Overnight Oats"
+    ],
+    'lunch': [
+        "Grilled Chicken Salad", "Turkey Club Sandwich",
+        "Quinoa Buddha Bowl", "Tuna Wrap",
+        "Vegetable Stir Fry", "Mediterranean Pasta",
+        "Black Bean Burrito", "Poke Bowl",
+        "Chicken Caesar Wrap", "Veggie Burger"
+    ],
+    'dinner': [
+        "Grilled Salmon", "Chicken Breast with Vegetables",
+        "Beef Stir Fry", "Vegetable Curry",
+        "Pasta Primavera", "Baked Chicken",
+        "Fish Tacos", "Tofu Stir Fry",
+        "Shrimp Scampi", "Eggplant Parmesan"
+    ],
+    'snacks': [
+        "Mixed Nuts", "Greek Yogurt",
+        "Apple with Peanut Butter", "Protein Bar",
+        "Hummus with Carrots", "Trail Mix",
+        "Protein Smoothie", "Rice Cakes",
+        "Fruit Salad", "Granola Bar"
+    ]
+}
+
+DIET_SELECTIONS = ['no-diet', 'keto', 'fasting', 'gluten-free', 'raw-food', 'bulking']
+DIET_PREFERENCES = ['veg', 'non-veg', 'eggitarian', 'mediterranean', 'vegan', 'detox']
+COOKING_TIMES = [
+    'Less than 10 minutes',
+    '10 - 20 minutes',
+    '20 - 30 minutes',
+    '30 - 45 minutes',
+    'More than 45 minutes'
+]
+GOAL_SELECTIONS = [
+    "weight-loss", "muscle-gain", "get-lean", "maintain", "strength",
+    "endurance", "flexibility", "sports", "body-recomp", "powerlifting",
+    "calisthenics", "general-health"
+]
+
+# Sample recipe instructions and links
+RECIPE_INSTRUCTIONS = [
+    "1. Preheat oven to 350°F\n2. Mix ingredients\n3. Bake for 20 minutes",
+    "1. Chop vegetables\n2. Cook in pan\n3. Season to taste",
+    "1. Boil water\n2. Add ingredients\n3. Simmer for 15 minutes",
+    "1. Prepare ingredients\n2. Mix in bowl\n3. Serve fresh"
+]
+
+RECIPE_LINKS = [
+    "https://example.com/recipe1",
+    "https://example.com/recipe2",
+    "https://example.com/recipe3",
+    "https://example.com/recipe4"
+]
+
+COMBINATIONS = len(MEAL_TYPES) * len(DIET_SELECTIONS) * len(DIET_PREFERENCES) * len(COOKING_TIMES) * len(GOAL_SELECTIONS)
+
+
+def catalogue_rows(scale=1, rng=None):
+    """Yield unsaved MealPlans: ``scale`` entries for every meal type/diet/cooking time/goal combination."""
+    rng = rng or random.Random()
+    combinations = itertools.product(
+        range(scale), MEAL_TYPES, DIET_SELECTIONS, DIET_PREFERENCES, COOKING_TIMES, GOAL_SELECTIONS
+    )
+    for _, meal_type, diet_selection, diet_preference, cooking_time, goal in combinations:
+        min_minutes, max_minutes = parse_cooking_time(cooking_time)
+        yield MealPlan(
+            meal_type=meal_type,
+            name=rng.choice(MEAL_NAMES[meal_type]),
+            diet_selection=diet_selection,
+            diet_preference=diet_preference,
+            cooking_time=cooking_time,
+            min_minutes=min_minutes,  # bulk_create skips MealPlan.save()
+            max_minutes=max_minutes,
+            goal_selection=goal,
+            goal_mask=GOAL_BITS[goal],
+            calories=rng.randint(200, 800),
+            protein=round(rng.uniform(10, 40), 1),
+            carbs=round(rng.uniform(20, 80), 1),
+            fat=round(rng.uniform(5, 30), 1),
+            recipe_link=rng.choice(RECIPE_LINKS),
+            instructions=rng.choice(RECIPE_INSTRUCTIONS),
+            diet_selected=False
+        )
+
+
 class Command(BaseCommand):
     help = 'Add meal plans with various combinations'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, default=1,
+                            help=f'Entries per combination; the catalogue gets {COMBINATIONS} x scale rows (default: 1)')
+        parser.add_argument('--seed', type=int,
+                            help='Random seed for reproducible meal data')
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help='Rows per INSERT (default: 2000)')
+
     def handle(self, *args, **options):
-        meal_types = ['breakfast', 'lunch', 'dinner', 'snacks']
-        
-        # Dictionary of meal names for each meal type
-        meal_names = {
-            'breakfast': [
-                "Oatmeal with Berries", "Scrambled Eggs with Toast", 
-                "Greek Yogurt Parfait", "Breakfast Burrito",
-                "Pancakes with Maple Syrup", "Avocado Toast with Eggs",
-                "Smoothie Bowl", "Breakfast Sandwich",
-                "French Toast", "Overnight Oats"
-            ],
-            'lunch': [
-                "Grilled Chicken Salad", "Turkey Club Sandwich",
-                "Quinoa Buddha Bowl", "Tuna Wrap",
-                "Vegetable Stir Fry", "Mediterranean Pasta",
-                "Black Bean Burrito", "Poke Bowl",
-                "Chicken Caesar Wrap", "Veggie Burger"
-            ],
-            'dinner': [
-                "Grilled Salmon", "Chicken Breast with Vegetables",
-                "Beef Stir Fry", "Vegetable Curry",
-                "Pasta Primavera", "Baked Chicken",
-                "Fish Tacos", "Tofu Stir Fry",
-                "Shrimp Scampi", "Eggplant Parmesan"
-            ],
-            'snacks': [
-                "Mixed Nuts", "Greek Yogurt",
-                "Apple with Peanut Butter", "Protein Bar",
-                "Hummus with Carrots", "Trail Mix",
-                "Protein Smoothie", "Rice Cakes",
-                "Fruit Salad", "Granola Bar"
-            ]
-        }
-
-        diet_selections = ['no-diet', 'keto', 'fasting', 'gluten-free', 'raw-food', 'bulking']
-        diet_preferences = ['veg', 'non-veg', 'eggitarian', 'mediterranean', 'vegan', 'detox']
-        cooking_times = [
-            'Less than 10 minutes',
-            '10 - 20 minutes',
-            '20 - 30 minutes',
-            '30 - 45 minutes',
-            'More than 45 minutes'
-        ]
-        goal_selections = [
-            "weight-loss", "muscle-gain", "get-lean", "maintain", "strength",
-            "endurance", "flexibility", "sports", "body-recomp", "powerlifting",
-            "calisthenics", "general-health"
-        ]
-
-        # Sample recipe instructions and links
-        recipe_instructions = [
-            "1. Preheat oven to 350°F\n2. Mix ingredients\n3. Bake for 20 minutes",
-            "1. Chop vegetables\n2. Cook in pan\n3. Season to taste",
-            "1. Boil water\n2. Add ingredients\n3. Simmer for 15 minutes",
-            "1. Prepare ingredients\n2. Mix in bowl\n3. Serve fresh"
-        ]
-
-        recipe_links = [
-            "https://example.com/recipe1",
-            "https://example.com/recipe2",
-            "https://example.com/recipe3",
-            "https://example.com/recipe4"
-        ]
+        scale = max(1, options['scale'])
+        batch_size = max(1, options['batch_size'])
+        rows = catalogue_rows(scale, random.Random(options['seed']))
+        total = COMBINATIONS * scale
 
         count = 0
         try:
-            # Create meal plans with different combinations
-            for meal_type in meal_types:
-                for diet_selection in diet_selections:
-                    for diet_preference in diet_preferences:
-                        for cooking_time in cooking_times:
-                            # Create multiple entries for each combination with different goals
-                            for goal in goal_selections:
-                                try:
-                                    meal_name = random.choice(meal_names[meal_type])
-                                    meal_plan = MealPlan(
-                                        meal_type=meal_type,
-                                        name=meal_name,  # Add the meal name
-                                        diet_selection=diet_selection,
-                                        diet_preference=diet_preference,
-                                        cooking_time=cooking_time,
-                                        goal_selection=f"['{goal}']",
-                                        calories=random.randint(200, 800),
-                                        protein=round(random.uniform(10, 40), 1),
-                                        carbs=round(random.uniform(20, 80), 1),
-                                        fat=round(random.uniform(5, 30), 1),
-                                        recipe_link=random.choice(recipe_links),
-                                        instructions=random.choice(recipe_instructions),
-                                        diet_selected=False
-                                    )
-                                    meal_plan.save()
-                                    count += 1
-                                    if count % 100 == 0:  # Print progress every 100 entries
-                                        self.stdout.write(f'Created {count} meal plans...')
-                                except Exception as e:
-                                    self.stdout.write(
-                                        self.style.WARNING(
-                                            f'Error creating meal plan: {meal_type}, {diet_selection}, {diet_preference}, {cooking_time}, {goal}: {str(e)}'
-                                        )
-                                    )
+            # All or nothing: a failed batch rolls the whole seed back
+            with transaction.atomic():
+                while batch := list(itertools.islice(rows, batch_size)):
+                    MealPlan.objects.bulk_create(batch)
+                    count += len(batch)
+                    self.stdout.write(f'Created {count}/{total} meal plans...')
+            # bulk_create sends no signals, so tell the in-memory read models to reload
+            bump_catalogue_version(MEAL_PLANS)
 
             self.stdout.write(
                 self.style.SUCCESS(f'Successfully created {count} meal plans')
             )
         except Exception as e:
             self.stdout.write(
-                self.style.ERROR(f'Error creating meal plans: {str(e)}')
-            ) 
\ No newline at end of file
+                self.style.ERROR(f'Error creating meal plans, nothing was saved: {str(e)}')
+            )
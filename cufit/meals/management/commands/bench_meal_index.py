@@ -0,0 +1,96 @@
+import random
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from meals.columnar import MACROS, meal_plan_index
+from meals.models import GOAL_BITS, MealPlan, parse_cooking_time
+from meals.optimizer import load_candidates
+from meals.planner import ENGINES, MealPreferences
+from meals.sampler import MEAL_TYPES, meal_plan_sampler
+from ._bench import scratch_database, seed_catalogue, summarize, time_calls
+from .add_mealplans import COOKING_TIMES, DIET_PREFERENCES, DIET_SELECTIONS
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the columnar MealPlan index against SQLite for plans, chatbot lookups and macro candidates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', type=int, nargs='+', default=[1, 10],
+                            help='Catalogue sizes as multiples of the 8,640-row seed (default: 1 10)')
+        parser.add_argument('--iterations', type=int, default=50,
+                            help='Calls timed per approach and scale')
+
+    def handle(self, *args, **options):
+        for scale in options['scales']:
+            with scratch_database():
+                count = seed_catalogue(scale)
+                self.stdout.write(f'{count} meal plans (x{scale}):')
+                self._run(options['iterations'])
+
+    def _run(self, iterations):
+        rng = random.Random(1)
+        preferences = [
+            MealPreferences(
+                rng.choice(DIET_SELECTIONS), rng.choice(DIET_PREFERENCES), parse_cooking_time(rng.choice(COOKING_TIMES)),
+                rng.choice(list(GOAL_BITS.values())),
+            )
+            for _ in range(iterations)
+        ]
+
+        def pick():
+            return preferences[rng.randrange(iterations)]
+
+        start = time.perf_counter()
+        meal_plan_index.invalidate()
+        meal_plan_index.columns()
+        self.stdout.write(f'  index load:            {(time.perf_counter() - start) * 1000:8.1f} ms')
+        meal_plan_sampler.invalidate()
+        meal_plan_sampler.segments()
+
+        self.stdout.write('  daily plan')
+        for engine, plan in ENGINES.items():
+            self.stdout.write(f'    {engine:<20}{summarize(time_calls(lambda: plan(pick()), iterations))}')
+
+        def chat_filters():
+            diet_selection, diet_preference, _, _ = pick()
+            return {'diet_selection': diet_selection, 'diet_preference': diet_preference,
+                    'meal_type': rng.choice(MEAL_TYPES)}
+
+        def chat_orm():
+            list(MealPlan.objects.filter(**chat_filters()).values('name', 'meal_type', 'calories', 'protein')[:5])
+
+        def chat_index():
+            meal_plan_index.values(meal_plan_index.mask(**chat_filters()), 'name', 'meal_type', 'calories', 'protein', limit=5)
+
+        self.stdout.write('  chatbot get_meals')
+        self.stdout.write(f'    {"sqlite":<20}{summarize(time_calls(chat_orm, iterations))}')
+        self.stdout.write(f'    {"columnar":<20}{summarize(time_calls(chat_index, iterations))}')
+
+        def macro_range_orm():
+            list(MealPlan.objects.filter(calories__range=(300, 500), protein__gte=20).values_list('meal_id', flat=True))
+
+        def macro_range_index():
+            columns = meal_plan_index.columns()
+            columns.meal_ids[meal_plan_index.mask(calories__range=(300, 500), protein__gte=20, columns=columns)].tolist()
+
+        self.stdout.write('  macro range filter')
+        self.stdout.write(f'    {"sqlite":<20}{summarize(time_calls(macro_range_orm, iterations))}')
+        self.stdout.write(f'    {"columnar":<20}{summarize(time_calls(macro_range_index, iterations))}')
+
+        def macro_candidates_orm():
+            # What load_candidates used to run per request on the row engines
+            diet_selection, diet_preference, _, _ = pick()
+            rows = MealPlan.objects.filter(
+                Q(diet_selection=diet_selection) | Q(diet_preference=diet_preference), meal_type__in=MEAL_TYPES,
+            ).values_list('meal_type', 'meal_id', *MACROS)
+            grouped = {meal_type: [] for meal_type in MEAL_TYPES}
+            for meal_type, *values in rows:
+                grouped[meal_type].append(values)
+            return {meal_type: np.array(values, dtype=float) for meal_type, values in grouped.items()}
+
+        self.stdout.write('  macro plan candidates')
+        self.stdout.write(f'    {"sqlite":<20}{summarize(time_calls(macro_candidates_orm, iterations))}')
+        self.stdout.write(f'    {"columnar":<20}{summarize(time_calls(lambda: load_candidates(pick()), iterations))}')
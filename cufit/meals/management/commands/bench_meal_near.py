@@ -0,0 +1,61 @@
+import random
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from meals.geo import RestaurantGrid, haversine
+from ._bench import summarize, time_calls
+
+# Montreal campuses the synthetic restaurants cluster around
+CAMPUSES = [
+    (45.4972, -73.5790),  # Concordia SGW
+    (45.4582, -73.6405),  # Concordia Loyola
+    (45.5048, -73.5772),  # McGill
+    (45.5017, -73.6153),  # Université de Montréal
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the restaurant grid against a full haversine scan for ?near= queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100, 10000, 50000],
+                            help='Synthetic restaurant counts (default: 100 10000 50000)')
+        parser.add_argument('--radius', type=float, default=2000,
+                            help='Search radius in metres (default: 2000)')
+        parser.add_argument('--limit', type=int, default=50,
+                            help='Nearest results returned per query (default: 50)')
+        parser.add_argument('--iterations', type=int, default=200,
+                            help='Queries timed per approach and size')
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        radius, limit, iterations = options['radius'], options['limit'], options['iterations']
+        for size in options['sizes']:
+            rows = []
+            for index in range(size):
+                latitude, longitude = rng.choice(CAMPUSES)
+                rows.append({
+                    'id': index,
+                    'latitude': rng.gauss(latitude, 0.015),
+                    'longitude': rng.gauss(longitude, 0.02),
+                    'price': rng.randint(8, 60),
+                })
+            grid = RestaurantGrid(rows)
+            points = [(rng.gauss(lat, 0.01), rng.gauss(lon, 0.01)) for lat, lon in (rng.choice(CAMPUSES) for _ in range(iterations))]
+
+            def scan():
+                latitude, longitude = points[rng.randrange(iterations)]
+                distances = haversine(latitude, longitude, grid.latitudes, grid.longitudes)
+                within = np.flatnonzero((distances <= radius) & (grid.prices <= 30))
+                nearest = within[np.argsort(distances[within])][:limit]
+                return [(grid.rows[position], distances[position]) for position in nearest]
+
+            def indexed():
+                latitude, longitude = points[rng.randrange(iterations)]
+                return grid.nearby(latitude, longitude, radius, max_price=30, limit=limit)
+
+            hits = np.mean([len(grid.nearby(lat, lon, radius, max_price=30)) for lat, lon in points])
+            self.stdout.write(f'{size} restaurants ({len(grid.cells)} cells, {hits:.0f} in range per query, nearest {limit} returned):')
+            self.stdout.write(f'  full scan   {summarize(time_calls(scan, iterations))}')
+            self.stdout.write(f'  grid        {summarize(time_calls(indexed, iterations))}')
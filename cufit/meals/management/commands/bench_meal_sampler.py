@@ -0,0 +1,67 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from meals.models import MealPlan, cooking_time_q, parse_cooking_time
+from meals.sampler import MEAL_TYPES, MealPlanSampler
+from ._bench import scratch_database, seed_catalogue, summarize, time_calls
+from .add_mealplans import COOKING_TIMES, DIET_PREFERENCES, DIET_SELECTIONS
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the candidate-pool sampler against ORDER BY RANDOM() meal plan queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', type=int, nargs='+', default=[10, 100],
+                            help='Catalogue sizes as multiples of the 8,640-row seed (default: 10 100)')
+        parser.add_argument('--iterations', type=int, default=50,
+                            help='Meal plans generated per approach and scale')
+
+    def handle(self, *args, **options):
+        for scale in options['scales']:
+            with scratch_database():
+                start = time.perf_counter()
+                count = seed_catalogue(scale)
+                self.stdout.write(f'Seeded {count} meal plans (x{scale}) in {time.perf_counter() - start:.1f}s')
+                self._run(options['iterations'])
+
+    def _run(self, iterations):
+        rng = random.Random(1)
+        preferences = [
+            (rng.choice(DIET_SELECTIONS), rng.choice(DIET_PREFERENCES), parse_cooking_time(rng.choice(COOKING_TIMES)))
+            for _ in range(iterations)
+        ]
+
+        def legacy():
+            diet_selection, diet_preference, minutes = preferences[rng.randrange(iterations)]
+            base_query = (Q(diet_selection=diet_selection) | Q(diet_preference=diet_preference)) & cooking_time_q(minutes)
+            for meal_type in MEAL_TYPES:
+                meals = MealPlan.objects.filter(base_query, meal_type=meal_type).order_by('?')[:3]
+                if not meals.exists():
+                    meals = MealPlan.objects.filter(
+                        Q(diet_selection=diet_selection) | Q(diet_preference=diet_preference),
+                        meal_type=meal_type
+                    ).order_by('?')[:3]
+                list(meals.values())
+
+        sampler = MealPlanSampler()
+
+        def pooled():
+            diet_selection, diet_preference, minutes = preferences[rng.randrange(iterations)]
+            meal_ids = [
+                meal_id
+                for meal_type in MEAL_TYPES
+                for meal_id in sampler.sample(meal_type, diet_selection, diet_preference, minutes)
+            ]
+            list(MealPlan.objects.filter(meal_id__in=meal_ids).values())
+
+        start = time.perf_counter()
+        for diet_selection, diet_preference, minutes in preferences:
+            for meal_type in MEAL_TYPES:
+                sampler.candidates(meal_type, diet_selection, diet_preference, minutes)
+        self.stdout.write(f'  pool build + warm-up: {(time.perf_counter() - start) * 1000:.1f} ms')
+
+        self.stdout.write(f'  order_by("?"): {summarize(time_calls(legacy, iterations))}')
+        self.stdout.write(f'  sampler:       {summarize(time_calls(pooled, iterations))}')
@@ -0,0 +1,59 @@
+import io
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from cufit.fast_json import ORJSONRenderer, serializer_rows
+from meals.models import Meal, MealPlan
+from meals.serializers import MealPlanSerializer, MealSerializer
+from workout.models import ExerciseLibrary
+from workout.serializers import ExerciseSerializer
+from ._bench import scratch_database, seed_catalogue
+
+
+class Command(BaseCommand):
+    help = 'Benchmark ModelSerializer + JSONRenderer against values_list + orjson on the seeded catalogues'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, default=1,
+                            help='MealPlan catalogue size as a multiple of the 8,640-row seed (default: 1)')
+        parser.add_argument('--exercises', type=int, default=5000,
+                            help='Synthetic ExerciseLibrary rows (default: 5000)')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Timed runs per path; the best one is reported')
+
+    def handle(self, *args, **options):
+        with scratch_database():
+            seed_catalogue(options['scale'])
+            call_command('meal', stdout=io.StringIO())
+            ExerciseLibrary.objects.bulk_create(
+                ExerciseLibrary(name=f'Exercise {index}', description='Description ' * 10, instructions='Step. ' * 20)
+                for index in range(options['exercises'])
+            )
+
+            for queryset, serializer_class in [
+                (MealPlan.objects.all(), MealPlanSerializer),
+                (Meal.objects.all(), MealSerializer),
+                (ExerciseLibrary.objects.all(), ExerciseSerializer),
+            ]:
+                self._compare(queryset, serializer_class, options['repeat'])
+
+    def _compare(self, queryset, serializer_class, repeat):
+        def drf():
+            return JSONRenderer().render(serializer_class(queryset.all(), many=True).data)
+
+        def fast():
+            return ORJSONRenderer().render(serializer_rows(queryset.all(), serializer_class))
+
+        rows = queryset.count()
+        self.stdout.write(f'{queryset.model.__name__} ({rows} rows):')
+        for label, func in [('ModelSerializer + JSONRenderer', drf), ('values_list + orjson', fast)]:
+            best = min(self._time(func) for _ in range(repeat))
+            self.stdout.write(f'  {label:<32}{best * 1000:9.1f} ms   {rows / best:12,.0f} rows/s')
+
+    def _time(self, func):
+        start = time.perf_counter()
+        func()
+        return time.perf_counter() - start
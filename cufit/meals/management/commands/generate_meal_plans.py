@@ -0,0 +1,131 @@
+import collections
+import datetime
+import multiprocessing
+import os
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import IntegrityError, connections, transaction
+
+from meals.models import UserMealPlan
+from meals.planner import MEALS_PER_TYPE, PLAN_SLOTS, MealPreferences
+from meals.sampler import init_worker, meal_plan_sampler, sample_plans
+from users.models import Profile
+
+
+class Command(BaseCommand):
+    help = 'Generate and store meal plans for every active user ahead of time (default: tomorrow)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', type=datetime.date.fromisoformat,
+                            help='Plan date as YYYY-MM-DD (default: tomorrow)')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Worker processes; 1 plans in this process (default: CPU count)')
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help='Users read, planned and written per batch (default: 500)')
+
+    def handle(self, *args, **options):
+        date = options['date'] or datetime.date.today() + datetime.timedelta(days=1)
+        workers = max(1, options['workers'])
+        chunk_size = max(1, options['chunk_size'])
+
+        profiles = Profile.objects.filter(user__is_active=True).exclude(user__usermealplan__date=date)
+        total = profiles.count()
+        self.stdout.write(f'Planning {date} for {total} users with {workers} worker(s)...')
+
+        segments = meal_plan_sampler.segments()
+        chunks = self._chunks(profiles, chunk_size)
+        start = time.perf_counter()
+        planned = 0
+        self.skipped = 0
+
+        if workers == 1:
+            init_worker(segments)
+            results = map(sample_plans, chunks)
+            planned = self._write_all(results, date, total)
+        else:
+            # Workers never touch the database; don't hand them open connections
+            connections.close_all()
+            with multiprocessing.Pool(workers, initializer=init_worker, initargs=(segments,)) as pool:
+                planned = self._write_all(self._pooled(pool, chunks, window=workers * 2), date, total)
+
+        elapsed = time.perf_counter() - start
+        rate = planned / elapsed if elapsed else 0
+        if self.skipped:
+            self.stdout.write(f'Skipped {self.skipped} users who got a plan while the run was going')
+        self.stdout.write(
+            self.style.SUCCESS(f'Stored {planned} meal plans for {date} in {elapsed:.1f}s ({rate:.0f} users/s)')
+        )
+
+    def _chunks(self, profiles, chunk_size):
+        """Yield ``[(user_id, preferences tuple)]`` batches, paging on user_id."""
+        profiles = profiles.only(
+            'user_id', 'diet_selection', 'diet_preference', 'cooking_time_preference', 'goal_selection'
+        ).order_by('user_id')
+        last_user_id = 0
+        while True:
+            chunk = [
+                (profile.user_id, tuple(MealPreferences.from_profile(profile)))
+                for profile in profiles.filter(user_id__gt=last_user_id)[:chunk_size]
+            ]
+            if not chunk:
+                return
+            last_user_id = chunk[-1][0]
+            yield chunk
+
+    def _pooled(self, pool, chunks, window):
+        """
+        Plan chunks in the pool, in order, with at most ``window`` chunks in
+        flight so users are read from the database only as fast as they are written.
+        """
+        pending = collections.deque()
+        for chunk in chunks:
+            pending.append(pool.apply_async(sample_plans, (chunk,)))
+            if len(pending) >= window:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+    def _write_all(self, results, date, total):
+        planned = 0
+        for chunk in results:
+            planned += self._write_chunk(chunk, date)
+            self.stdout.write(f'  {planned}/{total} users planned')
+        return planned
+
+    def _planned_users(self, chunk, date):
+        return set(
+            UserMealPlan.objects.filter(date=date, user_id__in=[user_id for user_id, _ in chunk])
+            .values_list('user_id', flat=True)
+        )
+
+    def _write_chunk(self, chunk, date, attempts=3):
+        for attempt in range(attempts):
+            try:
+                with transaction.atomic():
+                    # Users who opened the app after the chunk was read already have a plan
+                    existing = self._planned_users(chunk, date)
+                    kept = [(user_id, plan) for user_id, plan in chunk if user_id not in existing]
+                    self._insert(kept, date)
+            except IntegrityError:
+                # A live request stored one between the check and the insert; check again
+                if attempt == attempts - 1:
+                    raise
+                continue
+            self.skipped += len(chunk) - len(kept)
+            return len(kept)
+
+    def _insert(self, chunk, date):
+        user_meal_plans = UserMealPlan.objects.bulk_create(
+            UserMealPlan(user_id=user_id, date=date) for user_id, _ in chunk
+        )
+        for slot in PLAN_SLOTS:
+            through = getattr(UserMealPlan, slot).through
+            through.objects.bulk_create(
+                (
+                    through(usermealplan_id=user_meal_plan.pk, mealplan_id=meal_id)
+                    for user_meal_plan, (_, plan) in zip(user_meal_plans, chunk)
+                    for meal_id in plan[slot]
+                ),
+                batch_size=MEALS_PER_TYPE * 1000,
+            )
@@ -0,0 +1,114 @@
+import csv
+import itertools
+import json
+import os
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from cufit.catalogue import MEAL_PLANS, bump_catalogue_version
+from meals.models import MEAL_TYPE_CHOICES, MealPlan, goal_mask, parse_cooking_time
+
+IMPORT_FIELDS = [
+    'name', 'meal_type', 'diet_selection', 'diet_preference', 'goal_selection', 'cooking_time',
+    'calories', 'protein', 'carbs', 'fat', 'recipe_link', 'instructions', 'diet_selected',
+]
+MEAL_TYPES = {key for key, _ in MEAL_TYPE_CHOICES}
+# CSV exports spell booleans in lower case, which BooleanField.to_python rejects
+CSV_BOOLEANS = {'true': True, 'false': False, 'yes': True, 'no': False}
+
+
+def read_jsonl(handle):
+    for line_number, line in enumerate(handle, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError:
+            yield line_number, None
+
+
+def read_csv(handle):
+    # Header is line 1
+    for line_number, record in enumerate(csv.DictReader(handle), start=2):
+        yield line_number, record
+
+
+READERS = {'jsonl': read_jsonl, 'csv': read_csv}
+
+
+def build_meal_plan(record):
+    """Convert one imported record into an unsaved MealPlan, raising ValidationError on bad values."""
+    if not isinstance(record, dict):
+        raise ValidationError("not a JSON object")
+    values = {}
+    for name in IMPORT_FIELDS:
+        value = record.get(name)
+        if value in (None, ''):
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+            if name == 'diet_selected':
+                value = CSV_BOOLEANS.get(value.lower(), value)
+        values[name] = MealPlan._meta.get_field(name).to_python(value)
+
+    if values.get('meal_type') not in MEAL_TYPES:
+        raise ValidationError(f"meal_type must be one of {sorted(MEAL_TYPES)}")
+    if 'cooking_time' not in values:
+        raise ValidationError("cooking_time is required")
+    minutes = parse_cooking_time(values['cooking_time'])
+    if minutes is None:
+        raise ValidationError(f"cooking_time {values['cooking_time']!r} is not a range of minutes")
+    values.setdefault('instructions', '')
+    # bulk_create skips MealPlan.save(), so derive the goal bits and minutes here
+    values['goal_mask'] = goal_mask(values.get('goal_selection'))
+    values['min_minutes'], values['max_minutes'] = minutes
+    return MealPlan(**values)
+
+
+class Command(BaseCommand):
+    help = 'Stream meal plans from a JSONL or CSV file into the catalogue in constant memory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File with one meal plan per JSON line or CSV row')
+        parser.add_argument('--format', choices=sorted(READERS),
+                            help='Input format (default: from the file extension)')
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help='Rows per INSERT (default: 2000)')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        if file_format == 'json':
+            file_format = 'jsonl'
+        if file_format not in READERS:
+            raise CommandError(f"Can't tell the format of {path}; pass --format jsonl or --format csv")
+        batch_size = max(1, options['batch_size'])
+
+        imported = skipped = 0
+        with open(path, newline='', encoding='utf-8') as handle:
+            rows = self._meal_plans(READERS[file_format](handle))
+            # All or nothing: only one batch is held in memory at a time
+            with transaction.atomic():
+                while batch := list(itertools.islice(rows, batch_size)):
+                    plans = [plan for plan in batch if plan is not None]
+                    MealPlan.objects.bulk_create(plans)
+                    imported += len(plans)
+                    skipped += len(batch) - len(plans)
+                    self.stdout.write(f'Imported {imported} meal plans...')
+        # bulk_create sends no signals, so tell the in-memory read models to reload
+        bump_catalogue_version(MEAL_PLANS)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully imported {imported} meal plans ({skipped} skipped)')
+        )
+
+    def _meal_plans(self, records):
+        """Yield a MealPlan per record, or None for records that were skipped with a warning."""
+        for line_number, record in records:
+            try:
+                yield build_meal_plan(record)
+            except ValidationError as e:
+                self.stdout.write(self.style.WARNING(f'Skipping line {line_number}: {"; ".join(e.messages)}'))
+                yield None
@@ -1,9 +1,54 @@
+import re
+
 from django.core.management.base import BaseCommand
 from meals.models import Meal
 
+# Approximate street-level positions (WGS84) for the streets in the seed data,
+# taken near the downtown campus for streets that cross it. Good to a few
+# hundred metres, which is enough to rank restaurants by walking distance;
+# give a record its own "latitude"/"longitude" to override.
+STREET_COORDINATES = {
+    "Rue Guy": (45.4958, -73.5795),
+    "Rue Mackay": (45.4965, -73.5789),
+    "Rue Bishop": (45.4972, -73.5782),
+    "Rue Crescent": (45.4980, -73.5776),
+    "Crescent Street": (45.4980, -73.5776),
+    "Rue de la Montagne": (45.4987, -73.5769),
+    "Rue Drummond": (45.4995, -73.5763),
+    "Rue Stanley": (45.5002, -73.5756),
+    "Rue Peel": (45.5010, -73.5750),
+    "Rue Saint Mathieu": (45.4951, -73.5802),
+    "Rue Saint-Marc": (45.4944, -73.5808),
+    "Rue Lambert Closse": (45.4938, -73.5816),
+    "Avenue Lincoln": (45.4945, -73.5820),
+    "Rue Sainte-Catherine Ouest": (45.4970, -73.5765),
+    "Rue Sainte-Catherine": (45.4970, -73.5765),
+    "Boulevard de Maisonneuve Ouest": (45.4980, -73.5778),
+    "Rue Sherbrooke Ouest": (45.4990, -73.5790),
+    "Sherbrooke Street West": (45.4990, -73.5790),
+    "Rue City Councillors": (45.5035, -73.5707),
+    "Avenue Union": (45.5040, -73.5700),
+    "Rue Mayor": (45.5037, -73.5703),
+    "Rue de Bleury": (45.5050, -73.5675),
+    "Place Ville Marie": (45.5017, -73.5690),
+    "Avenue du Parc": (45.5130, -73.5850),
+    "Boulevard Saint-Laurent": (45.5170, -73.5790),
+    "Rue Saint-Denis": (45.5150, -73.5720),
+    "Avenue du Mont-Royal E": (45.5245, -73.5830),
+    "Rue Notre-Dame Ouest": (45.4790, -73.5830),
+    "Place d'Youville": (45.5010, -73.5560),
+    "Rue Saint-Vincent": (45.5075, -73.5530),
+}
+
+
+def street_coordinates(location):
+    """(latitude, longitude) of a seed address's street, or (None, None) if it isn't known."""
+    street = re.sub(r"^[0-9A-Za-z-]*[0-9][0-9A-Za-z-]* ", "", location).split(",")[0].strip()
+    return STREET_COORDINATES.get(street, (None, None))
+
 
 class Command(BaseCommand):
-    help = "Insert restaurant data into the database"
+    help = "Insert or refresh restaurant data, including coordinates, in the database"
 
     def handle(self, *args, **kwargs):
         data = [
@@ -515,6 +560,9 @@ class Command(BaseCommand):
         ]
 
         for item in data:
-            Meal.objects.create(**item)
+            if "latitude" not in item:
+                item["latitude"], item["longitude"] = street_coordinates(item["location"])
+            # Re-running the seed fills in coordinates for existing rows
+            Meal.objects.update_or_create(id=item.pop("id"), defaults=item)
 
         self.stdout.write(self.style.SUCCESS("Successfully inserted restaurant data"))
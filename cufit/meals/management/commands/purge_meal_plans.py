@@ -0,0 +1,127 @@
+import datetime
+import json
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from meals.models import MealPlan, UserMealPlan
+from meals.planner import PLAN_SLOTS
+
+DEFAULT_CHECKPOINT = os.path.join(tempfile.gettempdir(), 'purge_meal_plans.checkpoint.json')
+
+
+class Command(BaseCommand):
+    help = 'Delete stored UserMealPlans older than --days, plus orphaned slot rows, in small resumable batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=90,
+                            help='Keep plans from the last N days (default: 90)')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Rows deleted per transaction (default: 500)')
+        parser.add_argument('--pause', type=float, default=0.05,
+                            help='Seconds to sleep between batches so live requests get the write lock (default: 0.05)')
+        parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT,
+                            help=f'Progress file used to resume an interrupted run (default: {DEFAULT_CHECKPOINT})')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report what would be deleted and how long it would take, without deleting')
+
+    def handle(self, *args, **options):
+        self.batch_size = max(1, options['batch_size'])
+        self.pause = max(0.0, options['pause'])
+        cutoff = datetime.date.today() - datetime.timedelta(days=max(0, options['days']))
+
+        # (label, queryset of rows to delete); each step pages on its own primary key
+        steps = [('plans', UserMealPlan.objects.filter(date__lt=cutoff))]
+        for slot in PLAN_SLOTS:
+            through = getattr(UserMealPlan, slot).through
+            orphaned = through.objects.filter(
+                ~Exists(UserMealPlan.objects.filter(pk=OuterRef('usermealplan_id')))
+                | ~Exists(MealPlan.objects.filter(pk=OuterRef('mealplan_id')))
+            )
+            steps.append((f'orphaned {slot} rows', orphaned))
+
+        if options['dry_run']:
+            self._dry_run(cutoff, steps)
+            return
+
+        checkpoint = self._load_checkpoint(options['checkpoint'], cutoff)
+        if checkpoint['step']:
+            self.stdout.write(f"Resuming at {checkpoint['step']} after id {checkpoint['last_id']}")
+
+        start = time.perf_counter()
+        for label, queryset in steps:
+            if label in checkpoint['done']:
+                continue
+            last_id = checkpoint['last_id'] if checkpoint['step'] == label else 0
+            deleted = 0
+            while True:
+                ids = list(queryset.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:self.batch_size])
+                if not ids:
+                    break
+                # One short transaction per batch; M2M slot rows go with their plans
+                with transaction.atomic():
+                    queryset.model.objects.filter(pk__in=ids).delete()
+                deleted += len(ids)
+                last_id = ids[-1]
+                checkpoint.update(step=label, last_id=last_id)
+                self._save_checkpoint(options['checkpoint'], checkpoint)
+                self.stdout.write(f'  {label}: {deleted} deleted')
+                time.sleep(self.pause)
+
+            checkpoint['done'].append(label)
+            checkpoint.update(step=None, last_id=0)
+            self._save_checkpoint(options['checkpoint'], checkpoint)
+            self.stdout.write(f'Deleted {deleted} {label}')
+
+        if os.path.exists(options['checkpoint']):
+            os.remove(options['checkpoint'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Purged meal plans before {cutoff} in {time.perf_counter() - start:.1f}s')
+        )
+
+    def _dry_run(self, cutoff, steps):
+        # Read-only: counts, plus one timed batch lookup standing in for a batch
+        self.stdout.write(f'Dry run: nothing is deleted. Cutoff {cutoff}.')
+        plans = steps[0][1]
+        total_batches = 0
+        for label, queryset in steps:
+            count = queryset.count()
+            total_batches += -(-count // self.batch_size)
+            self.stdout.write(f'  {label}: {count}')
+        slot_rows = sum(
+            getattr(UserMealPlan, slot).through.objects.filter(usermealplan__in=plans).count()
+            for slot in PLAN_SLOTS
+        )
+        self.stdout.write(f'  slot rows removed with the plans: {slot_rows}')
+
+        # Time what a batch reads: its id page and the slot rows its delete cascades to
+        start = time.perf_counter()
+        ids = list(plans.order_by('pk').values_list('pk', flat=True)[:self.batch_size])
+        for slot in PLAN_SLOTS:
+            getattr(UserMealPlan, slot).through.objects.filter(usermealplan_id__in=ids).count()
+        batch_seconds = time.perf_counter() - start
+        estimate = total_batches * (batch_seconds + self.pause)
+        self.stdout.write(
+            f'Estimated duration: {estimate:.1f}s over {total_batches} batches of {self.batch_size} '
+            f'({batch_seconds * 1000:.1f}ms of reads per batch plus {self.pause}s pause; writes not measured)'
+        )
+
+    def _load_checkpoint(self, path, cutoff):
+        fresh = {'cutoff': cutoff.isoformat(), 'step': None, 'last_id': 0, 'done': []}
+        try:
+            with open(path) as handle:
+                checkpoint = json.load(handle)
+        except (OSError, ValueError):
+            return fresh
+        # A checkpoint for another cutoff would skip rows this run should delete
+        return checkpoint if checkpoint.get('cutoff') == fresh['cutoff'] else fresh
+
+    def _save_checkpoint(self, path, checkpoint):
+        # Write then rename so an interruption never leaves a half-written file
+        with open(f'{path}.tmp', 'w') as handle:
+            json.dump(checkpoint, handle)
+        os.replace(f'{path}.tmp', path)
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meals', '0005_alter_mealplan_meal_id'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mealplan',
+            index=models.Index(fields=['meal_type', 'diet_selection', 'diet_preference', 'cooking_time'], name='mealplan_segment_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mealplan',
+            index=models.Index(fields=['meal_type', 'diet_preference', 'cooking_time'], name='mealplan_type_pref_idx'),
+        ),
+    ]
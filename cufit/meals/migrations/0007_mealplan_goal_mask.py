@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:43
+
+import ast
+
+from django.db import migrations, models
+
+GOAL_KEYS = [
+    "weight-loss", "muscle-gain", "get-lean", "maintain", "strength",
+    "endurance", "flexibility", "sports", "body-recomp", "powerlifting",
+    "calisthenics", "general-health",
+]
+GOAL_BITS = {key: 1 << index for index, key in enumerate(GOAL_KEYS)}
+
+
+def to_mask(value):
+    if not value:
+        return 0
+    value = value.strip()
+    try:
+        goals = ast.literal_eval(value) if value.startswith('[') else value.split(',')
+    except (ValueError, SyntaxError):
+        goals = value.strip('[]').split(',')
+    mask = 0
+    for goal in goals:
+        mask |= GOAL_BITS.get(str(goal).strip(" '\""), 0)
+    return mask
+
+
+def populate_goal_mask(apps, schema_editor):
+    MealPlan = apps.get_model('meals', 'MealPlan')
+    batch = []
+    for meal_plan in MealPlan.objects.only('meal_id', 'goal_selection').iterator(chunk_size=2000):
+        meal_plan.goal_mask = to_mask(meal_plan.goal_selection)
+        batch.append(meal_plan)
+        if len(batch) >= 2000:
+            MealPlan.objects.bulk_update(batch, ['goal_mask'])
+            batch = []
+    if batch:
+        MealPlan.objects.bulk_update(batch, ['goal_mask'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meals', '0006_mealplan_segment_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='mealplan',
+            name='mealplan_segment_idx',
+        ),
+        migrations.AddField(
+            model_name='mealplan',
+            name='goal_mask',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_goal_mask, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='mealplan',
+            index=models.Index(fields=['meal_type', 'diet_selection', 'diet_preference', 'cooking_time', 'goal_mask'], name='mealplan_segment_idx'),
+        ),
+    ]
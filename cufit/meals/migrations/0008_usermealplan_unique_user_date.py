@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def delete_duplicate_plans(apps, schema_editor):
+    """Keep the newest plan per (user, date) so the unique constraint can be added."""
+    UserMealPlan = apps.get_model('meals', 'UserMealPlan')
+    duplicates = (
+        UserMealPlan.objects.values('user_id', 'date')
+        .annotate(latest=models.Max('id'), total=models.Count('id'))
+        .filter(total__gt=1)
+    )
+    for duplicate in duplicates.iterator():
+        UserMealPlan.objects.filter(
+            user_id=duplicate['user_id'], date=duplicate['date'], id__lt=duplicate['latest']
+        ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meals', '0007_mealplan_goal_mask'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_plans, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='usermealplan',
+            constraint=models.UniqueConstraint(fields=('user', 'date'), name='unique_user_meal_plan_per_day'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meals', '0008_usermealplan_unique_user_date'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mealplan',
+            index=models.Index(fields=['diet_selection'], name='mealplan_diet_selection_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mealplan',
+            index=models.Index(fields=['diet_preference'], name='mealplan_diet_pref_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mealplan',
+            index=models.Index(fields=['calories'], name='mealplan_calories_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mealplan',
+            index=models.Index(fields=['protein'], name='mealplan_protein_idx'),
+        ),
+    ]
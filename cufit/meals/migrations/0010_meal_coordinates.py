@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meals', '0009_mealplan_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='meal',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='meal',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:05
+
+import re
+
+from django.db import migrations, models
+
+
+def to_minutes(value):
+    # Snapshot of meals.models.parse_cooking_time
+    if not value:
+        return None, None
+    text = re.sub(r'\s*min(ute)?s?$', '', value.strip().lower())
+    if match := re.fullmatch(r'(\d+)\s*-\s*(\d+)', text):
+        return int(match[1]), int(match[2])
+    if match := re.fullmatch(r'(?:<|less than)\s*(\d+)', text):
+        return 0, int(match[1])
+    if match := re.fullmatch(r'(?:>|more than)\s*(\d+)|(\d+)\s*\+', text):
+        return int(match[1] or match[2]), None
+    return None, None
+
+
+def populate_minutes(apps, schema_editor):
+    MealPlan = apps.get_model('meals', 'MealPlan')
+    batch = []
+    for meal_plan in MealPlan.objects.only('meal_id', 'cooking_time').iterator(chunk_size=2000):
+        meal_plan.min_minutes, meal_plan.max_minutes = to_minutes(meal_plan.cooking_time)
+        batch.append(meal_plan)
+        if len(batch) >= 2000:
+            MealPlan.objects.bulk_update(batch, ['min_minutes', 'max_minutes'])
+            batch = []
+    if batch:
+        MealPlan.objects.bulk_update(batch, ['min_minutes', 'max_minutes'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meals', '0010_meal_coordinates'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='mealplan',
+            name='mealplan_segment_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='mealplan',
+            name='mealplan_type_pref_idx',
+        ),
+        migrations.AddField(
+            model_name='mealplan',
+            name='min_minutes',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='mealplan',
+            name='max_minutes',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(populate_minutes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='mealplan',
+            index=models.Index(fields=['meal_type', 'diet_selection', 'diet_preference', 'min_minutes', 'max_minutes', 'goal_mask'], name='mealplan_segment_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mealplan',
+            index=models.Index(fields=['meal_type', 'diet_preference', 'min_minutes', 'max_minutes'], name='mealplan_type_pref_idx'),
+        ),
+    ]
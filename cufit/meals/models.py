@@ -1,4 +1,8 @@
+import ast
+import re
+
 from django.db import models
+from django.db.models import Q
 from django.conf import settings
 
 # 🍳 Cooking Time Choices
@@ -10,6 +14,35 @@ COOKING_TIME_CHOICES = [
     (">45", "More than 45 minutes"),
 ]
 
+
+def parse_cooking_time(value):
+    """
+    (min_minutes, max_minutes) of a cooking time in any of its spellings: choice
+    keys ("10-20", ">45"), labels ("10 - 20 minutes", "More than 45 minutes") or
+    "10-20 minutes"/"45+ minutes". max_minutes is None when open-ended; unknown
+    values give None.
+    """
+    if not value:
+        return None
+    text = re.sub(r'\s*min(ute)?s?$', '', value.strip().lower())
+    if match := re.fullmatch(r'(\d+)\s*-\s*(\d+)', text):
+        return int(match[1]), int(match[2])
+    if match := re.fullmatch(r'(?:<|less than)\s*(\d+)', text):
+        return 0, int(match[1])
+    if match := re.fullmatch(r'(?:>|more than)\s*(\d+)|(\d+)\s*\+', text):
+        return int(match[1] or match[2]), None
+    return None
+
+
+def cooking_time_q(minutes):
+    """Meals whose cooking time range lies within ``minutes`` = (min, max or None)."""
+    low, high = minutes
+    q = Q(min_minutes__gte=low)
+    if high is not None:
+        q &= Q(max_minutes__lte=high)
+    return q
+
+
 # 🏋️ Goal Selection Choices
 GOAL_SELECTION_CHOICES = [
     ("weight-loss", "Lose Weight"),
@@ -26,6 +59,32 @@ GOAL_SELECTION_CHOICES = [
     ("general-health", "General Health"),
 ]
 
+# One bit per goal, in GOAL_SELECTION_CHOICES order (append new goals only)
+GOAL_BITS = {key: 1 << index for index, (key, _) in enumerate(GOAL_SELECTION_CHOICES)}
+
+
+def parse_goals(value):
+    """Split a stored goal value ("maintain", "['strength', 'sports']" or "a,b") into goal keys."""
+    if not value:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [str(goal).strip() for goal in value]
+    value = value.strip()
+    if value.startswith('['):
+        try:
+            return [str(goal).strip() for goal in ast.literal_eval(value)]
+        except (ValueError, SyntaxError):
+            value = value.strip('[]')
+    return [goal.strip(" '\"") for goal in value.split(',') if goal.strip(" '\"")]
+
+
+def goal_mask(value):
+    """Bitmask of the known goals in a stored goal value; unknown goals are ignored."""
+    mask = 0
+    for goal in parse_goals(value):
+        mask |= GOAL_BITS.get(goal, 0)
+    return mask
+
 # 🥦 Diet Preference Choices
 DIET_PREFERENCE_CHOICES = [
     ("veg", "Vegetarian"),
@@ -52,7 +111,11 @@ class MealPlan(models.Model):
     diet_selection = models.CharField(max_length=100, default='default_diet')
     diet_preference = models.CharField(max_length=20, choices=DIET_PREFERENCE_CHOICES, blank=True, null=True)  # ✅ NEW FIELD
     goal_selection = models.CharField(max_length=50, choices=GOAL_SELECTION_CHOICES, blank=True, null=True)
+    goal_mask = models.PositiveIntegerField(default=0)  # GOAL_BITS of goal_selection, kept in sync on save
     cooking_time = models.CharField(max_length=10, choices=COOKING_TIME_CHOICES)  # Cooking Time
+    # parse_cooking_time(cooking_time), kept in sync on save; NULL max is open-ended
+    min_minutes = models.PositiveSmallIntegerField(blank=True, null=True)
+    max_minutes = models.PositiveSmallIntegerField(blank=True, null=True)
     calories = models.IntegerField(default=0)  # ✅ NEW FIELD
     protein = models.FloatField(default=0.0)  # ✅ NEW FIELD
     carbs = models.FloatField(default=0.0)  # ✅ NEW FIELD
@@ -61,6 +124,25 @@ class MealPlan(models.Model):
     instructions = models.TextField()  # Cooking Instructions
     diet_selected = models.BooleanField(default=False)  # Whether the meal is selected in the plan
 
+    class Meta:
+        indexes = [
+            # Segment lookups (meal plan pools, chatbot get_meals, viewset filters)
+            models.Index(fields=['meal_type', 'diet_selection', 'diet_preference', 'min_minutes', 'max_minutes', 'goal_mask'], name='mealplan_segment_idx'),
+            # Second leg of the "diet_selection OR diet_preference" filter
+            models.Index(fields=['meal_type', 'diet_preference', 'min_minutes', 'max_minutes'], name='mealplan_type_pref_idx'),
+            # MealPlanViewSet filters without meal_type; SQLite keeps each index in rowid
+            # (meal_id) order, which is also the cursor pagination order
+            models.Index(fields=['diet_selection'], name='mealplan_diet_selection_idx'),
+            models.Index(fields=['diet_preference'], name='mealplan_diet_pref_idx'),
+            models.Index(fields=['calories'], name='mealplan_calories_idx'),
+            models.Index(fields=['protein'], name='mealplan_protein_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.goal_mask = goal_mask(self.goal_selection)
+        self.min_minutes, self.max_minutes = parse_cooking_time(self.cooking_time) or (None, None)
+        super().save(*args, **kwargs)
+
     def str(self):
         return f"{self.get_meal_type_display()} - {self.get_diet_selection_display()}"
 
@@ -73,6 +155,11 @@ class UserMealPlan(models.Model):
     dinner = models.ManyToManyField(MealPlan, related_name='dinner_meals', blank=True)  # ✅ Now ManyToMany
     snacks = models.ManyToManyField(MealPlan, related_name='snack_meals', blank=True)  # ✅ Added snacks
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'date'], name='unique_user_meal_plan_per_day'),
+        ]
+
     def str(self):
         return f"{self.user.username} - {self.date}"
     
@@ -82,6 +169,8 @@ class Meal(models.Model):
     location = models.CharField(max_length=100)
     price = models.IntegerField()
     url = models.URLField(max_length=500, blank=True, null=True)
+    latitude = models.FloatField(blank=True, null=True)  # WGS84, from the seed data
+    longitude = models.FloatField(blank=True, null=True)
 
     def __str__(self):
         return self.name
\ No newline at end of file
@@ -0,0 +1,193 @@
+"""
+Macro-target meal plan optimizer.
+
+Daily calorie and macro targets are estimated from the profile, then one
+breakfast, lunch, dinner and snack are picked so the day's totals land as
+close to those targets as possible. Scoring is vectorized over the candidate
+matrix of the user's segment:
+
+1. every candidate is scored against its meal type's share of the targets and
+   the best ``SHORTLIST`` per meal type are kept (``argpartition``, O(n));
+2. the shortlists are split into two halves whose combinations are enumerated
+   separately, and every (left, right) pairing is scored at once with one
+   small matrix product (meet in the middle, ``SHORTLIST ** 4`` days).
+
+Candidates always come from the columnar index's in-process snapshot
+(reloaded once per catalogue version), whatever ``MEAL_PLAN_ENGINE`` is, so
+a request never re-reads the macro columns from the table.
+"""
+import math
+
+import numpy as np
+
+from .columnar import MACROS, meal_plan_index
+from .models import MealPlan, parse_goals
+from .sampler import MEAL_TYPES
+
+# Per-meal-type shortlist size; 16 ** 4 = 65,536 day combinations to score
+SHORTLIST = 16
+
+# Share of the daily targets each meal type should cover
+MEAL_TYPE_SHARES = {'breakfast': 0.25, 'lunch': 0.35, 'dinner': 0.30, 'snacks': 0.10}
+
+# Relative weight of each macro's squared relative error
+MACRO_WEIGHTS = np.array([2.0, 1.5, 1.0, 1.0])
+
+BASE_CALORIES = 2000
+
+ACTIVITY_FACTORS = {
+    'sedentary': 0.85,
+    'light': 0.95,
+    'moderate': 1.0,
+    'very': 1.15,
+    'extra': 1.3,
+    'athlete': 1.4,
+}
+
+# (calorie adjustment, protein share of calories)
+GOAL_ADJUSTMENTS = {
+    'weight-loss': (0.8, 0.30),
+    'get-lean': (0.85, 0.30),
+    'muscle-gain': (1.1, 0.30),
+    'powerlifting': (1.1, 0.30),
+    'strength': (1.05, 0.30),
+    'body-recomp': (1.0, 0.30),
+    'endurance': (1.05, 0.20),
+    'sports': (1.05, 0.25),
+}
+FAT_SHARE = 0.27
+
+
+def _activity_factor(activity_level):
+    # Accepts "very", "very_active", "Moderately Active", ...
+    key = (activity_level or 'moderate').lower().replace(' ', '_').split('_')[0]
+    key = {'lightly': 'light', 'moderately': 'moderate'}.get(key, key)
+    return ACTIVITY_FACTORS.get(key, 1.0)
+
+
+def _bmi_factor(bmi):
+    try:
+        bmi = float(bmi)
+    except (TypeError, ValueError):
+        return 1.0
+    if math.isnan(bmi) or not 10 <= bmi <= 60:
+        return 1.0
+    if bmi < 18.5:
+        return 1.1
+    if bmi >= 30:
+        return 0.85
+    if bmi >= 25:
+        return 0.9
+    return 1.0
+
+
+def macro_targets(profile):
+    """Estimate daily (calories, protein g, carbs g, fat g) targets from the profile."""
+    calorie_factor, protein_share = 1.0, 0.20
+    for goal in parse_goals(profile.goal_selection):
+        goal_factor, goal_protein = GOAL_ADJUSTMENTS.get(goal, (1.0, 0.20))
+        if calorie_factor == 1.0:
+            calorie_factor = goal_factor
+        protein_share = max(protein_share, goal_protein)
+
+    calories = BASE_CALORIES * _activity_factor(profile.activity_level) * _bmi_factor(profile.bmi) * calorie_factor
+    carbs_share = 1 - protein_share - FAT_SHARE
+    return np.array([
+        round(calories),
+        round(calories * protein_share / 4, 1),
+        round(calories * carbs_share / 4, 1),
+        round(calories * FAT_SHARE / 9, 1),
+    ])
+
+
+def _errors(macros, targets):
+    """Weighted squared relative error of each row of ``macros`` (n, 4) against ``targets`` (4,)."""
+    deviation = macros / targets
+    deviation -= 1
+    deviation *= deviation
+    return deviation @ MACRO_WEIGHTS
+
+
+def _combinations(shortlists):
+    """Enumerate every pick across ``shortlists``: summed macros (n, 4) and shortlist indexes (n, k)."""
+    totals = np.zeros((1, len(MACROS)))
+    indexes = np.zeros((1, 0), dtype=np.intp)
+    for macros in shortlists:
+        totals = (totals[:, None, :] + macros[None, :, :]).reshape(-1, len(MACROS))
+        indexes = np.hstack([
+            np.repeat(indexes, len(macros), axis=0),
+            np.tile(np.arange(len(macros)), len(indexes))[:, None],
+        ])
+    return totals, indexes
+
+
+def best_combination(candidates, targets, shortlist=SHORTLIST):
+    """
+    Pick one meal per type.
+
+    ``candidates`` maps meal_type to ``(meal_ids, macros)`` where ``macros`` is
+    an (n, 4) array in MACROS order. Returns ``{meal_type: meal_id}`` and the
+    day's macro totals; meal types without candidates are left out.
+    """
+    meal_types = [meal_type for meal_type in MEAL_TYPES if meal_type in candidates and len(candidates[meal_type][0])]
+    if not meal_types:
+        return {}, np.zeros(len(MACROS))
+
+    short_ids, short_macros = [], []
+    for meal_type in meal_types:
+        meal_ids, macros = candidates[meal_type]
+        errors = _errors(macros, targets * MEAL_TYPE_SHARES[meal_type])
+        if len(errors) > shortlist:
+            keep = np.argpartition(errors, shortlist)[:shortlist]
+        else:
+            keep = np.arange(len(errors))
+        short_ids.append(np.asarray(meal_ids)[keep])
+        short_macros.append(macros[keep] / targets)
+
+    # With macros scaled by the targets, the error of left + right is
+    # sum(w * (left - 1 + right) ** 2), which expands into two per-side terms
+    # and one cross term computed for all pairings as a single matrix product.
+    middle = len(short_macros) // 2
+    left, left_indexes = _combinations(short_macros[:middle])
+    right, right_indexes = _combinations(short_macros[middle:])
+    left -= 1
+    errors = (
+        (left * left @ MACRO_WEIGHTS)[:, None]
+        + (right * right @ MACRO_WEIGHTS)[None, :]
+        + 2 * (left * MACRO_WEIGHTS) @ right.T
+    )
+    best_left, best_right = np.unravel_index(np.argmin(errors), errors.shape)
+
+    best = np.concatenate([left_indexes[best_left], right_indexes[best_right]])
+    picks = {
+        meal_type: int(short_ids[axis][index])
+        for axis, (meal_type, index) in enumerate(zip(meal_types, best))
+    }
+    totals = (left[best_left] + 1 + right[best_right]) * targets
+    return picks, totals
+
+
+def load_candidates(preferences):
+    """Read the macro matrix of every meal matching the user's diet, grouped by meal type."""
+    columns = meal_plan_index.columns()
+    diet = meal_plan_index.mask(diet=(preferences.diet_selection, preferences.diet_preference), columns=columns)
+    candidates = {}
+    for meal_type in MEAL_TYPES:
+        selected = diet & columns.equals('meal_type', meal_type)
+        candidates[meal_type] = (columns.meal_ids[selected], columns.macros[selected])
+    return candidates
+
+
+def macro_plan(profile, preferences):
+    """Build ``{meal_type: [meal row]}`` plus the targets and achieved totals."""
+    targets = macro_targets(profile)
+    picks, totals = best_combination(load_candidates(preferences), targets)
+
+    rows = {row['meal_id']: row for row in MealPlan.objects.filter(meal_id__in=picks.values()).values()}
+    meal_plan = {
+        meal_type: [rows[picks[meal_type]]] if picks.get(meal_type) in rows else []
+        for meal_type in MEAL_TYPES
+    }
+    meal_plan['targets'] = dict(zip(MACROS, targets.tolist()))
+    meal_plan['totals'] = dict(zip(MACROS, np.round(totals, 1).tolist()))
+    return meal_plan
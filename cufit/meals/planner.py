@@ -0,0 +1,225 @@
+"""
+Daily meal plan assembly.
+
+All three engines return ``{meal_type: [meal rows]}`` for breakfast, lunch, dinner
+and snacks from a single SQL statement, fallback tiers included:
+
+* ``sampler`` (default) draws meal_ids from the in-memory candidate pools
+  and fetches them with one primary-key lookup.
+* ``sql`` ranks every candidate with ``ROW_NUMBER()`` partitioned by
+  meal_type and keeps the top rows of each partition.
+* ``columnar`` scores the candidates with boolean masks over the in-memory
+  columnar index (see ``columnar.py``) and fetches the picks by primary key.
+
+The engine is picked with the ``MEAL_PLAN_ENGINE`` setting. Generated plans
+are stored in ``UserMealPlan`` and served from there for the rest of the day.
+"""
+import datetime
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Case, CharField, F, IntegerField, Q, Value, When, Window
+from django.db.models.functions import Random, RowNumber
+
+from .columnar import meal_plan_index
+from .models import MealPlan, UserMealPlan, cooking_time_q, goal_mask, parse_cooking_time
+from .sampler import MEAL_TYPES, meal_plan_sampler
+
+MEALS_PER_TYPE = 3
+
+# UserMealPlan M2M field -> MealPlan reverse query name
+PLAN_SLOTS = {
+    'breakfast': 'breakfast_meals',
+    'lunch': 'lunch_meals',
+    'dinner': 'dinner_meals',
+    'snacks': 'snack_meals',
+}
+
+# Profile fields that feed into plan generation
+PLAN_PROFILE_FIELDS = ('diet_selection', 'diet_preference', 'cooking_time_preference', 'goal_selection')
+
+class MealPreferences(NamedTuple):
+    diet_selection: Optional[str]
+    diet_preference: Optional[str]
+    minutes: Optional[tuple]  # (min, max or None) window from parse_cooking_time
+    goals: int
+
+    @classmethod
+    def from_profile(cls, profile):
+        return cls(
+            diet_selection=profile.diet_selection,
+            diet_preference=profile.diet_preference,
+            minutes=parse_cooking_time(profile.cooking_time_preference),
+            goals=goal_mask(profile.goal_selection),
+        )
+
+
+def sampled_plan(preferences, k=MEALS_PER_TYPE, sampler=meal_plan_sampler):
+    """Draw up to k meals per type from the sampler pools and fetch them in one query."""
+    # One catalogue version check for the four draws
+    sampled = sampler.sample_many(MEAL_TYPES, *preferences, k=k)
+    meal_ids = [meal_id for ids in sampled.values() for meal_id in ids]
+    rows = {row['meal_id']: row for row in MealPlan.objects.filter(meal_id__in=meal_ids).values()}
+
+    return {
+        meal_type: [rows[meal_id] for meal_id in ids if meal_id in rows]
+        for meal_type, ids in sampled.items()
+    }
+
+
+def ranked_plan(preferences, k=MEALS_PER_TYPE):
+    """
+    Pick the top k meals per type with one windowed query.
+
+    Rows are scored goal match (2) + cooking time match (1), so the exact tier
+    comes first and the fallback tiers fill any remaining slots; ties are
+    broken randomly.
+    """
+    diet_selection, diet_preference, minutes, goals = preferences
+
+    score = Value(0)
+    if goals:
+        score = score + Case(
+            When(goal_hits__gt=0, then=Value(2)), default=Value(0), output_field=IntegerField()
+        )
+    if minutes:
+        score = score + Case(
+            When(cooking_time_q(minutes), then=Value(1)), default=Value(0), output_field=IntegerField()
+        )
+
+    rows = (
+        MealPlan.objects
+        .filter(Q(diet_selection=diet_selection) | Q(diet_preference=diet_preference), meal_type__in=MEAL_TYPES)
+        .alias(goal_hits=F('goal_mask').bitand(goals))
+        .alias(rank=Window(RowNumber(), partition_by=F('meal_type'), order_by=[score.desc(), Random()]))
+        .filter(rank__lte=k)
+        .values()
+    )
+
+    meal_plan = {meal_type: [] for meal_type in MEAL_TYPES}
+    for row in rows:
+        meal_plan[row['meal_type']].append(row)
+    return meal_plan
+
+
+def columnar_plan(preferences, k=MEALS_PER_TYPE):
+    """Score candidates over the columnar index and fetch the picks in one query."""
+    return sampled_plan(preferences, k=k, sampler=meal_plan_index)
+
+
+ENGINES = {
+    'sampler': sampled_plan,
+    'sql': ranked_plan,
+    'columnar': columnar_plan,
+}
+
+
+def daily_plan(preferences, k=MEALS_PER_TYPE):
+    engine = ENGINES[getattr(settings, 'MEAL_PLAN_ENGINE', 'sampler')]
+    return engine(preferences, k=k)
+
+
+def stored_plans(user, start, end):
+    """
+    Return the user's stored plans between ``start`` and ``end`` (inclusive) as
+    ``{date: {meal_type: [meal rows]}}``. The four slots are read with one UNION ALL.
+    """
+    slots = [
+        MealPlan.objects
+        .filter(**{f'{related_name}__user': user, f'{related_name}__date__range': (start, end)})
+        .annotate(slot=Value(slot, output_field=CharField()), plan_date=F(f'{related_name}__date'))
+        .values()
+        for slot, related_name in PLAN_SLOTS.items()
+    ]
+    plans = {}
+    for row in slots[0].union(*slots[1:], all=True):
+        meal_plan = plans.setdefault(row.pop('plan_date'), {meal_type: [] for meal_type in MEAL_TYPES})
+        meal_plan[row.pop('slot')].append(row)
+    return plans
+
+
+def stored_plan(user, date):
+    """Return the user's stored plan for ``date``, or None when nothing is stored."""
+    return stored_plans(user, date, date).get(date)
+
+
+def persist_plans(user, plans):
+    """
+    Store generated ``{date: meal_plan}`` plans with one insert per table.
+    Returns False when another request stored a plan for one of the dates
+    first, in which case the stored plans should be served instead.
+    """
+    try:
+        with transaction.atomic():
+            user_meal_plans = UserMealPlan.objects.bulk_create(
+                UserMealPlan(user=user, date=date) for date in plans
+            )
+            for slot in PLAN_SLOTS:
+                through = getattr(UserMealPlan, slot).through
+                through.objects.bulk_create(
+                    through(usermealplan_id=user_meal_plan.pk, mealplan_id=meal['meal_id'])
+                    for user_meal_plan, meal_plan in zip(user_meal_plans, plans.values())
+                    for meal in meal_plan[slot]
+                )
+    except IntegrityError:
+        return False
+    return True
+
+
+def todays_plan(user, profile=None):
+    """Serve today's stored plan, generating and storing it on the first request of the day."""
+    today = datetime.date.today()
+    meal_plan = stored_plan(user, today)
+    if meal_plan is not None:
+        return meal_plan
+
+    if profile is None:
+        profile = user.profile
+    meal_plan = daily_plan(MealPreferences.from_profile(profile))
+    if not persist_plans(user, {today: meal_plan}):
+        meal_plan = stored_plan(user, today) or meal_plan
+    return meal_plan
+
+
+def week_plan(user, start, days=7, k=MEALS_PER_TYPE, profile=None):
+    """
+    Return ``[{date, breakfast, lunch, dinner, snacks}]`` for ``days`` days from
+    ``start``, serving stored days and generating and storing the rest.
+
+    Missing days are drawn in one go per meal type from the sampler's candidate
+    pools (whatever MEAL_PLAN_ENGINE is), excluding every meal already in the
+    window, so generated days never repeat a meal while the pools last.
+    """
+    dates = [start + datetime.timedelta(days=offset) for offset in range(days)]
+    week = stored_plans(user, dates[0], dates[-1])
+    missing = [date for date in dates if date not in week]
+
+    if missing:
+        if profile is None:
+            profile = user.profile
+        preferences = MealPreferences.from_profile(profile)
+        used = {meal['meal_id'] for meal_plan in week.values() for meals in meal_plan.values() for meal in meals}
+        drawn = meal_plan_sampler.sample_many(MEAL_TYPES, *preferences, k=k * len(missing), exclude=used)
+        meal_ids = [meal_id for ids in drawn.values() for meal_id in ids]
+        rows = {row['meal_id']: row for row in MealPlan.objects.filter(meal_id__in=meal_ids).values()}
+
+        generated = {
+            date: {
+                meal_type: [rows[meal_id] for meal_id in drawn[meal_type][day * k:(day + 1) * k] if meal_id in rows]
+                for meal_type in MEAL_TYPES
+            }
+            for day, date in enumerate(missing)
+        }
+        if persist_plans(user, generated):
+            week.update(generated)
+        else:
+            week = stored_plans(user, dates[0], dates[-1])
+
+    empty_day = {meal_type: [] for meal_type in MEAL_TYPES}
+    return [{'date': date, **week.get(date, empty_day)} for date in dates]
+
+
+def invalidate_stored_plans(user):
+    """Drop today's and any pre-generated future plans, e.g. after a diet change."""
+    UserMealPlan.objects.filter(user=user, date__gte=datetime.date.today()).delete()
@@ -0,0 +1,160 @@
+import random
+import threading
+from collections import defaultdict
+
+MEAL_TYPES = ['breakfast', 'lunch', 'dinner', 'snacks']
+
+
+def _within(min_minutes, max_minutes, minutes):
+    """In-memory twin of ``models.cooking_time_q``: is [min_minutes, max_minutes] inside ``minutes``?"""
+    low, high = minutes
+    return (
+        min_minutes is not None and min_minutes >= low
+        and (high is None or (max_minutes is not None and max_minutes <= high))
+    )
+
+
+class MealPlanSampler:
+    """
+    Process-local candidate pools for random meal plan picks.
+
+    Segments are keyed by (meal_type, diet_selection, diet_preference,
+    min_minutes, max_minutes, goal_mask) and hold meal_ids only. Candidate lists for a
+    preference lookup are built once from the segments and cached, so a draw of
+    k meals costs O(k) instead of a full ``ORDER BY RANDOM()`` over the table.
+
+    The pools remember the ``meal_plans`` catalogue version they were loaded
+    from and reload when it moves on, so bulk loaders that bypass signals
+    (see ``cufit/catalogue.py``) are picked up too.
+
+    Pass ``segments`` to sample from an in-memory copy of the catalogue
+    without touching the database or the cache (see ``generate_meal_plans``).
+    """
+
+    def __init__(self, segments=None):
+        self._lock = threading.Lock()
+        self._segments = segments
+        self._fixed = segments is not None
+        self._version = None
+        self._candidates = {}
+
+    def invalidate(self):
+        """Drop the pools; they are rebuilt lazily on the next draw."""
+        with self._lock:
+            self._segments = None
+            self._candidates = {}
+
+    def _catalogue_version(self):
+        if self._fixed:
+            return None
+        # Lazy for the same reason as in _load_segments
+        from cufit.catalogue import MEAL_PLANS, catalogue_version
+        return catalogue_version(MEAL_PLANS)
+
+    def _refresh(self, version):
+        # Caller holds the lock
+        if self._segments is None or version != self._version:
+            self._segments = self._load_segments()
+            self._candidates = {}
+            self._version = version
+
+    def segments(self):
+        """Return the loaded segments, reading them from the database if needed."""
+        version = self._catalogue_version()
+        with self._lock:
+            self._refresh(version)
+            return self._segments
+
+    def _load_segments(self):
+        # Imported here so worker processes can unpickle this module without Django set up
+        from .models import MealPlan
+
+        segments = defaultdict(list)
+        rows = MealPlan.objects.order_by().values_list(
+            'meal_id', 'meal_type', 'diet_selection', 'diet_preference', 'min_minutes', 'max_minutes', 'goal_mask'
+        )
+        for meal_id, *key in rows.iterator(chunk_size=2000):
+            segments[tuple(key)].append(meal_id)
+        return dict(segments)
+
+    def candidates(self, meal_type, diet_selection, diet_preference, minutes=None, goals=0):
+        """
+        Return the meal_ids matching
+        ``meal_type AND (diet_selection OR diet_preference) [AND within minutes] [AND any of goals]``,
+        where ``minutes`` is a (min, max or None) window as in ``cooking_time_q`` and
+        ``goals`` is a GOAL_BITS mask and 0 means any goal.
+        """
+        return self._pool((meal_type, diet_selection, diet_preference, minutes, goals), self._catalogue_version())
+
+    def _pool(self, key, version):
+        pool = self._candidates.get(key) if version == self._version else None
+        if pool is not None:
+            return pool
+
+        meal_type, diet_selection, diet_preference, minutes, goals = key
+        with self._lock:
+            self._refresh(version)
+            pool = self._candidates.get(key)
+            if pool is None:
+                pool = tuple(
+                    meal_id
+                    for (seg_type, seg_selection, seg_preference, seg_min, seg_max, seg_goals), meal_ids in self._segments.items()
+                    if seg_type == meal_type
+                    and (seg_selection == diet_selection or seg_preference == diet_preference)
+                    and (minutes is None or _within(seg_min, seg_max, minutes))
+                    and (not goals or seg_goals & goals)
+                    for meal_id in meal_ids
+                )
+                self._candidates[key] = pool
+        return pool
+
+    def sample(self, meal_type, diet_selection, diet_preference, minutes=None, goals=0, k=3, exclude=()):
+        """
+        Draw up to k distinct meal_ids not in ``exclude``, best tier first: goal
+        and cooking time match, goal match, cooking time match, then any diet match.
+        """
+        return self._sample(self._catalogue_version(), meal_type, diet_selection, diet_preference, minutes, goals, k, exclude)
+
+    def sample_many(self, meal_types, diet_selection, diet_preference, minutes=None, goals=0, k=3, exclude=()):
+        """``{meal_type: sample(meal_type, ...)}`` with one catalogue version check for the whole plan."""
+        version = self._catalogue_version()
+        return {
+            meal_type: self._sample(version, meal_type, diet_selection, diet_preference, minutes, goals, k, exclude)
+            for meal_type in meal_types
+        }
+
+    def _sample(self, version, meal_type, diet_selection, diet_preference, minutes, goals, k, exclude=()):
+        tiers = dict.fromkeys(((minutes, goals), (None, goals), (minutes, 0), (None, 0)))
+        seen = set(exclude)
+        picked = []
+        for tier_minutes, tier_goals in tiers:
+            pool = self._pool((meal_type, diet_selection, diet_preference, tier_minutes, tier_goals), version)
+            # At most len(seen) of these draws repeat excluded or earlier picks
+            for meal_id in random.sample(pool, min(k - len(picked) + len(seen), len(pool))):
+                if meal_id not in seen:
+                    seen.add(meal_id)
+                    picked.append(meal_id)
+                    if len(picked) == k:
+                        return picked
+        return picked
+
+meal_plan_sampler = MealPlanSampler()
+
+
+# Process pool helpers for bulk plan generation. Workers receive a copy of the
+# segments once and only exchange plain tuples with the parent process.
+_worker_sampler = None
+
+
+def init_worker(segments):
+    global _worker_sampler
+    random.seed()
+    _worker_sampler = MealPlanSampler(segments)
+
+
+def sample_plans(chunk, k=3):
+    """Map ``[(user_id, preferences tuple)]`` to ``[(user_id, {meal_type: [meal_id]})]``."""
+    return [
+        (user_id, _worker_sampler.sample_many(MEAL_TYPES, *preferences, k=k))
+        for user_id, preferences in chunk
+    ]
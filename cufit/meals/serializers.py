@@ -9,11 +9,14 @@ class MealPlanSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 class UserMealPlanSerializer(serializers.ModelSerializer):
-    meal_details = MealPlanSerializer(source='breakfast', read_only=True)
+    breakfast = MealPlanSerializer(many=True, read_only=True)
+    lunch = MealPlanSerializer(many=True, read_only=True)
+    dinner = MealPlanSerializer(many=True, read_only=True)
+    snacks = MealPlanSerializer(many=True, read_only=True)
 
     class Meta:
         model = UserMealPlan
-        fields = ['date', 'meal_details']
+        fields = ['date', 'breakfast', 'lunch', 'dinner', 'snacks']
 
 class MealSerializer(serializers.ModelSerializer):
     class Meta:
@@ -0,0 +1,20 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from cufit.catalogue import MEAL_PLANS, MEALS, bump_catalogue_version
+
+from .columnar import meal_plan_index
+from .models import Meal, MealPlan
+from .sampler import meal_plan_sampler
+
+
+@receiver([post_save, post_delete], sender=MealPlan)
+def invalidate_meal_plan_pools(sender, **kwargs):
+    meal_plan_sampler.invalidate()
+    meal_plan_index.invalidate()
+    bump_catalogue_version(MEAL_PLANS)
+
+
+@receiver([post_save, post_delete], sender=Meal)
+def bump_meals_version(sender, **kwargs):
+    bump_catalogue_version(MEALS)
@@ -0,0 +1,1002 @@
+import datetime
+import io
+import itertools
+import json
+import os
+import tempfile
+from unittest import mock
+
+import numpy as np
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import F, Q
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from cufit.catalogue import MEAL_PLANS, MEALS, bump_catalogue_version, catalogue_version, check_shared_cache
+from cufit.fast_json import ORJSONRenderer, serializer_rows
+from users.models import CustomUser, Profile
+from users.views.chat import get_meals
+from .columnar import meal_plan_index
+from .geo import RestaurantGrid, haversine
+from .management.commands.generate_meal_plans import Command as GenerateMealPlans
+from .models import GOAL_BITS, Meal, MealPlan, UserMealPlan, cooking_time_q, goal_mask, parse_cooking_time
+from .optimizer import MACRO_WEIGHTS, best_combination, load_candidates
+from .planner import ENGINES, PLAN_SLOTS, MealPreferences, daily_plan, persist_plans, sampled_plan, stored_plans
+from .serializers import MealPlanSerializer, MealSerializer
+from .sampler import MEAL_TYPES, MealPlanSampler, meal_plan_sampler
+
+
+class MealPlanQueryPlanTests(TestCase):
+    """EXPLAIN QUERY PLAN checks for the MealPlan access paths."""
+
+    def assertUsesIndex(self, queryset, table='meals_mealplan'):
+        if connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN QUERY PLAN output is SQLite specific')
+        plan = queryset.explain()
+        table_scans = [
+            line for line in plan.splitlines()
+            if f'SCAN {table}' in line and 'COVERING INDEX' not in line
+        ]
+        self.assertFalse(table_scans, f'Full table scan in query plan:\n{plan}')
+
+    def test_meal_plan_pool_build_reads_covering_index(self):
+        # meals.sampler.MealPlanSampler._load_segments
+        self.assertUsesIndex(
+            MealPlan.objects.order_by().values_list(
+                'meal_id', 'meal_type', 'diet_selection', 'diet_preference', 'min_minutes', 'max_minutes', 'goal_mask'
+            )
+        )
+
+    def test_meal_plan_fetch_by_primary_key(self):
+        # meals.views.get_user_meal_plan
+        self.assertUsesIndex(MealPlan.objects.filter(meal_id__in=[1, 2, 3]).values())
+
+    def test_meal_plan_preference_filter(self):
+        # meal_type AND (diet_selection OR diet_preference) AND minutes within the preference
+        self.assertUsesIndex(
+            MealPlan.objects.filter(
+                Q(diet_selection='keto') | Q(diet_preference='veg'),
+                cooking_time_q(parse_cooking_time('10 - 20 minutes')),
+                meal_type='breakfast',
+            )
+        )
+
+    def test_chatbot_get_meals_filter(self):
+        # users.views.chat.get_meals
+        self.assertUsesIndex(
+            MealPlan.objects.filter(
+                diet_selection='keto', diet_preference='veg', meal_type='lunch'
+            ).values('name', 'meal_type', 'calories', 'protein')[:5]
+        )
+
+    def test_meal_plan_goal_filter(self):
+        # Goal bits within a diet segment
+        self.assertUsesIndex(
+            MealPlan.objects.filter(
+                diet_selection='keto', diet_preference='veg', meal_type='dinner'
+            ).alias(goal_hits=F('goal_mask').bitand(GOAL_BITS['strength'])).filter(goal_hits__gt=0)[:1]
+        )
+
+    def test_user_meal_plan_history(self):
+        # meals.views.UserMealPlanViewSet.list
+        self.assertUsesIndex(
+            UserMealPlan.objects.filter(user_id=1, date__range=('2026-01-01', '2026-01-31')).order_by('date'),
+            table='meals_usermealplan',
+        )
+
+    def test_meal_plan_viewset_detail(self):
+        # meals.views.MealPlanViewSet.retrieve
+        self.assertUsesIndex(MealPlan.objects.filter(pk=1))
+
+    def test_meal_plan_viewset_list_filters(self):
+        # meals.views.MealPlanViewSet.list, one page in cursor order. Open-ended
+        # ranges may still walk the primary key, which stops once the page is full.
+        for filters in [
+            {'meal_type': 'lunch', 'diet_selection': 'keto'},
+            {'diet_selection': 'keto'},
+            {'diet_preference': 'veg', 'min_minutes__gte': 0, 'max_minutes__lte': 10},
+            {'calories__gte': 300, 'calories__lte': 500},
+            {'protein__gte': 25, 'protein__lte': 40},
+        ]:
+            with self.subTest(filters=filters):
+                self.assertUsesIndex(MealPlan.objects.filter(**filters).order_by('meal_id')[:51])
+
+
+class GoalMaskTests(TestCase):
+
+    def test_goal_mask_parses_stored_formats(self):
+        strength, sports = GOAL_BITS['strength'], GOAL_BITS['sports']
+        self.assertEqual(goal_mask("['strength', 'sports']"), strength | sports)
+        self.assertEqual(goal_mask('strength'), strength)
+        self.assertEqual(goal_mask('strength, sports'), strength | sports)
+        self.assertEqual(goal_mask('unknown'), 0)
+        self.assertEqual(goal_mask(None), 0)
+
+    def test_save_keeps_goal_mask_in_sync(self):
+        meal_plan = MealPlan.objects.create(
+            meal_type='lunch', cooking_time='10 - 20 minutes',
+            goal_selection="['weight-loss']", instructions='',
+        )
+        self.assertEqual(meal_plan.goal_mask, GOAL_BITS['weight-loss'])
+
+
+class CookingTimeTests(TestCase):
+
+    def test_parse_cooking_time_reads_every_spelling(self):
+        for spellings, minutes in [
+            (['<10', 'Less than 10 minutes'], (0, 10)),
+            (['10-20', '10 - 20 minutes', '10-20 minutes'], (10, 20)),
+            (['30-45', '30 - 45 minutes', '30-45 minutes'], (30, 45)),
+            (['>45', 'More than 45 minutes', '45+ minutes', '45+'], (45, None)),
+        ]:
+            for spelling in spellings:
+                with self.subTest(spelling=spelling):
+                    self.assertEqual(parse_cooking_time(spelling), minutes)
+        self.assertIsNone(parse_cooking_time('soon'))
+        self.assertIsNone(parse_cooking_time(None))
+
+    def test_save_keeps_minutes_in_sync(self):
+        meal_plan = MealPlan.objects.create(meal_type='lunch', cooking_time='More than 45 minutes', instructions='')
+        self.assertEqual((meal_plan.min_minutes, meal_plan.max_minutes), (45, None))
+
+        meal_plan.cooking_time = '<10'
+        meal_plan.save()
+        self.assertEqual((meal_plan.min_minutes, meal_plan.max_minutes), (0, 10))
+
+    def test_range_predicate_matches_profile_preference(self):
+        for cooking_time in ['<10', '10 - 20 minutes', '20-30', 'More than 45 minutes']:
+            MealPlan.objects.create(name=cooking_time, meal_type='lunch', cooking_time=cooking_time, instructions='')
+        for preference, names in [
+            ('10 - 20 minutes', ['10 - 20 minutes']),
+            ('Less than 10 minutes', ['<10']),
+            ('45+ minutes', ['More than 45 minutes']),
+        ]:
+            with self.subTest(preference=preference):
+                matched = MealPlan.objects.filter(cooking_time_q(parse_cooking_time(preference)))
+                self.assertEqual(sorted(matched.values_list('name', flat=True)), names)
+
+
+class MealPlanSamplerTests(TestCase):
+    """Tiered draws from the in-memory pools, reloaded when the catalogue version moves on."""
+
+    @classmethod
+    def setUpTestData(cls):
+        # Lunches: 2 goal + time matches, 2 goal-only, 2 time-only, 2 diet-only
+        MealPlan.objects.bulk_create(
+            MealPlan(
+                name=f'{tier} {index}', meal_type='lunch', diet_selection='keto', diet_preference='veg',
+                min_minutes=minutes[0], max_minutes=minutes[1], goal_mask=goals, instructions='',
+            )
+            for tier, minutes, goals in [
+                ('exact', (10, 20), GOAL_BITS['strength']),
+                ('goal', (45, None), GOAL_BITS['strength']),
+                ('time', (10, 20), GOAL_BITS['maintain']),
+                ('diet', (45, None), GOAL_BITS['maintain']),
+            ]
+            for index in range(2)
+        )
+        MealPlan.objects.create(name='other diet', meal_type='lunch', diet_selection='paleo', diet_preference='vegan',
+                                min_minutes=10, max_minutes=20, goal_mask=GOAL_BITS['strength'], instructions='')
+        cls.ids = dict(MealPlan.objects.values_list('name', 'meal_id'))
+
+    def setUp(self):
+        bump_catalogue_version(MEAL_PLANS)
+        self.sampler = MealPlanSampler()
+
+    def sample(self, k, exclude=()):
+        picked = self.sampler.sample('lunch', 'keto', 'veg', (10, 20), GOAL_BITS['strength'], k=k, exclude=exclude)
+        self.assertEqual(len(picked), len(set(picked)))
+        return picked
+
+    def draw(self, k, exclude=()):
+        picked = self.sample(k, exclude)
+        names = dict(MealPlan.objects.filter(meal_id__in=picked).values_list('meal_id', 'name'))
+        return [names[meal_id] for meal_id in picked]
+
+    def test_tiers_fill_in_order(self):
+        tiers = [name.split()[0] for name in self.draw(k=7)]
+        self.assertEqual(tiers, ['exact'] * 2 + ['goal'] * 2 + ['time'] * 2 + ['diet'])
+        # Never more than the diet matches, never another diet
+        self.assertEqual(len(self.draw(k=20)), 8)
+
+    def test_exclude(self):
+        exclude = {self.ids['exact 0'], self.ids['goal 0'], self.ids['goal 1']}
+        self.assertEqual([name.split()[0] for name in self.draw(k=3, exclude=exclude)], ['exact', 'time', 'time'])
+        self.assertNotIn('exact 0', self.draw(k=8, exclude=exclude))
+
+    def test_bulk_writes_reload_the_pools(self):
+        self.sample(k=1)
+        with CaptureQueriesContext(connection) as queries:
+            self.sample(k=8)
+        self.assertEqual(len(queries), 0)
+
+        # What add_mealplans / import_mealplans / purge_meal_plans do: no signals, one version bump
+        MealPlan.objects.bulk_create([MealPlan(
+            name='new exact', meal_type='lunch', diet_selection='keto', diet_preference='veg',
+            min_minutes=15, max_minutes=20, goal_mask=GOAL_BITS['strength'], instructions='',
+        )])
+        MealPlan.objects.filter(name__startswith='exact').delete()
+        bump_catalogue_version(MEAL_PLANS)
+        self.assertEqual(self.draw(k=1), ['new exact'])
+        self.assertNotIn('exact 0', self.draw(k=20))
+
+
+    def test_one_version_check_per_plan(self):
+        preferences = MealPreferences('keto', 'veg', (10, 20), GOAL_BITS['strength'])
+        for target, sampler in [('cufit.catalogue.catalogue_version', self.sampler),
+                                ('meals.columnar.catalogue_version', meal_plan_index)]:
+            with self.subTest(target=target), mock.patch(target, wraps=catalogue_version) as lookups:
+                plan = sampled_plan(preferences, k=2, sampler=sampler)
+                self.assertEqual(lookups.call_count, 1)
+                self.assertEqual(len(plan['lunch']), 2)
+
+
+@override_settings(MEAL_PLAN_ENGINE='sampler')
+class DailyMealPlanTests(TestCase):
+    """Plan generation is one statement per engine; stored plans are served in one query."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('planner', 'planner@example.com', 'secret')
+        cls.profile = Profile.objects.create(
+            user=cls.user, diet_selection='keto', diet_preference='veg',
+            cooking_time_preference='10 - 20 minutes', goal_selection="['strength']",
+        )
+        MealPlan.objects.bulk_create(
+            MealPlan(
+                name=f'{meal_type} {index}', meal_type=meal_type, diet_selection='keto',
+                diet_preference='veg', cooking_time='10 - 20 minutes', min_minutes=10, max_minutes=20,
+                goal_selection=goal, goal_mask=GOAL_BITS[goal], instructions='',
+            )
+            for meal_type in MEAL_TYPES
+            for index, goal in enumerate(['strength', 'maintain', 'sports', 'strength'])
+        )
+
+    def setUp(self):
+        meal_plan_sampler.invalidate()
+        meal_plan_index.invalidate()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_plan(self, max_queries=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/meals/api/user-meal-plan/')
+        self.assertEqual(response.status_code, 200)
+        if max_queries is not None:
+            self.assertLessEqual(len(queries), max_queries, [query['sql'] for query in queries])
+        return response.data
+
+    def assertFullPlan(self, meal_plan):
+        self.assertEqual(set(meal_plan), set(MEAL_TYPES))
+        for meal_type, meals in meal_plan.items():
+            self.assertEqual(len(meals), 3)
+            self.assertTrue(all(meal['meal_type'] == meal_type for meal in meals))
+            # Both goal matches rank ahead of the fallback tier
+            self.assertEqual(sum(meal['goal_mask'] == GOAL_BITS['strength'] for meal in meals), 2)
+
+    def assertEngineUsesOneQuery(self):
+        preferences = MealPreferences.from_profile(self.profile)
+        with CaptureQueriesContext(connection) as queries:
+            meal_plan = daily_plan(preferences)
+        self.assertLessEqual(len(queries), 1, [query['sql'] for query in queries])
+        self.assertFullPlan(meal_plan)
+
+    def test_sampler_engine(self):
+        # Load the candidate pools first; that happens once per process
+        daily_plan(MealPreferences.from_profile(self.profile))
+        self.assertEngineUsesOneQuery()
+
+    @override_settings(MEAL_PLAN_ENGINE='sql')
+    def test_sql_engine(self):
+        self.assertEngineUsesOneQuery()
+
+    @override_settings(MEAL_PLAN_ENGINE='columnar')
+    def test_columnar_engine(self):
+        meal_plan_index.columns()
+        self.assertEngineUsesOneQuery()
+
+    def test_stored_plan_is_served_without_regenerating(self):
+        generated = self.get_plan()
+        self.assertFullPlan(generated)
+        self.assertEqual(UserMealPlan.objects.filter(user=self.user).count(), 1)
+
+        served = self.get_plan(max_queries=2)
+        self.assertEqual(
+            {meal_type: sorted(meal['meal_id'] for meal in meals) for meal_type, meals in served.items()},
+            {meal_type: sorted(meal['meal_id'] for meal in meals) for meal_type, meals in generated.items()},
+        )
+
+    def test_first_request_statements(self):
+        # Reads: stored plan, profile, engine. Persisting is one insert per table, so
+        # the first request of the day can't get near the 2 a stored plan costs.
+        for engine in ENGINES:
+            with self.subTest(engine=engine), override_settings(MEAL_PLAN_ENGINE=engine):
+                UserMealPlan.objects.filter(user=self.user).delete()
+                daily_plan(MealPreferences.from_profile(self.profile))  # warm pools / snapshot
+                # As authentication loads it: no profile cached on the instance
+                self.client.force_authenticate(CustomUser.objects.get(pk=self.user.pk))
+                with self.assertNumQueries(10), CaptureQueriesContext(connection) as queries:
+                    response = self.client.get('/meals/api/user-meal-plan/')
+                self.assertFullPlan(response.data)
+                self.assertEqual(
+                    [query['sql'].split()[0] for query in queries],
+                    ['SELECT', 'SELECT', 'SELECT', 'SAVEPOINT'] + ['INSERT'] * 5 + ['RELEASE'],
+                )
+                self.assertIn('"users_profile"', queries[1]['sql'])
+                self.assertEqual(len(self.get_plan(max_queries=2)['lunch']), 3)
+
+    def test_cooking_time_preference_applies(self):
+        # Goal matches outside the 10-20 minute preference rank below the exact tier
+        for meal_type in MEAL_TYPES:
+            for index in range(2):
+                MealPlan.objects.create(
+                    name=f'slow {meal_type} {index}', meal_type=meal_type, diet_selection='keto', diet_preference='veg',
+                    cooking_time='More than 45 minutes', goal_selection="['strength']", instructions='',
+                )
+        preferences = MealPreferences.from_profile(self.profile)
+        self.assertEqual(preferences.minutes, (10, 20))
+        for engine in ['sampler', 'sql', 'columnar']:
+            with self.subTest(engine=engine), override_settings(MEAL_PLAN_ENGINE=engine):
+                meal_plan_sampler.invalidate()
+                meal_plan_index.invalidate()
+                for meal_type, meals in daily_plan(preferences).items():
+                    exact = [meal for meal in meals if (meal['min_minutes'], meal['max_minutes']) == (10, 20)
+                             and meal['goal_mask'] == GOAL_BITS['strength']]
+                    self.assertEqual(len(exact), 2, meals)
+
+    def test_profile_changes_invalidate_stored_plan(self):
+        self.get_plan()
+        self.client.post('/update-profile/', {'bmi': '22.5'}, format='json')
+        self.assertTrue(UserMealPlan.objects.filter(user=self.user).exists())
+
+        self.client.post('/update-profile/', {'diet_preference': 'vegan'}, format='json')
+        self.assertFalse(UserMealPlan.objects.filter(user=self.user).exists())
+
+
+class MealPlanIndexTests(TestCase):
+    """The columnar index answers the same filters as the ORM and follows catalogue changes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        MealPlan.objects.bulk_create(
+            MealPlan(
+                name=f'{meal_type} {index}', meal_type=meal_type,
+                diet_selection=['keto', 'paleo'][index % 2], diet_preference=[None, 'veg', 'vegan'][index % 3],
+                cooking_time=['<10', '10 - 20 minutes'][index % 2], goal_selection=goal, goal_mask=GOAL_BITS[goal],
+                calories=100 + 40 * index, protein=5.5 * index, instructions='',
+            )
+            for meal_type in MEAL_TYPES
+            for index, goal in enumerate(['strength', 'maintain', 'sports', 'weight-loss'] * 3)
+        )
+        MealPlan.objects.filter(cooking_time='<10').update(min_minutes=0, max_minutes=10)
+        MealPlan.objects.filter(cooking_time='10 - 20 minutes').update(min_minutes=10, max_minutes=20)
+
+    def setUp(self):
+        meal_plan_index.invalidate()
+
+    def assertSameRows(self, queryset, **lookups):
+        with self.assertNumQueries(0):
+            meal_ids = meal_plan_index.values(meal_plan_index.mask(**lookups), 'meal_id')
+        self.assertEqual(
+            [row['meal_id'] for row in meal_ids],
+            list(queryset.order_by('meal_id').values_list('meal_id', flat=True)),
+        )
+
+    def test_filters_match_orm(self):
+        meal_plan_index.columns()
+        self.assertSameRows(
+            MealPlan.objects.filter(meal_type='lunch', diet_selection='keto', diet_preference=None),
+            meal_type='lunch', diet_selection='keto', diet_preference=None,
+        )
+        self.assertSameRows(
+            MealPlan.objects.filter(Q(diet_selection='paleo') | Q(diet_preference='vegan'), meal_type='dinner'),
+            diet=('paleo', 'vegan'), meal_type='dinner',
+        )
+        self.assertSameRows(
+            MealPlan.objects.filter(cooking_time__in=['<10'], calories__range=(200, 400), protein__gt=10),
+            cooking_time__in=['<10'], calories__range=(200, 400), protein__gt=10,
+        )
+        self.assertSameRows(
+            MealPlan.objects.filter(cooking_time_q((0, 20)), meal_type='snacks'),
+            minutes=(0, 20), meal_type='snacks',
+        )
+        self.assertSameRows(MealPlan.objects.filter(cooking_time_q((10, None))), minutes=(10, None))
+        goals = GOAL_BITS['strength'] | GOAL_BITS['sports']
+        self.assertSameRows(
+            MealPlan.objects.alias(goal_hits=F('goal_mask').bitand(goals)).filter(goal_hits__gt=0),
+            goals=goals,
+        )
+        self.assertSameRows(MealPlan.objects.none(), meal_type='brunch')
+
+    def test_sample_prefers_goal_and_cooking_time_matches(self):
+        goals = GOAL_BITS['strength']
+        meal_ids = meal_plan_index.sample('lunch', 'keto', 'veg', (0, 10), goals, k=4)
+        scores = {
+            meal.meal_id: 2 * bool(meal.goal_mask & goals) + (meal.max_minutes == 10)
+            for meal in MealPlan.objects.filter(meal_id__in=meal_ids)
+        }
+        self.assertEqual(len(meal_ids), 4)
+        self.assertEqual([scores[meal_id] for meal_id in meal_ids], [3, 3, 3, 1])
+
+    def test_reloads_on_signal_and_version_change(self):
+        self.assertFalse(meal_plan_index.mask(calories__gte=5000).any())
+
+        MealPlan.objects.create(meal_type='lunch', cooking_time='<10', calories=5000, instructions='')
+        self.assertEqual(meal_plan_index.mask(calories__gte=5000).sum(), 1)
+
+        # bulk_create sends no signals; the loaders bump the version instead
+        MealPlan.objects.bulk_create([MealPlan(meal_type='lunch', cooking_time='<10', calories=6000, instructions='')])
+        self.assertEqual(meal_plan_index.mask(calories__gte=5000).sum(), 1)
+        bump_catalogue_version(MEAL_PLANS)
+        self.assertEqual(meal_plan_index.mask(calories__gte=5000).sum(), 2)
+
+    def test_chatbot_get_meals_reads_the_index(self):
+        args = {'diet_selection': 'keto', 'diet_preference': 'veg', 'meal_type': 'breakfast,snacks'}
+        expected = get_meals.invoke(args)
+        with override_settings(MEAL_PLAN_ENGINE='columnar'):
+            meal_plan_index.columns()
+            with self.assertNumQueries(0):
+                self.assertEqual(get_meals.invoke(args), expected)
+
+
+class MealPlanViewSetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('catalogue', 'catalogue@example.com', 'secret')
+        MealPlan.objects.bulk_create(
+            MealPlan(
+                name=f'{meal_type} {index}', meal_type=meal_type, diet_selection=['keto', 'paleo'][index % 2],
+                cooking_time='<10', min_minutes=0, max_minutes=10, calories=100 * index, protein=index, instructions='',
+            )
+            for meal_type in MEAL_TYPES
+            for index in range(60)
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_is_cursor_paginated(self):
+        response = self.client.get('/meals/meals/')
+        self.assertEqual(len(response.data['results']), 50)
+        self.assertIsNone(response.data['previous'])
+
+        meal_ids = [meal['meal_id'] for meal in response.data['results']]
+        next_page = response.data['next']
+        while next_page:
+            response = self.client.get(next_page)
+            meal_ids += [meal['meal_id'] for meal in response.data['results']]
+            next_page = response.data['next']
+        self.assertEqual(meal_ids, list(MealPlan.objects.order_by('meal_id').values_list('meal_id', flat=True)))
+
+        response = self.client.get('/meals/meals/', {'page_size': 1000})
+        self.assertEqual(len(response.data['results']), 200)
+
+    def test_list_filters(self):
+        response = self.client.get('/meals/meals/', {
+            'meal_type': 'lunch', 'diet_selection': 'keto', 'calories_min': 1000, 'calories_max': 2000,
+        })
+        self.assertEqual(
+            [(meal['name'], meal['calories']) for meal in response.data['results']],
+            [(f'lunch {index}', 100 * index) for index in range(10, 21, 2)],
+        )
+
+        response = self.client.get('/meals/meals/', {'protein_min': 'lots'})
+        self.assertEqual(response.status_code, 400)
+
+        slow = MealPlan.objects.create(name='slow', meal_type='lunch', cooking_time='More than 45 minutes', instructions='')
+        response = self.client.get('/meals/meals/', {'cooking_time': '45+'})
+        self.assertEqual([meal['meal_id'] for meal in response.data['results']], [slow.meal_id])
+        response = self.client.get('/meals/meals/', {'cooking_time': 'Less than 10 minutes', 'page_size': 200})
+        self.assertEqual(len(response.data['results']), 200)
+        self.assertEqual(self.client.get('/meals/meals/', {'cooking_time': 'soon'}).status_code, 400)
+
+    def test_fast_path_matches_model_serializer(self):
+        Meal.objects.create(name='Bowl', location='Union', price=9, url='https://example.com/bowl')
+        for queryset, serializer_class in [
+            (MealPlan.objects.order_by('pk'), MealPlanSerializer),
+            (Meal.objects.order_by('pk'), MealSerializer),
+        ]:
+            expected = JSONRenderer().render(serializer_class(queryset, many=True).data)
+            fast = ORJSONRenderer().render(serializer_rows(queryset, serializer_class))
+            self.assertEqual(json.loads(fast), json.loads(expected))
+
+        page = self.client.get('/meals/meals/', {'page_size': 3})
+        self.assertEqual(page.json()['results'], MealPlanSerializer(MealPlan.objects.order_by('pk')[:3], many=True).data)
+
+    def test_only_staff_can_write(self):
+        meal = MealPlan.objects.order_by('pk').first()
+        payload = {'name': 'Toast', 'meal_type': 'breakfast', 'cooking_time': '<10', 'instructions': ''}
+        self.assertEqual(self.client.post('/meals/meals/', payload, format='json').status_code, 403)
+        self.assertEqual(self.client.patch(f'/meals/meals/{meal.pk}/', {'name': 'x'}, format='json').status_code, 403)
+        self.assertEqual(self.client.delete(f'/meals/meals/{meal.pk}/').status_code, 403)
+        self.assertEqual(self.client.get(f'/meals/meals/{meal.pk}/').status_code, 200)
+
+        self.client.force_authenticate(CustomUser.objects.create_user('chef', 'chef@example.com', 'secret', is_staff=True))
+        self.assertEqual(self.client.patch(f'/meals/meals/{meal.pk}/', {'name': 'Renamed'}, format='json').status_code, 200)
+        self.assertEqual(self.client.delete(f'/meals/meals/{meal.pk}/').status_code, 204)
+
+
+class UserMealPlanHistoryTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('history', 'history@example.com', 'secret')
+        other = CustomUser.objects.create_user('other', 'other@example.com', 'secret')
+        meals = {
+            meal_type: MealPlan.objects.create(name=meal_type, meal_type=meal_type, cooking_time='<10', instructions='')
+            for meal_type in MEAL_TYPES
+        }
+        cls.start = datetime.date(2026, 3, 1)
+        for user in (cls.user, other):
+            for day in range(31):
+                user_meal_plan = UserMealPlan.objects.create(user=user, date=cls.start + datetime.timedelta(days=day))
+                for slot in PLAN_SLOTS:
+                    getattr(user_meal_plan, slot).set([meals[slot]])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_history(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/meals/user-meal-plans/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data, len(queries)
+
+    def test_month_in_a_fixed_number_of_queries(self):
+        day, day_queries = self.get_history(**{'from': '2026-03-05', 'to': '2026-03-05'})
+        month, month_queries = self.get_history(**{'from': '2026-03-01', 'to': '2026-03-31'})
+        self.assertEqual(len(day['plans']), 1)
+        self.assertEqual(len(month['plans']), 31)
+        self.assertEqual(day_queries, month_queries)
+        self.assertEqual(month_queries, 1 + len(PLAN_SLOTS))
+
+        first = month['plans'][0]
+        self.assertEqual(first['date'], '2026-03-01')
+        for slot in PLAN_SLOTS:
+            self.assertEqual([meal['name'] for meal in first[slot]], [slot])
+
+    def test_invalid_ranges(self):
+        for params in [{'from': 'March'}, {'from': '2026-03-31', 'to': '2026-03-01'}, {'from': '2020-01-01', 'to': '2026-01-01'}]:
+            self.assertEqual(self.client.get('/meals/user-meal-plans/', params).status_code, 400)
+
+
+class ImportMealPlansTests(TestCase):
+    """Streaming CSV/JSONL import and the batched add_mealplans seed."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', newline='', encoding='utf-8') as handle:
+            handle.write(content)
+        return path
+
+    def run_command(self, *args, **options):
+        out = io.StringIO()
+        call_command(*args, stdout=out, **options)
+        return out.getvalue()
+
+    def test_jsonl_with_skipped_rows(self):
+        path = self.write('plans.jsonl', '\n'.join([
+            json.dumps({'name': 'Oats', 'meal_type': 'breakfast', 'cooking_time': '<10',
+                        'goal_selection': "['strength']", 'calories': '350', 'diet_selected': 'true'}),
+            '',
+            '{not json',
+            json.dumps({'name': 'Soup', 'meal_type': 'brunch', 'cooking_time': '<10'}),
+            json.dumps({'name': 'Stew', 'meal_type': 'dinner', 'cooking_time': 'a while'}),
+            json.dumps({'name': 'Curry', 'meal_type': 'dinner', 'cooking_time': 'More than 45 minutes', 'calories': 'lots'}),
+            json.dumps({'name': 'Salad', 'meal_type': 'lunch', 'cooking_time': '10 - 20 minutes'}),
+        ]))
+        version = catalogue_version(MEAL_PLANS)
+        output = self.run_command('import_mealplans', path, batch_size=2)
+
+        self.assertIn('Successfully imported 2 meal plans (4 skipped)', output)
+        for line in (3, 4, 5, 6):
+            self.assertIn(f'Skipping line {line}:', output)
+        self.assertIn('meal_type must be one of', output)
+        self.assertIn("cooking_time 'a while' is not a range of minutes", output)
+        # Batches of 2 over 6 records
+        self.assertEqual(output.count('Imported '), 3)
+
+        oats = MealPlan.objects.get(name='Oats')
+        self.assertEqual((oats.min_minutes, oats.max_minutes, oats.calories), (0, 10, 350))
+        self.assertEqual(oats.goal_mask, GOAL_BITS['strength'])
+        self.assertTrue(oats.diet_selected)
+        salad = MealPlan.objects.get(name='Salad')
+        self.assertEqual((salad.min_minutes, salad.max_minutes), (10, 20))
+        self.assertNotEqual(catalogue_version(MEAL_PLANS), version)
+
+    def test_csv(self):
+        path = self.write('plans.csv', (
+            'name,meal_type,diet_selection,cooking_time,protein,diet_selected\n'
+            'Eggs,breakfast,keto,Less than 10 minutes,18.5,FALSE\n'
+            'Wrap,lunch,keto,,10,no\n'
+            'Chili,dinner,keto,45+ minutes,30,yes\n'
+        ))
+        output = self.run_command('import_mealplans', path)
+        self.assertIn('Successfully imported 2 meal plans (1 skipped)', output)
+        self.assertIn('Skipping line 3: cooking_time is required', output)
+        chili = MealPlan.objects.get(name='Chili')
+        self.assertEqual((chili.min_minutes, chili.max_minutes, chili.protein, chili.diet_selected), (45, None, 30.0, True))
+
+    def test_format_detection(self):
+        path = self.write('plans.txt', '')
+        with self.assertRaises(CommandError):
+            self.run_command('import_mealplans', path)
+        path = self.write('plans.json', json.dumps({'name': 'Toast', 'meal_type': 'breakfast', 'cooking_time': '<10'}))
+        self.assertIn('Successfully imported 1 meal plans', self.run_command('import_mealplans', path))
+
+    def test_add_mealplans_seeds_in_batches(self):
+        version = catalogue_version(MEAL_PLANS)
+        output = self.run_command('add_mealplans', seed=0, batch_size=3000)
+        self.assertIn('Successfully created 8640 meal plans', output)
+        self.assertEqual(output.count('meal plans...'), 3)
+        self.assertEqual(MealPlan.objects.count(), 8640)
+        self.assertNotEqual(catalogue_version(MEAL_PLANS), version)
+        # Every combination once, with the derived columns bulk_create can't fill in
+        self.assertEqual(MealPlan.objects.values('meal_type', 'diet_selection', 'diet_preference',
+                                                 'cooking_time', 'goal_selection').distinct().count(), 8640)
+        self.assertFalse(MealPlan.objects.filter(min_minutes__isnull=True).exists())
+        self.assertFalse(MealPlan.objects.filter(goal_mask=0).exists())
+
+        # Same seed, same catalogue
+        first = list(MealPlan.objects.order_by('meal_id').values_list('name', 'calories')[:50])
+        MealPlan.objects.all().delete()
+        self.run_command('add_mealplans', seed=0)
+        self.assertEqual(list(MealPlan.objects.order_by('meal_id').values_list('name', 'calories')[:50]), first)
+
+
+class GenerateMealPlansTests(TestCase):
+    """Ahead-of-time planning with generate_meal_plans, in-process (--workers 1)."""
+
+    DATE = datetime.date(2026, 3, 2)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [CustomUser.objects.create_user(f'batch{index}', f'batch{index}@example.com', 'secret') for index in range(5)]
+        for user in cls.users:
+            Profile.objects.create(user=user, diet_selection='keto', diet_preference='veg', cooking_time_preference='<10')
+        cls.inactive = CustomUser.objects.create_user('gone', 'gone@example.com', 'secret', is_active=False)
+        Profile.objects.create(user=cls.inactive, diet_selection='keto')
+        MealPlan.objects.bulk_create(
+            MealPlan(name=f'{meal_type} {index}', meal_type=meal_type, diet_selection='keto', diet_preference='veg',
+                     cooking_time='<10', min_minutes=0, max_minutes=10, instructions='')
+            for meal_type in MEAL_TYPES
+            for index in range(4)
+        )
+
+    def setUp(self):
+        bump_catalogue_version(MEAL_PLANS)
+
+    def generate(self, **options):
+        out = io.StringIO()
+        call_command('generate_meal_plans', date=self.DATE, workers=1, chunk_size=2, stdout=out, **options)
+        return out.getvalue()
+
+    def test_single_worker_run(self):
+        output = self.generate()
+        self.assertIn(f'Planning {self.DATE} for 5 users', output)
+        self.assertIn('Stored 5 meal plans', output)
+        self.assertEqual(
+            sorted(UserMealPlan.objects.filter(date=self.DATE).values_list('user_id', flat=True)),
+            sorted(user.pk for user in self.users),
+        )
+        self.assertFalse(UserMealPlan.objects.filter(user=self.inactive).exists())
+
+    def test_rows_match_stored_plans(self):
+        self.generate()
+        for user in self.users:
+            plan = stored_plans(user, self.DATE, self.DATE)[self.DATE]
+            for meal_type, meals in plan.items():
+                self.assertEqual(len(meals), 3)
+                self.assertEqual(len({meal['meal_id'] for meal in meals}), 3)
+                self.assertTrue(all(meal['meal_type'] == meal_type for meal in meals))
+
+    def test_rerun_skips_users_with_plans(self):
+        # One user opened the app first and got a plan stored the usual way
+        early = {meal_type: list(MealPlan.objects.filter(meal_type=meal_type).values()[:3]) for meal_type in MEAL_TYPES}
+        persist_plans(self.users[0], {self.DATE: early})
+
+        self.assertIn('for 4 users', self.generate())
+        before = stored_plans(self.users[1], self.DATE, self.DATE)
+        output = self.generate()
+        self.assertIn('for 0 users', output)
+        self.assertIn('Stored 0 meal plans', output)
+        self.assertEqual(UserMealPlan.objects.filter(date=self.DATE).count(), 5)
+        self.assertEqual(stored_plans(self.users[1], self.DATE, self.DATE), before)
+        self.assertEqual(
+            {meal_type: [meal['meal_id'] for meal in meals]
+             for meal_type, meals in stored_plans(self.users[0], self.DATE, self.DATE)[self.DATE].items()},
+            {meal_type: [meal['meal_id'] for meal in meals] for meal_type, meals in early.items()},
+        )
+
+
+    def test_plan_stored_between_check_and_insert(self):
+        early = {meal_type: list(MealPlan.objects.filter(meal_type=meal_type).values()[:3]) for meal_type in MEAL_TYPES}
+        read_chunks, check = GenerateMealPlans._chunks, GenerateMealPlans._planned_users
+        racer = self.users[0].pk
+        checks = []
+
+        def chunks(command, profiles, chunk_size):
+            for chunk in read_chunks(command, profiles, chunk_size):
+                if racer in dict(chunk):
+                    # The user opens the app after their chunk was read
+                    persist_plans(self.users[0], {self.DATE: early})
+                yield chunk
+
+        def late_check(command, chunk, date):
+            planned = check(command, chunk, date)
+            checks.append(racer in planned)
+            # The first check ran just before that request committed
+            return planned - {racer} if len(checks) == 1 else planned
+
+        with mock.patch.object(GenerateMealPlans, '_chunks', chunks), \
+                mock.patch.object(GenerateMealPlans, '_planned_users', late_check):
+            output = self.generate()
+        self.assertEqual(checks[:2], [True, True])  # IntegrityError, then the retry
+        self.assertIn('Skipped 1 users', output)
+        self.assertIn('Stored 4 meal plans', output)
+        self.assertEqual(UserMealPlan.objects.filter(date=self.DATE).count(), 5)
+        self.assertEqual(
+            {meal_type: [meal['meal_id'] for meal in meals]
+             for meal_type, meals in stored_plans(self.users[0], self.DATE, self.DATE)[self.DATE].items()},
+            {meal_type: [meal['meal_id'] for meal in meals] for meal_type, meals in early.items()},
+        )
+
+
+class PurgeMealPlansTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('purge', 'purge@example.com', 'secret')
+        cls.meal = MealPlan.objects.create(meal_type='lunch', cooking_time='<10', instructions='')
+        today = datetime.date.today()
+        for days_ago in [400, 300, 200, 100, 10, 0]:
+            user_meal_plan = UserMealPlan.objects.create(user=cls.user, date=today - datetime.timedelta(days=days_ago))
+            user_meal_plan.lunch.set([cls.meal])
+
+    def setUp(self):
+        checkpoint_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(checkpoint_dir.cleanup)
+        self.checkpoint = os.path.join(checkpoint_dir.name, 'purge.json')
+
+    def purge(self, **options):
+        out = io.StringIO()
+        call_command('purge_meal_plans', days=90, batch_size=2, pause=0, checkpoint=self.checkpoint, stdout=out, **options)
+        return out.getvalue()
+
+    def test_deletes_old_plans_and_orphans_in_batches(self):
+        lunch = UserMealPlan.lunch.through
+        with connection.cursor() as cursor:
+            # Left behind by a delete that bypassed the ORM
+            cursor.execute(
+                f'INSERT INTO {lunch._meta.db_table} (usermealplan_id, mealplan_id) VALUES (%s, %s)',
+                [999999, self.meal.pk],
+            )
+
+        with CaptureQueriesContext(connection) as queries:
+            report = self.purge(dry_run=True)
+        self.assertTrue(all(query['sql'].startswith('SELECT') for query in queries))
+        self.assertIn('plans: 4', report)
+        self.assertIn('orphaned lunch rows: 1', report)
+        self.assertRegex(report, r'Estimated duration: \d+\.\ds over 3 batches of 2 \(\d+\.\dms of reads per batch')
+        self.assertEqual(UserMealPlan.objects.count(), 6)
+
+        self.purge()
+        cutoff = datetime.date.today() - datetime.timedelta(days=90)
+        self.assertFalse(UserMealPlan.objects.filter(date__lt=cutoff).exists())
+        self.assertEqual(UserMealPlan.objects.count(), 2)
+        self.assertEqual(lunch.objects.count(), 2)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_resumes_from_checkpoint(self):
+        old = list(UserMealPlan.objects.order_by('pk').values_list('pk', flat=True)[:4])
+        cutoff = datetime.date.today() - datetime.timedelta(days=90)
+        with open(self.checkpoint, 'w') as handle:
+            json.dump({'cutoff': cutoff.isoformat(), 'step': 'plans', 'last_id': old[1], 'done': []}, handle)
+
+        output = self.purge()
+        self.assertIn(f'Resuming at plans after id {old[1]}', output)
+        # Rows up to the checkpoint were handled by the interrupted run
+        self.assertEqual(sorted(UserMealPlan.objects.filter(date__lt=cutoff).values_list('pk', flat=True)), old[:2])
+
+
+class CatalogueVersionTests(TestCase):
+
+    def setUp(self):
+        bump_catalogue_version(MEALS)
+
+    def other_worker_bumps(self):
+        # What a bump from another process looks like from here: only the shared cache moves
+        cache.set(f'catalogue-version:{MEALS}', 'from-another-worker', timeout=None)
+
+    def test_token_is_reused_within_the_ttl(self):
+        version = catalogue_version(MEALS)
+        self.other_worker_bumps()
+        self.assertEqual(catalogue_version(MEALS), version)
+        self.assertEqual(catalogue_version(MEALS, fresh=True), 'from-another-worker')
+
+    @override_settings(CATALOGUE_VERSION_TTL=0)
+    def test_token_is_reread_after_the_ttl(self):
+        catalogue_version(MEALS)
+        self.other_worker_bumps()
+        self.assertEqual(catalogue_version(MEALS), 'from-another-worker')
+
+    def test_own_bump_is_seen_at_once(self):
+        version = catalogue_version(MEALS)
+        bump_catalogue_version(MEALS)
+        self.assertNotEqual(catalogue_version(MEALS), version)
+
+    def test_deploy_check_wants_a_shared_cache(self):
+        self.assertEqual([error.id for error in check_shared_cache(None)], ['cufit.W001'])
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://'}}
+        with override_settings(CACHES=redis):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+class CampusMealsETagTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('campus', 'campus@example.com', 'secret')
+        Meal.objects.create(name='Bowl', location='Union', price=9)
+
+    def setUp(self):
+        bump_catalogue_version(MEALS)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_conditional_get(self):
+        etag = self.client.get('/meals/meal/')['ETag']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/meals/meal/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Meal.objects.create(name='Wrap', location='Library', price=7)
+        response = self.client.get('/meals/meal/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['meals']), 2)
+
+
+class NearestMealTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('hungry', 'hungry@example.com', 'secret')
+        call_command('meal', stdout=io.StringIO())
+
+    def setUp(self):
+        bump_catalogue_version(MEALS)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_seed_sets_coordinates(self):
+        self.assertEqual(Meal.objects.count(), 90)
+        self.assertFalse(Meal.objects.filter(latitude__isnull=True).exists())
+        # Re-running the seed updates rows in place
+        call_command('meal', stdout=io.StringIO())
+        self.assertEqual(Meal.objects.count(), 90)
+
+    def test_grid_matches_full_scan(self):
+        rng = np.random.default_rng(0)
+        rows = [
+            {'id': index, 'latitude': 45.5 + rng.normal(0, 0.05), 'longitude': -73.6 + rng.normal(0, 0.05), 'price': index % 40}
+            for index in range(2000)
+        ]
+        grid = RestaurantGrid(rows)
+        for latitude, longitude, radius, max_price in [(45.5, -73.6, 1500, None), (45.52, -73.55, 5000, 20), (45.0, -73.0, 100000, None)]:
+            distances = haversine(latitude, longitude, grid.latitudes, grid.longitudes)
+            expected = [
+                rows[index]['id'] for index in np.argsort(distances, kind='stable')
+                if distances[index] <= radius and (max_price is None or rows[index]['price'] <= max_price)
+            ]
+            found = grid.nearby(latitude, longitude, radius, max_price)
+            self.assertEqual([row['id'] for row, _ in found], expected)
+            self.assertEqual([row['id'] for row, _ in grid.nearby(latitude, longitude, radius, max_price, limit=5)], expected[:5])
+
+    def test_near_query_sorts_by_distance(self):
+        response = self.client.get('/meals/meal/', {'near': '45.4972,-73.5782', 'radius': 300, 'max_price': 20})
+        self.assertEqual(response.status_code, 200)
+        meals = response.json()['meals']
+        self.assertTrue(meals)
+        self.assertEqual([meal['distance'] for meal in meals], sorted(meal['distance'] for meal in meals))
+        self.assertTrue(all(meal['distance'] <= 300 and meal['price'] <= 20 for meal in meals))
+        self.assertEqual(meals[0]['location'].split(' ', 1)[1], 'Rue Bishop')
+
+        limited = self.client.get('/meals/meal/', {'near': '45.4972,-73.5782', 'limit': 3}).json()['meals']
+        self.assertEqual(len(limited), 3)
+
+        for params in [{'near': '45.5'}, {'near': '95,-73'}, {'near': '45.5,-73.6', 'radius': -1}, {'max_price': 'cheap'}]:
+            self.assertEqual(self.client.get('/meals/meal/', params).status_code, 400)
+
+
+class MacroOptimizerTests(TestCase):
+
+    def test_best_combination_matches_brute_force(self):
+        rng = np.random.default_rng(7)
+        targets = np.array([2200, 150, 220, 66.0])
+        candidates = {
+            meal_type: (np.arange(offset, offset + 6), rng.uniform([200, 10, 20, 5], [800, 40, 80, 30], (6, 4)))
+            for offset, meal_type in zip(range(0, 400, 100), MEAL_TYPES)
+        }
+        picks, totals = best_combination(candidates, targets)
+
+        def error(combo):
+            day = sum(candidates[meal_type][1][index] for meal_type, index in zip(MEAL_TYPES, combo))
+            return (((day - targets) / targets) ** 2 * MACRO_WEIGHTS).sum()
+
+        best = min(itertools.product(range(6), repeat=4), key=error)
+        self.assertEqual([picks[meal_type] for meal_type in MEAL_TYPES], [100 * axis + index for axis, index in enumerate(best)])
+        self.assertAlmostEqual(error(best), (((totals - targets) / targets) ** 2 * MACRO_WEIGHTS).sum())
+
+    @override_settings(MEAL_PLAN_ENGINE='sampler')
+    def test_candidates_come_from_the_snapshot_on_every_engine(self):
+        MealPlan.objects.bulk_create(
+            MealPlan(name=f'{meal_type} {index}', meal_type=meal_type, diet_selection='keto', diet_preference='veg',
+                     cooking_time='<10', calories=300 + index, protein=20, carbs=30, fat=10, instructions='')
+            for meal_type in MEAL_TYPES
+            for index in range(3)
+        )
+        MealPlan.objects.create(name='paleo lunch', meal_type='lunch', diet_selection='paleo', diet_preference='vegan',
+                                cooking_time='<10', instructions='')
+        bump_catalogue_version(MEAL_PLANS)
+        preferences = MealPreferences('keto', 'veg', None, 0)
+        load_candidates(preferences)
+        with self.assertNumQueries(0):
+            candidates = load_candidates(preferences)
+        for meal_type in MEAL_TYPES:
+            meal_ids, macros = candidates[meal_type]
+            self.assertEqual(len(meal_ids), 3)
+            self.assertEqual(macros.shape, (3, 4))
+
+
+class WeeklyMealPlanTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('weekly', 'weekly@example.com', 'secret')
+        Profile.objects.create(user=cls.user, diet_selection='keto', diet_preference='veg')
+        MealPlan.objects.bulk_create(
+            MealPlan(name=f'{meal_type} {index}', meal_type=meal_type, diet_selection='keto',
+                     cooking_time='10 - 20 minutes', instructions='')
+            for meal_type in MEAL_TYPES
+            for index in range(30)
+        )
+
+    def setUp(self):
+        meal_plan_sampler.invalidate()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_week_has_no_repeated_meals_and_is_stored(self):
+        today = self.client.get('/meals/api/user-meal-plan/').data
+        response = self.client.get('/meals/api/user-meal-plan/week/')
+        self.assertEqual(response.status_code, 200)
+
+        days = response.data['days']
+        self.assertEqual(len(days), 7)
+        self.assertEqual(
+            sorted(meal['meal_id'] for meal in days[0]['breakfast']),
+            sorted(meal['meal_id'] for meal in today['breakfast']),
+        )
+        meal_ids = [meal['meal_id'] for day in days for meal_type in MEAL_TYPES for meal in day[meal_type]]
+        self.assertEqual(len(meal_ids), 7 * 4 * 3)
+        self.assertEqual(len(set(meal_ids)), len(meal_ids))
+        self.assertEqual(UserMealPlan.objects.filter(user=self.user).count(), 7)
+
+        with CaptureQueriesContext(connection) as queries:
+            again = self.client.get('/meals/api/user-meal-plan/week/').data
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(
+            [sorted(meal['meal_id'] for meal in day['dinner']) for day in again['days']],
+            [sorted(meal['meal_id'] for meal in day['dinner']) for day in days],
+        )
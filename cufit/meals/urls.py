@@ -1,14 +1,16 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import MealPlanViewSet, get_user_meal_plan, get_meals
+from .views import MealPlanViewSet, UserMealPlanViewSet, get_user_meal_plan, get_user_meal_plan_week, get_meals
 
 # Initialize the router
 router = DefaultRouter()
 router.register(r'meals', MealPlanViewSet)
+router.register(r'user-meal-plans', UserMealPlanViewSet, basename='user-meal-plans')  # Stored plan history
 
 # Define URL patterns
 urlpatterns = [
     path('', include(router.urls)),  # Includes all router-based views
     path('api/user-meal-plan/', get_user_meal_plan, name='user_meal_plan'),  # Fetch user's meal plan
+    path('api/user-meal-plan/week/', get_user_meal_plan_week, name='user_meal_plan_week'),  # Seven days of meal plans
     path('meal/', get_meals, name='get_meals'),  # Get all meals
 ]
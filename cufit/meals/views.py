@@ -1,46 +1,58 @@
 import datetime
 from django.http import JsonResponse
-from django.shortcuts import get_object_or_404
 from django.views.decorators.csrf import csrf_exempt
-from .models import MealPlan, UserMealPlan, Meal
+from cufit.catalogue import MEALS, conditional_catalogue
+from cufit.fast_json import ORJSONRenderer, serializer_fields, serializer_rows
+from .models import MealPlan, UserMealPlan, Meal, cooking_time_q, parse_cooking_time
 from users.models import Profile
 from rest_framework.response import Response
 from rest_framework import viewsets, status
-from rest_framework.permissions import IsAuthenticated
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import SAFE_METHODS, IsAdminUser, IsAuthenticated
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
+from rest_framework.renderers import BrowsableAPIRenderer
 from .serializers import MealPlanSerializer, UserMealPlanSerializer, MealSerializer
-from django.db.models import Q
-import random
+from .geo import campus_meal_index
+from .optimizer import macro_plan
+from .planner import PLAN_SLOTS, MealPreferences, todays_plan, week_plan
 
 
 class UserMealPlanViewSet(viewsets.ViewSet):
+    """Stored meal plan history: ``?from=YYYY-MM-DD&to=YYYY-MM-DD``, inclusive."""
     permission_classes = [IsAuthenticated]
 
+    DEFAULT_DAYS = 30
+    MAX_DAYS = 366
+
     def list(self, request):
         try:
-            # Get user profile
-            profile = get_object_or_404(Profile, user=request.user)
-
-            # Match meals based on user's preferences
-            matching_meals = MealPlan.objects.filter(
-                diet_type=profile.diet_selection,
-                goal_selection=profile.goal_selection,
-                diet_preference=profile.diet_preference
+            today = datetime.date.today()
+            end = request.query_params.get('to')
+            end = datetime.date.fromisoformat(end) if end else today
+            start = request.query_params.get('from')
+            start = datetime.date.fromisoformat(start) if start else end - datetime.timedelta(days=self.DEFAULT_DAYS)
+        except ValueError:
+            return Response(
+                {"error": "from and to must be dates in YYYY-MM-DD format."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if start > end or (end - start).days >= self.MAX_DAYS:
+            return Response(
+                {"error": f"from must be on or before to, at most {self.MAX_DAYS} days apart."},
+                status=status.HTTP_400_BAD_REQUEST
             )
 
-            # Get or create UserMealPlan
-            user_meal_plan, created = UserMealPlan.objects.get_or_create(user=request.user, date=datetime.date.today())
-
-            if created and matching_meals.exists():
-                user_meal_plan.breakfast.set(matching_meals[:1])
-                user_meal_plan.lunch.set(matching_meals[1:2])
-                user_meal_plan.dinner.set(matching_meals[2:3])
-                user_meal_plan.snacks.set(matching_meals[3:4])
-                user_meal_plan.save()
-
-            # Serialize and return matched meals
-            serializer = UserMealPlanSerializer(user_meal_plan)
-            return Response(serializer.data)
+        try:
+            # One query for the plans plus one per slot, however many days are requested
+            user_meal_plans = (
+                UserMealPlan.objects
+                .filter(user=request.user, date__range=(start, end))
+                .order_by('date')
+                .prefetch_related(*PLAN_SLOTS)
+            )
+            serializer = UserMealPlanSerializer(user_meal_plans, many=True)
+            return Response({"from": start, "to": end, "plans": serializer.data})
 
         except Exception as e:
             return Response({"error": str(e)}, status=500)
@@ -50,46 +62,19 @@ class UserMealPlanViewSet(viewsets.ViewSet):
 @permission_classes([IsAuthenticated])
 def get_user_meal_plan(request):
     try:
-        user = request.user
-        profile = Profile.objects.get(user=user)
-        
-        # Get user preferences
-        diet_selection = profile.diet_selection
-        diet_preference = profile.diet_preference
-        cooking_time = profile.cooking_time_preference
-        
-        # Map cooking time preferences to model choices
-        cooking_time_mapping = {
-            '10-20 minutes': '10-20',
-            '20-30 minutes': '20-30',
-            '30-45 minutes': '30-45',
-            '45+ minutes': '45+'
-        }
-        
-        # Base query for meals
-        base_query = Q(diet_selection=diet_selection) | Q(diet_preference=diet_preference)
-        if cooking_time in cooking_time_mapping:
-            base_query &= Q(cooking_time=cooking_time_mapping[cooking_time])
-        
-        # Get meals for each type
-        meal_types = ['breakfast', 'lunch', 'dinner', 'snacks']
-        meal_plan = {}
-        
-        for meal_type in meal_types:
-            # Try to get meals matching all preferences
-            meals = MealPlan.objects.filter(
-                base_query,
-                meal_type=meal_type
-            ).order_by('?')[:3]  # Get up to 3 random meals
-            
-            # If no exact matches, try to get meals based on diet preferences only
-            if not meals.exists():
-                meals = MealPlan.objects.filter(
-                    Q(diet_selection=diet_selection) | Q(diet_preference=diet_preference),
-                    meal_type=meal_type
-                ).order_by('?')[:3]
-            
-            meal_plan[meal_type] = list(meals.values())
+        mode = request.query_params.get('mode', 'daily')
+        if mode == 'macros':
+            # One meal per type, picked to hit the profile's macro targets
+            profile = Profile.objects.get(user=request.user)
+            meal_plan = macro_plan(profile, MealPreferences.from_profile(profile))
+        elif mode == 'daily':
+            # Served from UserMealPlan; the first request of the day generates and stores it
+            meal_plan = todays_plan(request.user)
+        else:
+            return Response(
+                {"error": "Unknown mode. Use 'daily' or 'macros'."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         return Response(meal_plan)
         
@@ -107,12 +92,133 @@ def get_user_meal_plan(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+def get_user_meal_plan_week(request):
+    try:
+        start = request.query_params.get('start')
+        start = datetime.date.fromisoformat(start) if start else datetime.date.today()
+    except ValueError:
+        return Response(
+            {"error": "start must be a date in YYYY-MM-DD format."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        # Seven days in one call, no meal repeated within the week
+        return Response({"start": start, "days": week_plan(request.user, start)})
+
+    except Profile.DoesNotExist:
+        return Response(
+            {"error": "User profile not found. Please complete your profile setup."},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    except Exception as e:
+        return Response(
+            {"error": str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+# Search radius for /meals/meal/?near=, in metres, and results per page
+DEFAULT_RADIUS = 2000
+MAX_RADIUS = 50000
+DEFAULT_NEAR_LIMIT = 50
+MAX_NEAR_LIMIT = 500
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@renderer_classes([ORJSONRenderer, BrowsableAPIRenderer])
+@conditional_catalogue(MEALS)
 def get_meals(request):
+    # ?near=lat,lon&radius=metres&max_price=&limit= sorts by distance; each filter is optional
+    try:
+        near = request.query_params.get('near')
+        if near:
+            latitude, longitude = (float(value) for value in near.split(','))
+            if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+                raise ValueError
+        radius = float(request.query_params.get('radius', DEFAULT_RADIUS))
+        if not 0 < radius <= MAX_RADIUS:
+            raise ValueError
+        max_price = request.query_params.get('max_price')
+        max_price = float(max_price) if max_price else None
+        limit = int(request.query_params.get('limit', DEFAULT_NEAR_LIMIT))
+        if not 0 < limit <= MAX_NEAR_LIMIT:
+            raise ValueError
+    except ValueError:
+        return Response(
+            {"error": (
+                f"near must be 'lat,lon', radius a distance in metres up to {MAX_RADIUS}, "
+                f"max_price a number and limit at most {MAX_NEAR_LIMIT}."
+            )},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    if near:
+        # Answered from the in-memory grid, nearest first
+        meals = [
+            {**meal, "distance": round(distance)}
+            for meal, distance in campus_meal_index.grid().nearby(latitude, longitude, radius, max_price, limit)
+        ]
+        return Response({"meals": meals})
+
     meals = Meal.objects.all()
-    serializer = MealSerializer(meals, many=True)
-    return Response({"meals": serializer.data})
+    if max_price is not None:
+        meals = meals.filter(price__lte=max_price)
+    return Response({"meals": serializer_rows(meals, MealSerializer)})
+
+
+class MealPlanCursorPagination(CursorPagination):
+    # meal_id is unique and never reused, so cursors stay stable while the catalogue changes
+    ordering = 'meal_id'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
 
 
 class MealPlanViewSet(viewsets.ModelViewSet):
     queryset = MealPlan.objects.all()
     serializer_class = MealPlanSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = MealPlanCursorPagination
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
+
+    def get_permissions(self):
+        # Any signed-in user can browse the catalogue; only staff can change it
+        if self.request.method in SAFE_METHODS:
+            return super().get_permissions()
+        return [IsAdminUser()]
+
+    # ?meal_type=lunch&diet_selection=keto&cooking_time=10-20&calories_max=600&protein_min=25 ...
+    EXACT_FILTERS = ('meal_type', 'diet_selection', 'diet_preference')
+    RANGE_FILTERS = ('calories', 'protein')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action != 'list':
+            return queryset
+
+        params = self.request.query_params
+        filters = {field: params[field] for field in self.EXACT_FILTERS if params.get(field)}
+        if params.get('cooking_time'):
+            # Any spelling ("10-20", "10 - 20 minutes", "45+") becomes one range on min/max_minutes
+            minutes = parse_cooking_time(params['cooking_time'])
+            if minutes is None:
+                raise ValidationError({'cooking_time': 'A range of minutes such as "10-20" or "45+" is required.'})
+            queryset = queryset.filter(cooking_time_q(minutes))
+        for field in self.RANGE_FILTERS:
+            for suffix, lookup in (('min', 'gte'), ('max', 'lte')):
+                param = f'{field}_{suffix}'
+                if params.get(param):
+                    try:
+                        filters[f'{field}__{lookup}'] = float(params[param])
+                    except ValueError:
+                        raise ValidationError({param: 'A valid number is required.'})
+        return queryset.filter(**filters)
+
+    def list(self, request, *args, **kwargs):
+        # Read-only fast path: rows straight from the database, no model instances.
+        # values() rather than values_list() because the cursor reads meal_id off each row.
+        queryset = self.filter_queryset(self.get_queryset()).values(*serializer_fields(self.serializer_class))
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(page)
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_customuser_customer_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='equipment_mask',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -80,6 +80,8 @@ class Profile(models.Model):
     pain_and_injury = models.TextField(blank=True, null=True)
     exercise_difficulty = models.CharField(max_length=20, choices=EXERCISE_DIFFICULTY_CHOICES, blank=True, null=True)
     stretching_preference = models.BooleanField(default=False)
+    # OR of the owned workout.EquipmentType bits; None until equipment is saved
+    equipment_mask = models.PositiveBigIntegerField(blank=True, null=True)
 
     def str(self):
         return f"{self.user.username} - Profile"
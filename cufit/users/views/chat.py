@@ -11,6 +11,7 @@ from langchain_core.tools import tool
 from langgraph.prebuilt import ToolNode
 from typing import Annotated, Literal, TypedDict
 
+from meals.columnar import columnar_enabled, meal_plan_index
 from meals.models import MealPlan
 from workout.models import ExerciseLibrary
 from users.models import Profile
@@ -64,7 +65,11 @@ def get_meals(
             }
 
             print(f"🔍 Fetching {mtype} with filters:", filters)
-            meals = list(MealPlan.objects.filter(**filters).values("name", "meal_type", "calories", "protein")[:5])
+            if columnar_enabled():
+                # Answered from the in-memory catalogue, no query
+                meals = meal_plan_index.values(meal_plan_index.mask(**filters), "name", "meal_type", "calories", "protein", limit=5)
+            else:
+                meals = list(MealPlan.objects.filter(**filters).values("name", "meal_type", "calories", "protein")[:5])
 
             if meals:
                 response += f"\n🍽️ *{mtype.capitalize()} suggestions:*\n"
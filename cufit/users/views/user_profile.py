@@ -1,6 +1,8 @@
 from django.contrib.auth import authenticate
 from django.contrib.auth import get_user_model
 from users.models import Profile, EXERCISE_DIFFICULTY_CHOICES, CustomUser
+from meals.planner import PLAN_PROFILE_FIELDS, invalidate_stored_plans
+from workout.scheduler import PROGRAM_PROFILE_FIELDS, invalidate_stored_programs
 
 from rest_framework.decorators import (
     api_view,
@@ -119,6 +121,8 @@ class UserCRUD(APIView):
 def update_profile(request):
     user = request.user
     profile, created = Profile.objects.get_or_create(user=user)
+    plan_inputs = [getattr(profile, field) for field in PLAN_PROFILE_FIELDS]
+    program_inputs = [getattr(profile, field) for field in PROGRAM_PROFILE_FIELDS]
 
     profile.rest_days = request.data.get("rest_days", profile.rest_days)
     profile.bmi = request.data.get("bmi", profile.bmi)
@@ -145,6 +149,13 @@ def update_profile(request):
 
     profile.save()
 
+    # Stored meal plans were generated from the old diet and cooking-time choices
+    if plan_inputs != [getattr(profile, field) for field in PLAN_PROFILE_FIELDS]:
+        invalidate_stored_plans(user)
+    # ...and stored workout programs from the old rest days and activity level
+    if program_inputs != [getattr(profile, field) for field in PROGRAM_PROFILE_FIELDS]:
+        invalidate_stored_programs([user.pk])
+
     return Response({"message": "Profile updated successfully!"}, status=200)
 
 
@@ -0,0 +1,110 @@
+"""
+Equipment capability bitsets.
+
+Every ``EquipmentType`` owns one bit. An exercise's ``equipment_mask`` is the
+OR of the bits it requires and a user's ``Profile.equipment_mask`` the OR of
+the bits they own, so "can this user do this exercise" is the containment
+check ``required & ~owned == 0``: ``fits`` runs it in memory and ``doable``
+adds it to a queryset as ``equipment_mask & owned = equipment_mask``.
+
+An owned mask of None means the user never saved their equipment and
+filters nothing; 0 means bodyweight only.
+
+Names are matched as slugs: WorkoutEquipment.jsx sends ids like
+"resistance_bands", the catalogue has "resistance-bands". A name that
+isn't in the catalogue (or "none") is an error rather than silently
+owning nothing.
+"""
+import re
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+
+from users.models import Profile
+
+from .models import Equipment, EquipmentType
+
+
+# Picker id for "bodyweight only"; owns nothing
+NONE = 'none'
+
+
+def equipment_slug(name):
+    """Catalogue slug for a picker id or name: " Resistance_Bands" -> "resistance-bands"."""
+    return re.sub(r'[\s_]+', '-', str(name).strip().lower())
+
+
+def equipment_types(slugs):
+    """``{slug: EquipmentType}`` for ``slugs``; ValueError naming any slug the catalogue lacks."""
+    slugs = set(slugs) - {NONE}
+    types = {equipment_type.slug: equipment_type for equipment_type in EquipmentType.objects.filter(slug__in=slugs)}
+    unknown = slugs - types.keys()
+    if unknown:
+        raise ValueError(f"Unknown equipment: {', '.join(sorted(unknown))}")
+    return types
+
+
+def owned_mask(slugs):
+    """Mask of the catalogue entries among ``slugs``; "none" adds nothing."""
+    return sum(equipment_type.mask for equipment_type in equipment_types(map(equipment_slug, slugs)).values())
+
+
+def fits(required, owned):
+    return owned is None or not required & ~owned
+
+
+def doable(queryset, owned):
+    """Narrow an ExerciseLibrary queryset to the exercises ``owned`` covers."""
+    if owned is None:
+        return queryset
+    return queryset.alias(owned_equipment=F('equipment_mask').bitand(owned)).filter(owned_equipment=F('equipment_mask'))
+
+
+def parse_selection(value):
+    """Equipment slugs from a "dumbbells, yoga_mat" string or a list of names."""
+    items = value.split(',') if isinstance(value, str) else value
+    return {equipment_slug(item) for item in items if str(item).strip()}
+
+
+def apply_equipment(selections):
+    """
+    Replace the Equipment rows of each user in ``{user_id: set of names}`` and
+    refresh their ``Profile.equipment_mask``, in one transaction: one read,
+    at most one delete and one insert whatever the number of users. Returns
+    ``{user_id: (added, removed)}``; ValueError, before anything is written,
+    if a name isn't in the catalogue.
+    """
+    with transaction.atomic():
+        types = equipment_types(set().union(*selections.values()))
+        existing = defaultdict(dict)
+        rows = Equipment.objects.filter(user_id__in=list(selections)).values_list('pk', 'user_id', 'equipment_name')
+        for pk, user_id, name in rows:
+            existing[user_id][name] = pk
+
+        changes, stale, added_rows, masks = {}, [], [], {}
+        for user_id, names in selections.items():
+            current = existing[user_id]
+            added, removed = names - current.keys(), current.keys() - names
+            stale += [current[name] for name in removed]
+            added_rows += [
+                Equipment(user_id=user_id, equipment_name=name, equipment_type=types.get(name)) for name in added
+            ]
+            changes[user_id] = (sorted(added), sorted(removed))
+            # An empty selection means "not set", not bodyweight
+            masks[user_id] = sum(types[name].mask for name in names if name in types) if names else None
+
+        if stale:
+            Equipment.objects.filter(pk__in=stale).delete()
+        # A concurrent duplicate submission may have inserted the same rows
+        Equipment.objects.bulk_create(added_rows, ignore_conflicts=True)
+
+        profiles = list(Profile.objects.filter(user_id__in=list(masks)))
+        for profile in profiles:
+            profile.equipment_mask = masks[profile.user_id]
+        Profile.objects.bulk_update(profiles, ['equipment_mask'])
+        missing = masks.keys() - {profile.user_id for profile in profiles}
+        Profile.objects.bulk_create(
+            [Profile(user_id=user_id, equipment_mask=masks[user_id]) for user_id in missing], ignore_conflicts=True
+        )
+    return changes
@@ -0,0 +1,65 @@
+import random
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from meals.management.commands._bench import scratch_database, summarize, time_calls
+from workout.models import ExerciseLibrary
+from workout.substitutes import SubstituteIndex
+
+BODY_PARTS = ['Full Body', 'Chest', 'Back', 'Legs', 'Arms', 'Shoulders', 'Core', 'Glutes']
+TYPES = ['Strength', 'Cardio', 'Flexibility', 'Balance']
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the precomputed substitutes table: build, in-place save and lookup against a per-request scan'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[500, 5000, 20000],
+                            help='Synthetic ExerciseLibrary sizes (default: 500 5000 20000)')
+        parser.add_argument('--iterations', type=int, default=200,
+                            help='Lookups timed per approach and size')
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        iterations = options['iterations']
+        with scratch_database():
+            for size in options['sizes']:
+                existing = ExerciseLibrary.objects.count()
+                ExerciseLibrary.objects.bulk_create(
+                    ExerciseLibrary(
+                        name=f'Exercise {index}', body_part=rng.choice(BODY_PARTS), exercise_type=rng.choice(TYPES),
+                        difficulty=rng.choice(['Beginner', 'Intermediate', 'Advanced']),
+                        impact_level=rng.choice(['Low', 'Medium', 'High']),
+                        sets=rng.randint(2, 5), reps=rng.randint(6, 20), duration=rng.randint(5, 30),
+                    )
+                    for index in range(existing, size)
+                )
+                index = SubstituteIndex()
+                start = time.perf_counter()
+                index.build()
+                build = (time.perf_counter() - start) * 1000
+                ids = list(index.positions)
+
+                def scan():
+                    # What a request would do without the table: distances to every exercise
+                    position = index.positions[rng.choice(ids)]
+                    distances = ((index.features - index.features[position]) ** 2).sum(axis=1)
+                    distances[position] = np.inf
+                    return np.argsort(distances)[:5]
+
+                def lookup():
+                    return index.alternatives(rng.choice(ids), ['Low', 'Medium'])
+
+                def save():
+                    # The in-place update a post_save triggers in this process
+                    index.exercise_saved(rng.choice(ids), index._version)
+
+                index._version = 'bench'
+                # Skip the version check so only the table lookup is timed
+                index._ensure_fresh = lambda: None
+                self.stdout.write(f'{size} exercises (table built in {build:.0f} ms):')
+                self.stdout.write(f'  scan per request  {summarize(time_calls(scan, iterations))}')
+                self.stdout.write(f'  precomputed       {summarize(time_calls(lookup, iterations))}')
+                self.stdout.write(f'  in-place save     {summarize(time_calls(save, min(iterations, 20)))}')
@@ -0,0 +1,56 @@
+import random
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from meals.management.commands._bench import scratch_database, summarize, time_calls
+from workout.models import ExerciseLibrary
+from workout.search import search_exercises
+
+WORDS = [
+    'hamstring', 'glute', 'quad', 'calf', 'chest', 'shoulder', 'lat', 'core', 'hinge', 'squat', 'press', 'pull',
+    'kettlebell', 'dumbbell', 'barbell', 'band', 'tempo', 'pause', 'brace', 'hips', 'knees', 'elbows', 'grip',
+]
+FILLER = [f'{syllable}{suffix}' for syllable in ['zor', 'vex', 'mip', 'tul', 'kra'] for suffix in 'abcdefghij']
+QUERIES = ['hamstring', 'kettle', 'glute hinge', 'press shoulder', 'ham', 'brace core']
+
+
+class Command(BaseCommand):
+    help = 'Benchmark FTS5 exercise search against the icontains fallback as the library grows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000],
+                            help='Synthetic ExerciseLibrary sizes (default: 1000 10000 50000)')
+        parser.add_argument('--matching', type=int, default=200,
+                            help='Rows written with the searched words; the rest never match (default: 200)')
+        parser.add_argument('--iterations', type=int, default=100,
+                            help='Searches timed per engine and size')
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        with scratch_database():
+            for size in options['sizes']:
+                existing = ExerciseLibrary.objects.count()
+                # A fixed set of rows uses the searched words; the rest is filler, so any
+                # growth in search time comes from the library size, not the hit count
+                ExerciseLibrary.objects.bulk_create(
+                    self._exercise(rng, index, WORDS if index < options['matching'] else FILLER)
+                    for index in range(existing, size)
+                )
+
+                self.stdout.write(f'{size} exercises:')
+                for engine in ['like', 'fts5']:
+                    with override_settings(EXERCISE_SEARCH=engine):
+                        def search():
+                            return search_exercises(rng.choice(QUERIES), {'difficulty': 'Beginner'}, limit=20)
+                        self.stdout.write(f'  {engine:<6}{summarize(time_calls(search, options["iterations"]))}')
+
+    def _exercise(self, rng, index, words):
+        return ExerciseLibrary(
+            name=f'{rng.choice(words).title()} {rng.choice(words)} {index}',
+            body_part=rng.choice(['Legs', 'Core', 'Back', 'Chest', 'Arms']),
+            difficulty=rng.choice(['Beginner', 'Intermediate', 'Advanced']),
+            impact_level=rng.choice(['Low', 'Medium', 'High']),
+            description=' '.join(rng.choices(words, k=15)),
+            instructions=' '.join(rng.choices(words, k=30)),
+        )
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workout', '0004_exerciselibrary_workoutexercise_body_part_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='exerciselibrary',
+            index=models.Index(fields=['difficulty', 'impact_level', 'body_part'], name='exercise_difficulty_impact_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exerciselibrary',
+            index=models.Index(fields=['impact_level', 'name'], name='exercise_impact_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exerciselibrary',
+            index=models.Index(fields=['name'], name='exercise_name_idx'),
+        ),
+    ]
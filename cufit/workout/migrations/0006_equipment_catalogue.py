@@ -0,0 +1,114 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:13
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# (slug, name), bit = position; slugs are the ids WorkoutEquipment.jsx sends ("none" is bodyweight)
+EQUIPMENT_TYPES = [
+    ('dumbbells', 'Dumbbells'),
+    ('barbell', 'Barbell & Plates'),
+    ('resistance-bands', 'Resistance Bands'),
+    ('kettlebell', 'Kettlebell'),
+    ('yoga-mat', 'Yoga Mat'),
+    ('pull-up-bar', 'Pull-Up Bar'),
+    ('jump-rope', 'Jump Rope'),
+    ('treadmill', 'Treadmill'),
+    ('exercise-bike', 'Exercise Bike'),
+]
+
+# Requirements for the current library entries; anything else is bodyweight until edited
+EXERCISE_REQUIREMENTS = {
+    'Pull-ups': ['pull-up-bar'],
+    'Deadlifts': ['barbell'],
+    'Hammer Curls': ['dumbbells'],
+    'Lateral Raises': ['dumbbells'],
+    'Bent Over Rows': ['barbell'],
+    'Jump Rope': ['jump-rope'],
+    'Face Pulls': ['resistance-bands'],
+    'Kettlebell Swings': ['kettlebell'],
+    'Skull Crushers': ['barbell'],
+    'Incline Bench Press': ['barbell'],
+    'Renegade Rows': ['dumbbells'],
+    'Front Raises': ['dumbbells'],
+    'Windshield Wipers': ['pull-up-bar'],
+    'Farmers Walks': ['dumbbells'],
+    'Reverse Flyes': ['dumbbells'],
+    'Hanging Leg Raises': ['pull-up-bar'],
+    'Good Mornings': ['barbell'],
+    'Decline Bench Press': ['barbell'],
+    'Barbell Hip Thrust': ['barbell'],
+    'Turkish Get-ups': ['kettlebell'],
+    'Muscle-ups': ['pull-up-bar'],
+}
+
+
+def populate_equipment(apps, schema_editor):
+    EquipmentType = apps.get_model('workout', 'EquipmentType')
+    ExerciseLibrary = apps.get_model('workout', 'ExerciseLibrary')
+    Equipment = apps.get_model('workout', 'Equipment')
+    Profile = apps.get_model('users', 'Profile')
+
+    types = {
+        slug: EquipmentType.objects.create(slug=slug, name=name, bit=bit)
+        for bit, (slug, name) in enumerate(EQUIPMENT_TYPES)
+    }
+
+    for exercise in ExerciseLibrary.objects.filter(name__in=EXERCISE_REQUIREMENTS):
+        required = [types[slug] for slug in EXERCISE_REQUIREMENTS[exercise.name]]
+        exercise.required_equipment.set(required)
+        ExerciseLibrary.objects.filter(pk=exercise.pk).update(
+            equipment_mask=sum(1 << equipment_type.bit for equipment_type in required)
+        )
+
+    masks = {}
+    for row in Equipment.objects.all():
+        # Users who saved anything get a mask, even if it is only "none" or free text
+        masks.setdefault(row.user_id, 0)
+        # Picker ids use underscores ("resistance_bands"), the slugs hyphens
+        equipment_type = types.get(re.sub(r'[\s_]+', '-', row.equipment_name.strip().lower()))
+        if equipment_type is not None:
+            Equipment.objects.filter(pk=row.pk).update(equipment_type=equipment_type)
+            masks[row.user_id] |= 1 << equipment_type.bit
+    for user_id, mask in masks.items():
+        Profile.objects.filter(user_id=user_id).update(equipment_mask=mask)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_profile_equipment_mask'),
+        ('workout', '0005_exerciselibrary_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EquipmentType',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slug', models.SlugField(unique=True)),
+                ('name', models.CharField(max_length=100)),
+                ('bit', models.PositiveSmallIntegerField(unique=True)),
+            ],
+            options={
+                'ordering': ['bit'],
+            },
+        ),
+        migrations.AddField(
+            model_name='exerciselibrary',
+            name='equipment_mask',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='equipment',
+            name='equipment_type',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='workout.equipmenttype'),
+        ),
+        migrations.AddField(
+            model_name='exerciselibrary',
+            name='required_equipment',
+            field=models.ManyToManyField(blank=True, related_name='exercises', to='workout.equipmenttype'),
+        ),
+        migrations.RunPython(populate_equipment, migrations.RunPython.noop),
+    ]
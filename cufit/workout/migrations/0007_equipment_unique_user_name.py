@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:15
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def remove_duplicates(apps, schema_editor):
+    # Keep the oldest row of each (user, equipment_name)
+    Equipment = apps.get_model('workout', 'Equipment')
+    keep = (
+        Equipment.objects.values('user_id', 'equipment_name')
+        .annotate(keep_id=Min('id'))
+        .values_list('keep_id', flat=True)
+    )
+    Equipment.objects.exclude(id__in=list(keep)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workout', '0006_equipment_catalogue'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='equipment',
+            constraint=models.UniqueConstraint(fields=('user', 'equipment_name'), name='unique_user_equipment'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workout', '0007_equipment_unique_user_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkoutProgram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('week_start', models.DateField()),
+                ('rest_weekdays', models.PositiveSmallIntegerField(default=0)),
+                ('level', models.PositiveSmallIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='workout_programs', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ProgramExercise',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('position', models.PositiveSmallIntegerField()),
+                ('sets', models.IntegerField()),
+                ('reps', models.IntegerField()),
+                ('exercise', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='workout.exerciselibrary')),
+                ('program', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='workout.workoutprogram')),
+            ],
+            options={
+                'ordering': ['date', 'position'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='workoutprogram',
+            constraint=models.UniqueConstraint(fields=('user', 'week_start'), name='unique_user_program_week'),
+        ),
+        migrations.AddConstraint(
+            model_name='programexercise',
+            constraint=models.UniqueConstraint(fields=('program', 'date', 'position'), name='unique_program_slot'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:02
+
+from django.db import migrations
+
+
+# Frozen copy of the index workout/search.py maintains, so later changes there don't rewrite history
+FTS_TABLE = 'workout_exerciselibrary_fts'
+COLUMNS = 'name, body_part, description, instructions'
+
+INSERT = (
+    f'INSERT INTO {FTS_TABLE}(rowid, {COLUMNS}) '
+    'VALUES (new.id, new.name, new.body_part, new.description, new.instructions)'
+)
+DELETE = (
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {COLUMNS}) "
+    "VALUES ('delete', old.id, old.name, old.body_part, old.description, old.instructions)"
+)
+TRIGGERS = {
+    'ai': f'AFTER INSERT ON workout_exerciselibrary BEGIN {INSERT}; END',
+    'ad': f'AFTER DELETE ON workout_exerciselibrary BEGIN {DELETE}; END',
+    'au': f'AFTER UPDATE ON workout_exerciselibrary BEGIN {DELETE}; {INSERT}; END',
+}
+
+
+def fts5_supported(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pragma_compile_options WHERE compile_options = 'ENABLE_FTS5'")
+        return cursor.fetchone() is not None
+
+
+def install(apps, schema_editor):
+    # No-op on databases without FTS5; search falls back to icontains there
+    if not fts5_supported(schema_editor.connection):
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5({COLUMNS}, "
+            f"content='workout_exerciselibrary', content_rowid='id', prefix='2 3', "
+            f"tokenize='unicode61 remove_diacritics 2')"
+        )
+        for suffix, body in TRIGGERS.items():
+            cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_{suffix} {body}')
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def drop(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for suffix in TRIGGERS:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}')
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workout', '0008_workout_program'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, drop),
+    ]
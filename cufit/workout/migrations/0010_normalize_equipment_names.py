@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:05
+
+import re
+
+from django.db import migrations
+
+
+def slug(name):
+    # Same rule as workout.equipment.equipment_slug, frozen here
+    return re.sub(r'[\s_]+', '-', name.strip().lower())
+
+
+def normalize_equipment(apps, schema_editor):
+    # 0006 matched names exactly, so the picker's "resistance_bands" etc. got no bit
+    EquipmentType = apps.get_model('workout', 'EquipmentType')
+    Equipment = apps.get_model('workout', 'Equipment')
+    Profile = apps.get_model('users', 'Profile')
+
+    types = {equipment_type.slug: equipment_type for equipment_type in EquipmentType.objects.all()}
+    owned = {(user_id, name) for user_id, name in Equipment.objects.values_list('user_id', 'equipment_name')}
+    masks = {}
+    for row in Equipment.objects.order_by('id'):
+        masks.setdefault(row.user_id, 0)
+        name = slug(row.equipment_name)
+        if name != row.equipment_name:
+            if (row.user_id, name) in owned:
+                # The user already has the slug spelling; unique_user_equipment allows one
+                row.delete()
+                continue
+            owned.add((row.user_id, name))
+        equipment_type = types.get(name)
+        Equipment.objects.filter(pk=row.pk).update(equipment_name=name, equipment_type=equipment_type)
+        if equipment_type is not None:
+            masks[row.user_id] |= 1 << equipment_type.bit
+    for user_id, mask in masks.items():
+        Profile.objects.filter(user_id=user_id).update(equipment_mask=mask)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_profile_equipment_mask'),
+        ('workout', '0009_exercise_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_equipment, migrations.RunPython.noop),
+    ]
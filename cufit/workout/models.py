@@ -29,9 +29,31 @@ class MasterWorkout(models.Model):
     def __str__(self):
         return self.name
 
+class EquipmentType(models.Model):
+    """Normalized equipment catalogue; each type owns one bit of the equipment masks."""
+    slug = models.SlugField(max_length=50, unique=True)  # Matches the ids the app sends, e.g. "dumbbells"
+    name = models.CharField(max_length=100)
+    bit = models.PositiveSmallIntegerField(unique=True)  # 0-62, mask value is 1 << bit
+
+    class Meta:
+        ordering = ['bit']
+
+    @property
+    def mask(self):
+        return 1 << self.bit
+
+    def __str__(self):
+        return self.name
+
 class Equipment(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)  # Link to user
     equipment_name = models.CharField(max_length=255)  # Store equipment name
+    equipment_type = models.ForeignKey(EquipmentType, on_delete=models.SET_NULL, blank=True, null=True)  # None for free text
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'equipment_name'], name='unique_user_equipment'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.equipment_name}"
@@ -121,6 +143,9 @@ class ExerciseLibrary(models.Model):
     sets = models.IntegerField(default=3)
     reps = models.IntegerField(default=10)
     video_link = models.URLField(blank=True, null=True)
+    required_equipment = models.ManyToManyField(EquipmentType, blank=True, related_name='exercises')
+    # OR of required_equipment bits, kept in sync by workout.signals; 0 is bodyweight
+    equipment_mask = models.PositiveBigIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -128,6 +153,45 @@ class ExerciseLibrary(models.Model):
         verbose_name = "Exercise Library"
         verbose_name_plural = "Exercise Library"
         ordering = ['name']
+        indexes = [
+            # get_user_workout tiers: difficulty AND impact_level IN (...) ORDER BY impact_level, body_part
+            models.Index(fields=['difficulty', 'impact_level', 'body_part'], name='exercise_difficulty_impact_idx'),
+            # get_exercises pages: impact_level filter in name order, and the unfiltered list
+            models.Index(fields=['impact_level', 'name'], name='exercise_impact_name_idx'),
+            models.Index(fields=['name'], name='exercise_name_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.difficulty})"
+
+
+class WorkoutProgram(models.Model):
+    """A user's generated 7-day split, Monday to Sunday."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='workout_programs')
+    week_start = models.DateField()  # Monday
+    rest_weekdays = models.PositiveSmallIntegerField(default=0)  # Bit n set: weekday n (Monday = 0) is a rest day
+    level = models.PositiveSmallIntegerField(default=0)  # Progression weeks applied to sets and reps
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'week_start'], name='unique_user_program_week'),
+        ]
 
     def __str__(self):
-        return f"{self.name} ({self.difficulty})"
\ No newline at end of file
+        return f"{self.user.username} - week of {self.week_start}"
+
+
+class ProgramExercise(models.Model):
+    program = models.ForeignKey(WorkoutProgram, on_delete=models.CASCADE, related_name='entries')
+    date = models.DateField()
+    position = models.PositiveSmallIntegerField()
+    exercise = models.ForeignKey(ExerciseLibrary, on_delete=models.CASCADE)
+    sets = models.IntegerField()
+    reps = models.IntegerField()
+
+    class Meta:
+        ordering = ['date', 'position']
+        constraints = [
+            models.UniqueConstraint(fields=['program', 'date', 'position'], name='unique_program_slot'),
+        ]
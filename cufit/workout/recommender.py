@@ -0,0 +1,174 @@
+"""
+Personalized exercise lists for ``get_user_workout``.
+
+The list only depends on the (difficulty, impact levels) pair an activity
+level maps to and the user's equipment mask, so few distinct lists exist
+per version of the exercise library. ``WorkoutCache`` keeps them in a small process-local
+LRU in front of the Django cache, keyed by the pair and the ``exercises``
+catalogue version (see ``cufit/catalogue.py``): a library write bumps the
+version, which retires every cached list in every process, and the
+ExerciseLibrary signals also clear the local LRU straight away.
+"""
+import threading
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.db.models import Exists, TextField, Value
+from django.db.models.functions import Coalesce, Concat, NullIf
+
+from cufit.catalogue import EXERCISES, catalogue_version
+
+from .equipment import doable
+from .models import ExerciseLibrary
+
+# Map activity level to difficulty and impact level
+ACTIVITY_MAPPING = {
+    'sedentary': {
+        'difficulty': 'Beginner',
+        'impact_levels': ['Low']
+    },
+    'light': {
+        'difficulty': 'Beginner',
+        'impact_levels': ['Low', 'Medium']
+    },
+    'moderate': {
+        'difficulty': 'Intermediate',
+        'impact_levels': ['Low', 'Medium']
+    },
+    'very': {
+        'difficulty': 'Intermediate',
+        'impact_levels': ['Low', 'Medium', 'High']
+    },
+    'extra': {
+        'difficulty': 'Advanced',
+        'impact_levels': ['Medium', 'High']
+    },
+    'athlete': {
+        'difficulty': 'Advanced',
+        'impact_levels': ['High']
+    }
+}
+DEFAULT_EXERCISE_FILTERS = {
+    'difficulty': 'Intermediate',  # Default difficulty
+    'impact_levels': ['Low', 'Medium']  # Default impact levels
+}
+
+# Upper bound on the personalized list; responses page through it
+MAX_WORKOUT_EXERCISES = 1000
+
+
+def workout_columns(prefix=''):
+    """
+    ``(name, column or expression)`` pairs for the personalized list, with
+    defaults applied in SQL. ``prefix`` reads them through a relation, e.g.
+    ``'exercise__'`` from ProgramExercise.
+    """
+    return [
+        ('id', f'{prefix}id'),
+        ('name', f'{prefix}name'),
+        ('body_part', f'{prefix}body_part'),
+        ('difficulty', f'{prefix}difficulty'),
+        ('impact_level', f'{prefix}impact_level'),
+        ('description', Coalesce(
+            NullIf(f'{prefix}description', Value('')),
+            Concat(Value('Exercise targeting '), f'{prefix}body_part'),
+            output_field=TextField(),
+        )),
+        ('duration', Coalesce(NullIf(f'{prefix}duration', Value(0)), Value(10))),  # Default duration in minutes
+        ('sets', Coalesce(NullIf(f'{prefix}sets', Value(0)), Value(3))),
+        ('reps', Coalesce(NullIf(f'{prefix}reps', Value(0)), Value(10))),
+        ('video_link', f'{prefix}video_link'),
+        ('exercise_type', f'{prefix}exercise_type'),
+        ('instructions', Coalesce(
+            NullIf(f'{prefix}instructions', Value('')),
+            Concat(Value('Perform the exercise with proper form targeting '), f'{prefix}body_part'),
+            output_field=TextField(),
+        )),
+    ]
+
+
+def workout_exercises(difficulty, impact_levels, equipment=None, limit=MAX_WORKOUT_EXERCISES):
+    """
+    Exercises for a (difficulty, impact levels) pair in one query: the exact
+    matches, else the same difficulty at any impact level, else everything.
+    Each tier is a UNION ALL branch gated by NOT EXISTS on the better tiers,
+    so the first two are read off ``exercise_difficulty_impact_idx`` and the
+    full scan only runs when the difficulty has no exercises at all.
+    ``equipment`` is the user's owned mask; every tier only holds exercises
+    it covers (see ``equipment.py``).
+    """
+    names, columns = zip(*workout_columns())
+    library = doable(ExerciseLibrary.objects.all(), equipment)
+    exact = library.filter(difficulty=difficulty, impact_level__in=impact_levels)
+    same_difficulty = library.filter(difficulty=difficulty)
+    tiers = [
+        exact,
+        same_difficulty.exclude(impact_level__in=impact_levels).filter(~Exists(exact)),
+        library.filter(~Exists(same_difficulty)),
+    ]
+    first, *rest = (tier.order_by().values_list(*columns) for tier in tiers)
+    rows = first.union(*rest, all=True).order_by('difficulty', 'impact_level', 'body_part', 'id')[:limit]
+    return [dict(zip(names, row)) for row in rows]
+
+
+class WorkoutCache:
+    """
+    Two-level cache of ``workout_exercises`` results. Returned lists are
+    shared between requests and must not be mutated.
+    """
+
+    def __init__(self, maxsize=32, timeout=60 * 60):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._local = OrderedDict()
+        self._counts = {'local_hits': 0, 'shared_hits': 0, 'misses': 0}
+
+    def invalidate(self):
+        """Drop the process-local lists; the shared ones are retired by the version bump."""
+        with self._lock:
+            self._local.clear()
+
+    def exercises(self, difficulty, impact_levels, equipment=None):
+        version = catalogue_version(EXERCISES)
+        key = (version, difficulty, tuple(impact_levels), equipment)
+        with self._lock:
+            exercises = self._local.get(key)
+            if exercises is not None:
+                self._local.move_to_end(key)
+                self._counts['local_hits'] += 1
+                return exercises
+
+        shared_key = f"workout-exercises:{version}:{difficulty}:{','.join(impact_levels)}:{equipment}"
+        exercises = cache.get(shared_key)
+        if exercises is None:
+            exercises = workout_exercises(difficulty, impact_levels, equipment)
+            cache.set(shared_key, exercises, timeout=self.timeout)
+            outcome = 'misses'
+        else:
+            outcome = 'shared_hits'
+
+        with self._lock:
+            self._counts[outcome] += 1
+            self._local[key] = exercises
+            self._local.move_to_end(key)
+            while len(self._local) > self.maxsize:
+                self._local.popitem(last=False)
+        return exercises
+
+    def stats(self):
+        """Hit counts and rates for this process since it started."""
+        with self._lock:
+            counts = dict(self._counts)
+            size = len(self._local)
+        lookups = sum(counts.values())
+        return {
+            **counts,
+            'lookups': lookups,
+            'local_hit_rate': counts['local_hits'] / lookups if lookups else 0.0,
+            'hit_rate': (counts['local_hits'] + counts['shared_hits']) / lookups if lookups else 0.0,
+            'local_size': size,
+        }
+
+
+workout_cache = WorkoutCache()
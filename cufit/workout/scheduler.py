@@ -0,0 +1,207 @@
+"""
+Weekly workout programs.
+
+A program is a Monday-to-Sunday split built from the user's personalized
+candidate list (``recommender.workout_cache``), fetched once per build and
+shared by all seven days. Training days cycle through the candidates' body
+parts so each part gets a near-equal number of slots over the week, rest
+days come from ``Profile.rest_days``, and sets and reps grow with the number
+of programs the user already has, at a pace set by the exercise difficulty.
+
+Programs are stored in ``WorkoutProgram``/``ProgramExercise`` and served from
+there until the profile inputs change.
+"""
+import datetime
+import random
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+
+from .models import ProgramExercise, WorkoutProgram
+from .recommender import ACTIVITY_MAPPING, DEFAULT_EXERCISE_FILTERS, workout_cache, workout_columns
+
+EXERCISES_PER_DAY = 5
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+# Used when no rest day falls in the week
+DEFAULT_REST_WEEKDAYS = 1 << WEEKDAYS.index('sunday')
+
+# difficulty -> (extra reps per week, weeks per extra set)
+PROGRESSION = {
+    'Beginner': (1, 4),
+    'Intermediate': (2, 3),
+    'Advanced': (2, 2),
+}
+MAX_EXTRA_REPS = 10
+MAX_EXTRA_SETS = 2
+
+# Profile fields that feed into program generation
+PROGRAM_PROFILE_FIELDS = ('rest_days', 'activity_level', 'equipment_mask')
+
+
+def week_start(date):
+    """The Monday of ``date``'s week."""
+    return date - datetime.timedelta(days=date.weekday())
+
+
+def rest_weekdays(rest_days, start):
+    """
+    Weekday bitmask of the rest days in the week from ``start``. ``rest_days``
+    is the profile's comma-separated list of ISO dates (what Calender.jsx
+    saves) or weekday names. Older profiles hold JS date strings ("Wed Mar
+    26 2025 00:00:00 GMT-0400 (...)"); those dates are long gone, so their
+    weekday counts every week, like a weekday name.
+    """
+    mask = 0
+    for token in (rest_days or '').split(','):
+        token = token.strip().lower()
+        if not token:
+            continue
+        try:
+            legacy = datetime.datetime.strptime(token[:15], '%a %b %d %Y')
+        except ValueError:
+            pass
+        else:
+            mask |= 1 << legacy.weekday()
+            continue
+        if token.isalpha():
+            # "sun", "Sunday"
+            abbreviations = [weekday[:3] for weekday in WEEKDAYS]
+            if token[:3] in abbreviations:
+                mask |= 1 << abbreviations.index(token[:3])
+            continue
+        try:
+            date = datetime.date.fromisoformat(token)
+        except ValueError:
+            continue
+        if start <= date < start + datetime.timedelta(days=7):
+            mask |= 1 << date.weekday()
+    return mask or DEFAULT_REST_WEEKDAYS
+
+
+def progressed(exercise, level):
+    """``(sets, reps)`` for an exercise after ``level`` weeks of progression."""
+    reps_per_week, weeks_per_set = PROGRESSION.get(exercise['difficulty'], PROGRESSION['Beginner'])
+    return (
+        exercise['sets'] + min(level // weeks_per_set, MAX_EXTRA_SETS),
+        exercise['reps'] + min(level * reps_per_week, MAX_EXTRA_REPS),
+    )
+
+
+def build_program(candidates, start, rest_mask, level=0, per_day=EXERCISES_PER_DAY, seed=None):
+    """
+    Lay ``candidates`` out over the week from ``start``. Returns
+    ``{date: [exercise dicts with progressed sets/reps]}``, empty for rest days.
+
+    Body parts are taken in rotation, ``per_day`` slots a day, so over the
+    week each part is trained within one slot of every other; within a part
+    exercises are used in turn before any repeats.
+    """
+    rng = random.Random(seed)
+    by_part = defaultdict(list)
+    for exercise in candidates:
+        by_part[exercise['body_part']].append(exercise)
+    for exercises in by_part.values():
+        rng.shuffle(exercises)
+    parts = sorted(by_part, key=lambda part: (-len(by_part[part]), part))
+
+    program = {}
+    turn = 0
+    used = defaultdict(int)
+    for offset in range(7):
+        date = start + datetime.timedelta(days=offset)
+        program[date] = []
+        if rest_mask & (1 << offset) or not parts:
+            continue
+        picked = set()
+        for _ in range(min(per_day, len(candidates))):
+            part = parts[turn % len(parts)]
+            turn += 1
+            exercise = by_part[part][used[part] % len(by_part[part])]
+            used[part] += 1
+            if exercise['id'] in picked:
+                continue
+            picked.add(exercise['id'])
+            sets, reps = progressed(exercise, level)
+            program[date].append({**exercise, 'sets': sets, 'reps': reps})
+    return program
+
+
+def stored_program(user, start):
+    """Return ``(rest_mask, level, {date: [exercises]})`` for the stored week, or None."""
+    program = WorkoutProgram.objects.filter(user=user, week_start=start).first()
+    if program is None:
+        return None
+    names, columns = zip(*workout_columns('exercise__'))
+    days = {start + datetime.timedelta(days=offset): [] for offset in range(7)}
+    rows = ProgramExercise.objects.filter(program=program).order_by('date', 'position')
+    for date, sets, reps, *values in rows.values_list('date', 'sets', 'reps', *columns):
+        days[date].append({**dict(zip(names, values)), 'sets': sets, 'reps': reps})
+    return program.rest_weekdays, program.level, days
+
+
+def persist_program(user, start, rest_mask, level, days):
+    """
+    Store a generated week with one insert per table. Returns False when
+    another request stored the week first.
+    """
+    try:
+        with transaction.atomic():
+            program = WorkoutProgram.objects.create(user=user, week_start=start, rest_weekdays=rest_mask, level=level)
+            ProgramExercise.objects.bulk_create(
+                ProgramExercise(
+                    program=program, date=date, position=position,
+                    exercise_id=exercise['id'], sets=exercise['sets'], reps=exercise['reps'],
+                )
+                for date, exercises in days.items()
+                for position, exercise in enumerate(exercises)
+            )
+    except IntegrityError:
+        return False
+    return True
+
+
+def week_program(user, date, profile=None):
+    """
+    Return ``{week_start, level, days: [{date, weekday, rest, body_parts, exercises}]}``
+    for the week containing ``date``, generating and storing it if needed.
+    """
+    start = week_start(date)
+    stored = stored_program(user, start)
+    if stored is None:
+        if profile is None:
+            profile = user.profile
+        exercise_filters = ACTIVITY_MAPPING.get((profile.activity_level or 'moderate').lower(), DEFAULT_EXERCISE_FILTERS)
+        candidates = workout_cache.exercises(
+            exercise_filters['difficulty'], exercise_filters['impact_levels'], profile.equipment_mask
+        )
+        rest_mask = rest_weekdays(profile.rest_days, start)
+        level = WorkoutProgram.objects.filter(user=user, week_start__lt=start).count()
+        days = build_program(candidates, start, rest_mask, level, seed=f'{user.pk}:{start}')
+        stored = (rest_mask, level, days)
+        if not persist_program(user, start, rest_mask, level, days):
+            stored = stored_program(user, start) or stored
+
+    rest_mask, level, days = stored
+    return {
+        'week_start': start,
+        'level': level,
+        'days': [
+            {
+                'date': day,
+                'weekday': WEEKDAYS[day.weekday()].capitalize(),
+                'rest': bool(rest_mask & (1 << day.weekday())),
+                'body_parts': sorted({exercise['body_part'] for exercise in exercises}),
+                'exercises': exercises,
+            }
+            for day, exercises in days.items()
+        ],
+    }
+
+
+def invalidate_stored_programs(user_ids):
+    """Drop this week's and any later programs, e.g. after a rest day or equipment change."""
+    WorkoutProgram.objects.filter(
+        user_id__in=list(user_ids), week_start__gte=week_start(datetime.date.today())
+    ).delete()
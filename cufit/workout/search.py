@@ -0,0 +1,195 @@
+"""
+Full-text exercise search.
+
+On SQLite builds with FTS5, ``workout_exerciselibrary_fts`` indexes the name,
+body part, description and instructions of every ``ExerciseLibrary`` row.
+It is an external-content table (the text stays in the library table) kept
+in sync by triggers, so ``bulk_create``/``update()`` and raw SQL are covered
+as well as ``save()``. Queries are ranked with BM25 and every term is
+matched as a prefix ("kettle" finds "kettlebell"); the prefix indexes keep
+that a lookup rather than a scan.
+
+Other databases, FTS5-less SQLite builds and ``EXERCISE_SEARCH = 'like'``
+fall back to ``icontains`` matching with a weighted score, same results
+shape.
+"""
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, Count, IntegerField, Q, Value, When
+
+from .models import ExerciseLibrary
+
+FTS_TABLE = 'workout_exerciselibrary_fts'
+
+# (column, BM25 weight); a hit in the name counts most
+SEARCH_COLUMNS = [
+    ('name', 10.0),
+    ('body_part', 5.0),
+    ('description', 2.0),
+    ('instructions', 1.0),
+]
+
+# Query params that narrow the results and are reported as facets
+FACETS = ('difficulty', 'impact_level', 'body_part')
+
+_TRIGGERS = {
+    'ai': 'AFTER INSERT ON workout_exerciselibrary BEGIN {insert}; END',
+    'ad': 'AFTER DELETE ON workout_exerciselibrary BEGIN {delete}; END',
+    'au': 'AFTER UPDATE ON workout_exerciselibrary BEGIN {delete}; {insert}; END',
+}
+
+# Per database: whether the FTS table is there (None until checked)
+_fts_tables = {}
+
+
+def _columns(prefix=''):
+    return ', '.join(f'{prefix}{column}' for column, _ in SEARCH_COLUMNS)
+
+
+def fts5_supported(conn=connection):
+    if conn.vendor != 'sqlite':
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pragma_compile_options WHERE compile_options = 'ENABLE_FTS5'")
+        return cursor.fetchone() is not None
+
+
+def install_search_index(conn=connection):
+    """
+    Create the FTS table and its triggers where missing and rebuild the index
+    if anything had to be created. SQLite drops a table's triggers when
+    Django remakes it for an ALTER, so this also runs after every migrate.
+    Returns False when FTS5 isn't available.
+    """
+    if not fts5_supported(conn):
+        return False
+    statements = {
+        'insert': f'INSERT INTO {FTS_TABLE}(rowid, {_columns()}) VALUES (new.id, {_columns("new.")})',
+        'delete': f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_columns()}) VALUES ('delete', old.id, {_columns('old.')})",
+    }
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE name LIKE %s", [f'{FTS_TABLE}%'])
+        existing = {name for name, in cursor.fetchall()}
+        created = False
+        if FTS_TABLE not in existing:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5({_columns()}, content='workout_exerciselibrary', "
+                f"content_rowid='id', prefix='2 3', tokenize='unicode61 remove_diacritics 2')"
+            )
+            created = True
+        for suffix, body in _TRIGGERS.items():
+            if f'{FTS_TABLE}_{suffix}' not in existing:
+                cursor.execute(f'CREATE TRIGGER {FTS_TABLE}_{suffix} {body.format(**statements)}')
+                created = True
+        if created:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    _fts_tables.clear()
+    return True
+
+
+def drop_search_index(conn=connection):
+    if conn.vendor != 'sqlite':
+        return
+    with conn.cursor() as cursor:
+        for suffix in _TRIGGERS:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}')
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+    _fts_tables.clear()
+
+
+def use_fts():
+    if getattr(settings, 'EXERCISE_SEARCH', 'fts5') != 'fts5' or connection.vendor != 'sqlite':
+        return False
+    name = connection.settings_dict['NAME']
+    if _fts_tables.get(name) is None:
+        _fts_tables[name] = FTS_TABLE in connection.introspection.table_names()
+    return _fts_tables[name]
+
+
+def search_terms(query):
+    """Lower-cased words of ``query``; punctuation and FTS syntax are dropped."""
+    return re.findall(r'\w+', (query or '').lower())
+
+
+def _fts_search(terms, filters, limit, offset):
+    # Every term as a quoted prefix, implicitly ANDed
+    match = ' '.join(f'"{term}"*' for term in terms)
+    joined = (
+        f'FROM {FTS_TABLE} JOIN workout_exerciselibrary e ON e.id = {FTS_TABLE}.rowid '
+        f'WHERE {FTS_TABLE} MATCH %s'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT e.difficulty, e.impact_level, e.body_part, COUNT(*) {joined} '
+            f'GROUP BY e.difficulty, e.impact_level, e.body_part',
+            [match],
+        )
+        groups = cursor.fetchall()
+
+        where = ''.join(f' AND e.{field} = %s COLLATE NOCASE' for field in filters)
+        weights = ', '.join(str(weight) for _, weight in SEARCH_COLUMNS)
+        cursor.execute(
+            f'SELECT e.id {joined}{where} ORDER BY bm25({FTS_TABLE}, {weights}), e.name, e.id LIMIT %s OFFSET %s',
+            [match, *filters.values(), limit, offset],
+        )
+        ids = [row[0] for row in cursor.fetchall()]
+    return ids, groups
+
+
+def _like_search(terms, filters, limit, offset):
+    matches = ExerciseLibrary.objects.all()
+    score = Value(0)
+    for term in terms:
+        matches = matches.filter(
+            Q(name__icontains=term) | Q(body_part__icontains=term)
+            | Q(description__icontains=term) | Q(instructions__icontains=term)
+        )
+        for column, weight in SEARCH_COLUMNS:
+            score = score + Case(
+                When(**{f'{column}__icontains': term}, then=Value(int(weight))),
+                default=Value(0), output_field=IntegerField(),
+            )
+    groups = matches.order_by().values_list('difficulty', 'impact_level', 'body_part').annotate(Count('id'))
+
+    filtered = matches.filter(**{f'{field}__iexact': value for field, value in filters.items()})
+    ids = filtered.annotate(score=score).order_by('-score', 'name', 'id').values_list('id', flat=True)
+    return list(ids[offset:offset + limit]), list(groups)
+
+
+def search_exercises(query, filters=None, limit=20, offset=0, fields=None):
+    """
+    Rank the exercises matching every word of ``query``. ``filters`` maps
+    FACETS names to values (case-insensitive). Returns ``(rows, count, facets)``:
+    one page of ``values(*fields)`` dicts, the number of filtered matches,
+    and ``{facet: [{value, count}]}`` over the text matches, each facet
+    narrowed by the other facets' filters only.
+    """
+    terms = search_terms(query)
+    filters = {field: value for field, value in (filters or {}).items() if value}
+    if not terms:
+        return [], 0, {facet: [] for facet in FACETS}
+
+    search = _fts_search if use_fts() else _like_search
+    ids, groups = search(terms, filters, limit, offset)
+
+    wanted = {field: value.lower() for field, value in filters.items()}
+    counts = {facet: Counter() for facet in FACETS}
+    count = 0
+    for *values, matched in groups:
+        row = dict(zip(FACETS, values))
+        misses = [field for field, value in wanted.items() if (row[field] or '').lower() != value]
+        if not misses:
+            count += matched
+        for facet in FACETS:
+            if row[facet] and set(misses) <= {facet}:
+                counts[facet][row[facet]] += matched
+    facets = {
+        facet: [{'value': value, 'count': n} for value, n in sorted(counter.items(), key=lambda item: (-item[1], item[0]))]
+        for facet, counter in counts.items()
+    }
+
+    rows = {row['id']: row for row in ExerciseLibrary.objects.filter(id__in=ids).values(*(fields or ()))}
+    return [rows[pk] for pk in ids if pk in rows], count, facets
@@ -6,7 +6,8 @@ from .models import ExerciseLibrary, MasterWorkout
 class ExerciseSerializer(serializers.ModelSerializer):
     class Meta:
         model = ExerciseLibrary  
-        fields = '__all__'
+        # Requirements are served flat as equipment_mask
+        exclude = ['required_equipment']
 
 
 
@@ -0,0 +1,71 @@
+from collections import defaultdict
+
+from django.db import connections
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save, pre_delete
+from django.dispatch import receiver
+
+from cufit.catalogue import EXERCISES, bump_catalogue_version, catalogue_version
+
+from .models import EquipmentType, ExerciseLibrary
+from .recommender import workout_cache
+from .search import FTS_TABLE, install_search_index
+from .substitutes import substitute_index
+
+RequiredEquipment = ExerciseLibrary.required_equipment.through
+
+
+@receiver([post_save, post_delete], sender=ExerciseLibrary)
+def bump_exercises_version(sender, instance, signal, **kwargs):
+    # Fresh: a bump from another worker still within this process's TTL must not look like ours
+    previous = catalogue_version(EXERCISES, fresh=True)
+    bump_catalogue_version(EXERCISES)
+    workout_cache.invalidate()
+    if signal is post_save:
+        # Fold the save into the substitutes table instead of rebuilding it
+        substitute_index.exercise_saved(instance.pk, previous)
+
+
+def sync_equipment_masks(exercise_ids):
+    """Recompute ``equipment_mask`` for the given exercises from their requirements."""
+    masks = defaultdict(int)
+    for exercise_id, bit in RequiredEquipment.objects.filter(
+        exerciselibrary_id__in=exercise_ids
+    ).values_list('exerciselibrary_id', 'equipmenttype__bit'):
+        masks[exercise_id] |= 1 << bit
+    for exercise_id in exercise_ids:
+        ExerciseLibrary.objects.filter(pk=exercise_id).update(equipment_mask=masks[exercise_id])
+    # update() sends no post_save
+    bump_catalogue_version(EXERCISES)
+    workout_cache.invalidate()
+
+
+@receiver(m2m_changed, sender=RequiredEquipment)
+def requirements_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        # The equipment type side doesn't say which exercises lose it
+        instance._cleared_exercise_ids = list(instance.exercises.values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        if not reverse:
+            sync_equipment_masks([instance.pk])
+        elif action == 'post_clear':
+            sync_equipment_masks(instance._cleared_exercise_ids)
+        else:
+            sync_equipment_masks(list(pk_set))
+
+
+@receiver(pre_delete, sender=EquipmentType)
+def remember_equipment_exercises(sender, instance, **kwargs):
+    instance._cleared_exercise_ids = list(instance.exercises.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=EquipmentType)
+def equipment_type_deleted(sender, instance, **kwargs):
+    sync_equipment_masks(instance._cleared_exercise_ids)
+
+
+@receiver(post_migrate)
+def restore_search_index(sender, using, **kwargs):
+    # Remaking workout_exerciselibrary for an ALTER drops the FTS triggers
+    conn = connections[using]
+    if sender.name == 'workout' and FTS_TABLE in conn.introspection.table_names():
+        install_search_index(conn)
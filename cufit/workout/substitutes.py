@@ -0,0 +1,232 @@
+"""
+Precomputed "swap this exercise" suggestions.
+
+Every ``ExerciseLibrary`` row becomes a feature vector: one-hot body part
+and exercise type, ordinal difficulty and impact level, and sets/reps/
+duration (with the same defaults the personalized list applies). The
+``SUBSTITUTES`` nearest rows of each exercise are computed with NumPy in
+blocks and kept in an ``(exercises x SUBSTITUTES)`` table, so a lookup is
+one row of that table plus a filter over a handful of candidates.
+
+The index is process-local. Saving an exercise in this process updates it
+in place: the saved row's neighbours are recomputed, and so are those of
+the rows it enters or leaves. Any other catalogue change (another worker,
+a delete, ``update()``) shows up as a new ``exercises`` catalogue version
+and the next lookup rebuilds everything (see ``cufit/catalogue.py``).
+"""
+import threading
+
+import numpy as np
+
+from cufit.catalogue import EXERCISES, catalogue_version
+
+from .models import ExerciseLibrary
+from .recommender import workout_columns
+
+SUBSTITUTES = 20
+
+DIFFICULTIES = ['Beginner', 'Intermediate', 'Advanced']
+IMPACT_LEVELS = ['Low', 'Medium', 'High']
+
+# A swap should train the same body part first and foremost
+BODY_PART_WEIGHT = 3.0
+EXERCISE_TYPE_WEIGHT = 1.0
+DIFFICULTY_WEIGHT = 1.5
+IMPACT_WEIGHT = 1.0
+# Fixed scales rather than the library's own spread, so a save never rescales every row
+VOLUME_SCALES = {'sets': 5.0, 'reps': 20.0, 'duration': 30.0}
+VOLUME_WEIGHT = 0.5
+
+# Rows of the distance matrix computed at a time
+BLOCK_ROWS = 512
+
+
+def impact_restrictions(pain_and_injury):
+    """
+    Impact levels allowed by the profile's pain and injury answers (the
+    comma-separated list PainAndInjuryForm saves), with the rule
+    get_exercises applies: two or more issues keep Low, one keeps Low and
+    Medium. None means unrestricted.
+    """
+    items = [item.strip(" []'\"") for item in (pain_and_injury or '').split(',')]
+    issues = [item for item in items if item and item != 'None' and not item.startswith('Pain Level')]
+    if len(issues) >= 2:
+        return ['Low']
+    if len(issues) == 1:
+        return ['Low', 'Medium']
+    return None
+
+
+class SubstituteIndex:
+    """Nearest-neighbour table over the exercise library."""
+
+    def __init__(self, substitutes=SUBSTITUTES):
+        self.substitutes = substitutes
+        self._lock = threading.Lock()
+        self._version = None
+
+    # Features
+
+    def _vocabularies(self, rows):
+        return {
+            field: {value: position for position, value in enumerate(sorted({row[field] or '' for row in rows}))}
+            for field in ('body_part', 'exercise_type')
+        }
+
+    def _features(self, rows):
+        """``len(rows) x dimensions`` matrix, or None if a row has a body part or type the index hasn't seen."""
+        body_parts, types = self.vocabularies['body_part'], self.vocabularies['exercise_type']
+        features = np.zeros((len(rows), len(body_parts) + len(types) + 2 + len(VOLUME_SCALES)))
+        for index, row in enumerate(rows):
+            body_part, exercise_type = row['body_part'] or '', row['exercise_type'] or ''
+            if body_part not in body_parts or exercise_type not in types:
+                return None
+            features[index, body_parts[body_part]] = BODY_PART_WEIGHT
+            features[index, len(body_parts) + types[exercise_type]] = EXERCISE_TYPE_WEIGHT
+            column = len(body_parts) + len(types)
+            features[index, column] = DIFFICULTY_WEIGHT * self._ordinal(DIFFICULTIES, row['difficulty'])
+            features[index, column + 1] = IMPACT_WEIGHT * self._ordinal(IMPACT_LEVELS, row['impact_level'])
+            for offset, (field, scale) in enumerate(VOLUME_SCALES.items()):
+                features[index, column + 2 + offset] = VOLUME_WEIGHT * min(row[field] / scale, 2.0)
+        return features
+
+    def _ordinal(self, levels, value):
+        return levels.index(value) / (len(levels) - 1) if value in levels else 0.5
+
+    # Neighbour table
+
+    def _nearest(self, positions):
+        """Neighbour positions and distances for the rows at ``positions``, nearest first."""
+        k = min(self.substitutes, len(self.rows) - 1)
+        if k <= 0:
+            return np.empty((len(positions), 0), dtype=np.int64), np.empty((len(positions), 0))
+        block = self.features[positions]
+        squared = (
+            (block ** 2).sum(axis=1)[:, None] + self.squared_norms[None, :] - 2 * block @ self.features.T
+        )
+        squared[np.arange(len(positions)), positions] = np.inf
+        nearest = np.argpartition(squared, k - 1, axis=1)[:, :k]
+        ordered = np.take_along_axis(squared, nearest, axis=1)
+        # Ties broken by library order so results don't depend on argpartition
+        order = np.lexsort((nearest, ordered), axis=1)
+        nearest = np.take_along_axis(nearest, order, axis=1)
+        return nearest, np.sqrt(np.maximum(np.take_along_axis(squared, nearest, axis=1), 0))
+
+    def _fill(self, positions):
+        for start in range(0, len(positions), BLOCK_ROWS):
+            chunk = positions[start:start + BLOCK_ROWS]
+            self.neighbours[chunk], self.distances[chunk] = self._nearest(chunk)
+
+    def _load(self, queryset):
+        names, columns = zip(*workout_columns())
+        rows = []
+        masks = []
+        for equipment_mask, *values in queryset.order_by('id').values_list('equipment_mask', *columns):
+            rows.append(dict(zip(names, values)))
+            masks.append(equipment_mask)
+        return rows, masks
+
+    def build(self):
+        rows, masks = self._load(ExerciseLibrary.objects.all())
+        self.rows = rows
+        self.positions = {row['id']: position for position, row in enumerate(rows)}
+        self.vocabularies = self._vocabularies(rows)
+        self.features = self._features(rows)
+        self.squared_norms = (self.features ** 2).sum(axis=1)
+        self.impacts = np.array([row['impact_level'] for row in rows], dtype=object)
+        self.equipment_masks = np.array(masks, dtype=np.int64)
+        k = min(self.substitutes, max(len(rows) - 1, 0))
+        self.neighbours = np.zeros((len(rows), k), dtype=np.int64)
+        self.distances = np.zeros((len(rows), k))
+        self._fill(np.arange(len(rows)))
+
+    def _ensure_fresh(self):
+        version = catalogue_version(EXERCISES)
+        if self._version == version:
+            return
+        with self._lock:
+            if self._version != version:
+                self.build()
+                self._version = version
+
+    # Incremental updates
+
+    def exercise_saved(self, exercise_id, previous_version):
+        """
+        Fold a saved exercise into the table. ``previous_version`` is the
+        catalogue version before the save bumped it; an index built for any
+        other version is left alone and rebuilds on its next lookup.
+        """
+        with self._lock:
+            if self._version is None or self._version != previous_version:
+                return
+            self._version = None
+            rows, masks = self._load(ExerciseLibrary.objects.filter(pk=exercise_id))
+            features = self._features(rows) if rows else None
+            if features is None:
+                # New body part or type: the feature layout changes, rebuild on the next lookup
+                return
+            position = self.positions.get(exercise_id)
+            if position is None:
+                if self.neighbours.shape[1] < self.substitutes:
+                    # Fewer exercises than SUBSTITUTES: the table widens, rebuild instead
+                    return
+                position = self._append(exercise_id, features[0])
+
+            before = self.neighbours.copy()
+            self.rows[position] = rows[0]
+            self.features[position] = features[0]
+            self.squared_norms[position] = (features[0] ** 2).sum()
+            self.impacts[position] = rows[0]['impact_level']
+            self.equipment_masks[position] = masks[0]
+
+            # Rows that listed it, or that it is now close enough to join
+            distance = np.sqrt(np.maximum(
+                self.squared_norms + self.squared_norms[position] - 2 * self.features @ features[0], 0
+            ))
+            stale = (before == position).any(axis=1)
+            if self.distances.shape[1]:
+                stale |= distance < self.distances[:, -1]
+            stale[position] = True
+            self._fill(np.flatnonzero(stale))
+            self._version = catalogue_version(EXERCISES)
+
+    def _append(self, exercise_id, features):
+        position = len(self.rows)
+        self.rows.append(None)
+        self.positions[exercise_id] = position
+        self.features = np.vstack([self.features, features])
+        self.squared_norms = np.append(self.squared_norms, 0.0)
+        self.impacts = np.append(self.impacts, None)
+        self.equipment_masks = np.append(self.equipment_masks, 0)
+        self.neighbours = np.vstack([self.neighbours, np.zeros((1, self.substitutes), dtype=np.int64)])
+        self.distances = np.vstack([self.distances, np.full((1, self.substitutes), np.inf)])
+        return position
+
+    # Lookups
+
+    def alternatives(self, exercise_id, impact_levels=None, equipment_mask=None, limit=5):
+        """
+        ``(exercise, [alternatives nearest first])`` for ``exercise_id``, or
+        None if it doesn't exist. ``impact_levels`` and ``equipment_mask``
+        (``Profile.equipment_mask``, None for no restriction) filter the
+        precomputed candidates.
+        """
+        self._ensure_fresh()
+        position = self.positions.get(exercise_id)
+        if position is None:
+            return None
+        candidates, distances = self.neighbours[position], self.distances[position]
+        keep = np.ones(len(candidates), dtype=bool)
+        if impact_levels is not None:
+            keep &= np.isin(self.impacts[candidates], impact_levels)
+        if equipment_mask is not None:
+            # Same test as equipment.fits, over the candidates at once
+            keep &= (self.equipment_masks[candidates] & ~equipment_mask) == 0
+        return self.rows[position], [
+            {**self.rows[candidate], 'distance': round(float(distance), 4)}
+            for candidate, distance in zip(candidates[keep][:limit], distances[keep][:limit])
+        ]
+
+
+substitute_index = SubstituteIndex()
@@ -0,0 +1,672 @@
+import datetime
+import json
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from cufit.catalogue import EXERCISES, bump_catalogue_version, catalogue_version
+from cufit.fast_json import ORJSONRenderer, serializer_rows
+from users.models import CustomUser, Profile
+from .equipment import fits
+from .models import Equipment, EquipmentType, ExerciseLibrary, WorkoutProgram
+from .recommender import workout_cache, workout_exercises
+from .scheduler import build_program, rest_weekdays, week_start
+from .search import use_fts
+from .substitutes import SubstituteIndex, impact_restrictions, substitute_index
+from .serializers import ExerciseSerializer
+
+
+class ExerciseQueryPlanTests(TestCase):
+    """EXPLAIN QUERY PLAN checks for the ExerciseLibrary access paths."""
+
+    def assertUsesIndex(self, queryset):
+        if connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN QUERY PLAN output is SQLite specific')
+        plan = queryset.explain()
+        table_scans = [
+            line for line in plan.splitlines()
+            if 'SCAN workout_exerciselibrary' in line and 'INDEX' not in line
+        ]
+        self.assertFalse(table_scans, f'Full table scan in query plan:\n{plan}')
+
+    def test_get_exercises_pages(self):
+        # workout.views.get_exercises, one page in (name, id) order
+        for filters in [{}, {'impact_level': 'Low'}, {'impact_level__in': ['Low', 'Medium']}]:
+            with self.subTest(filters=filters):
+                self.assertUsesIndex(ExerciseLibrary.objects.filter(**filters).order_by('name', 'id')[:100])
+
+    def test_user_workout_tiers(self):
+        # workout.recommender.workout_exercises, exact and difficulty-only tiers
+        self.assertUsesIndex(
+            ExerciseLibrary.objects.filter(difficulty='Intermediate', impact_level__in=['Low', 'Medium'])
+            .order_by('impact_level', 'body_part')
+        )
+        self.assertUsesIndex(ExerciseLibrary.objects.filter(difficulty='Intermediate'))
+
+
+class ExerciseCatalogueETagTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('lifter', 'lifter@example.com', 'secret')
+        ExerciseLibrary.objects.create(name='Squat', impact_level='Medium')
+        ExerciseLibrary.objects.create(name='Walk', impact_level='Low')
+
+    def setUp(self):
+        bump_catalogue_version(EXERCISES)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_unchanged_catalogue_is_not_modified(self):
+        response = self.client.get('/workout/api/exercises/')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/workout/api/exercises/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        # Filters and endpoints get their own tags
+        filtered = self.client.get('/workout/api/exercises/', {'pain_and_injury': 'knee'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(filtered.status_code, 200)
+        self.assertEqual(len(filtered.data['exercises']), 2)
+        self.assertNotEqual(filtered['ETag'], etag)
+        master = self.client.get('/workout/api/master-workouts/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(master.status_code, 200)
+
+    def test_writes_change_the_etag(self):
+        etag = self.client.get('/workout/api/exercises/')['ETag']
+        ExerciseLibrary.objects.filter(name='Walk').delete()
+
+        response = self.client.get('/workout/api/exercises/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([exercise['name'] for exercise in response.data['exercises']], ['Squat'])
+
+    def test_fast_path_matches_model_serializer(self):
+        exercises = ExerciseLibrary.objects.order_by('pk')
+        expected = JSONRenderer().render(ExerciseSerializer(exercises, many=True).data)
+        fast = ORJSONRenderer().render(serializer_rows(exercises, ExerciseSerializer))
+        self.assertEqual(json.loads(fast), json.loads(expected))
+
+
+class UserWorkoutTests(TestCase):
+    """The personalized list is one query after the profile lookup, whichever tier it falls back to."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('runner', 'runner@example.com', 'secret')
+        cls.profile = Profile.objects.create(user=cls.user, activity_level='moderate')
+        ExerciseLibrary.objects.create(name='Plank', body_part='Core', difficulty='Intermediate', impact_level='Low')
+        ExerciseLibrary.objects.create(
+            name='Lunge', body_part='Legs', difficulty='Intermediate', impact_level='Medium',
+            description='', instructions='', duration=0, sets=0, reps=0,
+        )
+        ExerciseLibrary.objects.create(name='Box Jump', body_part='Legs', difficulty='Intermediate', impact_level='High')
+        ExerciseLibrary.objects.create(name='Sprint', body_part='Legs', difficulty='Advanced', impact_level='High')
+
+    def setUp(self):
+        # Start every test with cold caches
+        bump_catalogue_version(EXERCISES)
+        workout_cache.invalidate()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_workout(self, activity_level, queries=2):
+        Profile.objects.filter(pk=self.profile.pk).update(activity_level=activity_level)
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get('/workout/api/user-workout/')
+        self.assertEqual(response.status_code, 200)
+        # Profile + exercises, or just the profile once the list is cached
+        self.assertEqual(len(captured), queries, [query['sql'] for query in captured])
+        return response.data
+
+    def test_exact_tier_with_sql_defaults(self):
+        data = self.get_workout('moderate')
+        self.assertEqual([exercise['name'] for exercise in data['exercises']], ['Plank', 'Lunge'])
+        self.assertEqual(data['filters_applied']['total_exercises_found'], 2)
+
+        lunge = data['exercises'][1]
+        self.assertEqual(lunge['description'], 'Exercise targeting Legs')
+        self.assertEqual(lunge['instructions'], 'Perform the exercise with proper form targeting Legs')
+        self.assertEqual((lunge['duration'], lunge['sets'], lunge['reps']), (10, 3, 10))
+        self.assertIsNone(lunge['video_link'])
+        self.assertEqual(list(lunge), [
+            'id', 'name', 'body_part', 'difficulty', 'impact_level', 'description',
+            'duration', 'sets', 'reps', 'video_link', 'exercise_type', 'instructions',
+        ])
+
+    def test_falls_back_to_difficulty_then_everything(self):
+        # Beginner has no exercises at all; Advanced has no Medium impact ones
+        self.assertEqual(
+            [exercise['name'] for exercise in self.get_workout('extra')['exercises']], ['Sprint']
+        )
+        ExerciseLibrary.objects.filter(name='Sprint').update(impact_level='Low')
+        bump_catalogue_version(EXERCISES)  # update() sends no signals
+        self.assertEqual(
+            [exercise['name'] for exercise in self.get_workout('athlete')['exercises']], ['Sprint']
+        )
+        self.assertEqual(
+            [exercise['name'] for exercise in self.get_workout('sedentary')['exercises']],
+            ['Sprint', 'Box Jump', 'Plank', 'Lunge'],
+        )
+
+    def test_lists_are_cached_per_activity_mapping(self):
+        before = workout_cache.stats()
+        first = self.get_workout('moderate')
+        self.assertEqual(self.get_workout('moderate', queries=1), first)
+        # 'light' maps to another pair; 'unknown' falls back to the same pair as 'moderate'
+        self.get_workout('light')
+        self.assertEqual(self.get_workout('unknown', queries=1)['exercises'], first['exercises'])
+
+        # Another worker's local LRU is empty but the shared cache has the list
+        workout_cache.invalidate()
+        self.get_workout('moderate', queries=1)
+
+        stats = workout_cache.stats()
+        self.assertEqual(stats['misses'] - before['misses'], 2)
+        self.assertEqual(stats['local_hits'] - before['local_hits'], 2)
+        self.assertEqual(stats['shared_hits'] - before['shared_hits'], 1)
+
+    def test_library_writes_invalidate(self):
+        self.get_workout('moderate')
+        ExerciseLibrary.objects.create(name='Bird Dog', body_part='Core', difficulty='Intermediate', impact_level='Low')
+        names = [exercise['name'] for exercise in self.get_workout('moderate')['exercises']]
+        self.assertIn('Bird Dog', names)
+
+        ExerciseLibrary.objects.filter(name='Bird Dog').delete()
+        names = [exercise['name'] for exercise in self.get_workout('moderate')['exercises']]
+        self.assertNotIn('Bird Dog', names)
+
+    def test_stats_endpoint_is_admin_only(self):
+        self.assertEqual(self.client.get('/workout/api/workout-cache-stats/').status_code, 403)
+        admin = CustomUser.objects.create_user('coach', 'coach@example.com', 'secret', is_staff=True)
+        self.client.force_authenticate(admin)
+        response = self.client.get('/workout/api/workout-cache-stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('hit_rate', response.data)
+
+    def test_pages_through_the_cached_list(self):
+        for index in range(5):
+            ExerciseLibrary.objects.create(
+                name=f'Crunch {index}', body_part='Core', difficulty='Intermediate', impact_level='Low'
+            )
+        expected = [exercise['id'] for exercise in workout_exercises('Intermediate', ['Low', 'Medium'])]
+        self.get_workout('moderate')
+
+        seen = []
+        response = self.client.get('/workout/api/user-workout/', {'limit': 3})
+        while True:
+            self.assertEqual(response.data['count'], 7)
+            self.assertEqual(response.data['filters_applied']['total_exercises_found'], 7)
+            seen += [exercise['id'] for exercise in response.data['exercises']]
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(seen, expected)
+
+
+class ExercisePaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('browser', 'browser@example.com', 'secret')
+        ExerciseLibrary.objects.bulk_create(
+            ExerciseLibrary(name=f'Exercise {index:03}', impact_level=['Low', 'Medium', 'High'][index % 3])
+            for index in range(250)
+        )
+
+    def setUp(self):
+        bump_catalogue_version(EXERCISES)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_get_exercises_is_paginated(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/workout/api/exercises/')
+        self.assertEqual(response.data['count'], 250)
+        self.assertEqual(len(response.data['exercises']), 100)
+        self.assertIsNone(response.data['previous'])
+
+        names = []
+        url = '/workout/api/exercises/'
+        while url:
+            response = self.client.get(url)
+            names += [exercise['name'] for exercise in response.data['exercises']]
+            url = response.data['next']
+        self.assertEqual(names, [f'Exercise {index:03}' for index in range(250)])
+
+        # limit is capped at max_limit (500), which covers the whole library here
+        response = self.client.get('/workout/api/exercises/', {'limit': 10000})
+        self.assertEqual(len(response.data['exercises']), 250)
+
+    def test_filtered_pages(self):
+        response = self.client.get('/workout/api/exercises/', {'pain_and_injury': ['knee', 'back'], 'limit': 5, 'offset': 5})
+        self.assertEqual(response.data['count'], 84)
+        self.assertEqual(
+            [exercise['name'] for exercise in response.data['exercises']],
+            [f'Exercise {index:03}' for index in range(15, 30, 3)],
+        )
+        self.assertTrue(all(exercise['impact_level'] == 'Low' for exercise in response.data['exercises']))
+
+
+class EquipmentTests(TestCase):
+    """Exercises are matched to owned equipment with one mask check, in SQL or in memory."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('homegym', 'homegym@example.com', 'secret')
+        cls.profile = Profile.objects.create(user=cls.user, activity_level='moderate')
+        cls.types = {equipment_type.slug: equipment_type for equipment_type in EquipmentType.objects.all()}
+        for name, slugs in [('Push-ups', []), ('Hammer Curls', ['dumbbells']), ('Deadlifts', ['barbell']),
+                            ('Renegade Rows', ['dumbbells', 'yoga-mat'])]:
+            exercise = ExerciseLibrary.objects.create(name=name, difficulty='Intermediate', impact_level='Low')
+            exercise.required_equipment.set([cls.types[slug] for slug in slugs])
+
+    def setUp(self):
+        bump_catalogue_version(EXERCISES)
+        workout_cache.invalidate()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_requirement_changes_keep_the_mask_in_sync(self):
+        rows = ExerciseLibrary.objects.get(name='Renegade Rows')
+        self.assertEqual(rows.equipment_mask, self.types['dumbbells'].mask | self.types['yoga-mat'].mask)
+
+        rows.required_equipment.remove(self.types['yoga-mat'])
+        rows.refresh_from_db()
+        self.assertEqual(rows.equipment_mask, self.types['dumbbells'].mask)
+
+        self.types['dumbbells'].exercises.clear()
+        self.assertEqual(ExerciseLibrary.objects.filter(equipment_mask=0).count(), 3)
+
+    def test_fits(self):
+        dumbbells, barbell = self.types['dumbbells'].mask, self.types['barbell'].mask
+        self.assertTrue(fits(0, 0))
+        self.assertTrue(fits(dumbbells, dumbbells | barbell))
+        self.assertFalse(fits(dumbbells | barbell, dumbbells))
+        self.assertTrue(fits(barbell, None))
+
+    def workout_names(self):
+        with self.assertNumQueries(2):
+            response = self.client.get('/workout/api/user-workout/')
+        return sorted(exercise['name'] for exercise in response.data['exercises'])
+
+    def test_user_workout_follows_saved_equipment(self):
+        self.assertEqual(self.workout_names(), ['Deadlifts', 'Hammer Curls', 'Push-ups', 'Renegade Rows'])
+
+        self.client.post('/workout/api/save-equipment/', {'workout_equipment': 'dumbbells, kettlebell'}, format='json')
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.equipment_mask, self.types['dumbbells'].mask | self.types['kettlebell'].mask)
+        self.assertEqual(
+            dict(Equipment.objects.filter(user=self.user).values_list('equipment_name', 'equipment_type__slug')),
+            {'dumbbells': 'dumbbells', 'kettlebell': 'kettlebell'},
+        )
+        self.assertEqual(self.workout_names(), ['Hammer Curls', 'Push-ups'])
+
+        self.client.post('/workout/api/save-equipment/', {'workout_equipment': 'none'}, format='json')
+        self.assertEqual(self.workout_names(), ['Push-ups'])
+
+    def test_get_exercises_equipment_filter(self):
+        response = self.client.get('/workout/api/exercises/', {'equipment': 'dumbbells,yoga-mat'})
+        self.assertEqual(
+            sorted(exercise['name'] for exercise in response.data['exercises']),
+            ['Hammer Curls', 'Push-ups', 'Renegade Rows'],
+        )
+        response = self.client.get('/workout/api/exercises/', {'equipment': 'none'})
+        self.assertEqual([exercise['name'] for exercise in response.data['exercises']], ['Push-ups'])
+
+
+class SaveEquipmentTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('partner', 'partner@example.com', 'secret')
+        cls.admin = CustomUser.objects.create_user('gym', 'gym@example.com', 'secret', is_staff=True)
+        cls.members = [
+            CustomUser.objects.create_user(f'member{index}', f'member{index}@example.com', 'secret')
+            for index in range(3)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def owned(self, user):
+        return set(Equipment.objects.filter(user=user).values_list('equipment_name', flat=True))
+
+    def test_diff_is_applied_with_bulk_statements(self):
+        self.client.post('/workout/api/save-equipment/', {'workout_equipment': 'dumbbells,barbell,yoga-mat'}, format='json')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                '/workout/api/save-equipment/', {'workout_equipment': 'dumbbells, kettlebell, kettlebell'}, format='json'
+            )
+        self.assertEqual(response.data['added'], ['kettlebell'])
+        self.assertEqual(response.data['removed'], ['barbell', 'yoga-mat'])
+        self.assertEqual(self.owned(self.user), {'dumbbells', 'kettlebell'})
+
+        statements = [query['sql'].split()[0] for query in queries]
+        self.assertEqual(statements.count('DELETE'), 1)
+        self.assertEqual(statements.count('INSERT'), 1)
+
+    def test_picker_ids_get_their_bits(self):
+        # The ids WorkoutEquipment.jsx sends
+        response = self.client.post(
+            '/workout/api/save-equipment/', {'workout_equipment': ['dumbbells', 'yoga_mat', 'resistance_bands']}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self.owned(self.user), {'dumbbells', 'yoga-mat', 'resistance-bands'})
+        expected = sum(EquipmentType.objects.get(slug=slug).mask for slug in ['dumbbells', 'yoga-mat', 'resistance-bands'])
+        self.assertEqual(Profile.objects.get(user=self.user).equipment_mask, expected)
+
+        # Same selection spelled either way is no change
+        response = self.client.post(
+            '/workout/api/save-equipment/', {'workout_equipment': 'Dumbbells, yoga-mat, Resistance_Bands'}, format='json'
+        )
+        self.assertEqual((response.data['added'], response.data['removed']), ([], []))
+
+    def test_unknown_equipment_is_rejected(self):
+        self.client.post('/workout/api/save-equipment/', {'workout_equipment': 'dumbbells'}, format='json')
+        response = self.client.post('/workout/api/save-equipment/', {'workout_equipment': 'dumbbells,hoverboard'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('hoverboard', response.data['error'])
+        self.assertEqual(self.owned(self.user), {'dumbbells'})
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.post('/workout/api/save-equipment/bulk/', {'users': [
+            {'user_id': self.members[0].pk, 'workout_equipment': 'barbell'},
+            {'user_id': self.members[1].pk, 'workout_equipment': 'hoverboard'},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Equipment.objects.filter(user__in=self.members).exists())
+        self.assertEqual(self.client.get('/workout/api/exercises/?equipment=hoverboard').status_code, 400)
+
+    def test_duplicate_submissions_do_not_pile_up(self):
+        for _ in range(3):
+            self.client.post('/workout/api/save-equipment/', {'workout_equipment': 'dumbbells'}, format='json')
+        # A racing request that read before the first insert still can't duplicate rows
+        Equipment.objects.bulk_create([Equipment(user=self.user, equipment_name='dumbbells')], ignore_conflicts=True)
+        self.assertEqual(Equipment.objects.filter(user=self.user).count(), 1)
+
+    def test_bulk_endpoint(self):
+        payload = {'users': [
+            {'user_id': self.members[0].pk, 'workout_equipment': 'dumbbells,barbell'},
+            {'user_id': self.members[1].pk, 'workout_equipment': ['jump-rope']},
+            {'user_id': self.members[2].pk, 'workout_equipment': 'none'},
+        ]}
+        self.assertEqual(self.client.post('/workout/api/save-equipment/bulk/', payload, format='json').status_code, 403)
+
+        self.client.force_authenticate(self.admin)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/workout/api/save-equipment/bulk/', payload, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual([entry['added'] for entry in response.data['users']], [['barbell', 'dumbbells'], ['jump-rope'], ['none']])
+        self.assertEqual(self.owned(self.members[0]), {'dumbbells', 'barbell'})
+        self.assertEqual(Profile.objects.get(user=self.members[2]).equipment_mask, 0)
+        # One insert for every user's rows, no per-user statements
+        self.assertEqual([query['sql'].split()[0] for query in queries].count('INSERT'), 2)  # rows + missing profiles
+
+        response = self.client.post('/workout/api/save-equipment/bulk/', {'users': [{'user_id': 999999}]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.post('/workout/api/save-equipment/bulk/', {'users': 'x'}, format='json').status_code, 400)
+
+
+class UserProgramTests(TestCase):
+    """Weekly programs are built from one candidate fetch and served from storage afterwards."""
+
+    MONDAY = datetime.date(2026, 3, 2)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('lifter', 'lifter@example.com', 'secret')
+        cls.profile = Profile.objects.create(user=cls.user, activity_level='moderate', rest_days='2026-03-04,2026-03-08')
+        ExerciseLibrary.objects.bulk_create(
+            ExerciseLibrary(
+                name=f'{part} {index}', body_part=part, difficulty='Intermediate', impact_level='Low', sets=3, reps=10,
+            )
+            for part, count in [('Legs', 6), ('Core', 4), ('Back', 3)]
+            for index in range(count)
+        )
+
+    def setUp(self):
+        bump_catalogue_version(EXERCISES)
+        workout_cache.invalidate()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_program(self, start=MONDAY):
+        response = self.client.get('/workout/api/user-program/', {'start': start.isoformat()})
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_rest_days(self):
+        self.assertEqual(rest_weekdays('2026-03-04,2026-03-08,2026-04-01', self.MONDAY), 0b1000100)
+        self.assertEqual(rest_weekdays('Saturday, sun', self.MONDAY), 0b1100000)
+        # Saved by the old picker as Date.toString()
+        legacy = 'Wed Mar 26 2025 00:00:00 GMT-0400 (Eastern Daylight Time),Sat Mar 29 2025 00:00:00 GMT-0400 (Eastern Daylight Time)'
+        self.assertEqual(rest_weekdays(legacy, self.MONDAY), 0b0100100)
+        # Nothing in this week: Sunday off
+        self.assertEqual(rest_weekdays('', self.MONDAY), 0b1000000)
+
+        days = self.get_program()['days']
+        self.assertEqual([day['weekday'] for day in days if day['rest']], ['Wednesday', 'Sunday'])
+        for day in days:
+            self.assertEqual(len(day['exercises']), 0 if day['rest'] else 5)
+            self.assertEqual(len({exercise['id'] for exercise in day['exercises']}), len(day['exercises']))
+
+    def test_body_parts_are_balanced(self):
+        candidates = list(ExerciseLibrary.objects.values('id', 'body_part', 'difficulty', 'sets', 'reps'))
+        program = build_program(candidates, self.MONDAY, rest_weekdays('', self.MONDAY), seed=1)
+        counts = {}
+        for exercises in program.values():
+            for exercise in exercises:
+                counts[exercise['body_part']] = counts.get(exercise['body_part'], 0) + 1
+        self.assertEqual(sum(counts.values()), 30)
+        self.assertLessEqual(max(counts.values()) - min(counts.values()), 1)
+
+    def test_progression(self):
+        first = self.get_program()
+        second = self.get_program(self.MONDAY + datetime.timedelta(days=7))
+        self.assertEqual((first['level'], second['level']), (0, 1))
+        exercise = next(exercise for day in first['days'] for exercise in day['exercises'])
+        self.assertEqual((exercise['sets'], exercise['reps']), (3, 10))
+        exercise = next(exercise for day in second['days'] for exercise in day['exercises'])
+        # Intermediate: +2 reps a week, +1 set every 3 weeks
+        self.assertEqual((exercise['sets'], exercise['reps']), (3, 12))
+
+    def test_one_candidate_fetch_then_served_from_storage(self):
+        with CaptureQueriesContext(connection) as captured:
+            first = self.get_program(self.MONDAY + datetime.timedelta(days=3))
+        selects = [query['sql'] for query in captured if query['sql'].startswith('SELECT')]
+        self.assertEqual(sum('workout_exerciselibrary' in sql and 'workout_programexercise' not in sql for sql in selects), 1)
+        self.assertEqual(first['week_start'], self.MONDAY)
+
+        with CaptureQueriesContext(connection) as captured:
+            second = self.get_program()
+        # Profile, program, its exercises
+        self.assertEqual(len(captured), 3, [query['sql'] for query in captured])
+        self.assertEqual(
+            [[exercise['id'] for exercise in day['exercises']] for day in second['days']],
+            [[exercise['id'] for exercise in day['exercises']] for day in first['days']],
+        )
+
+    def test_profile_change_rebuilds_current_weeks(self):
+        this_week = week_start(datetime.date.today())
+        WorkoutProgram.objects.create(user=self.user, week_start=this_week - datetime.timedelta(days=7), rest_weekdays=1, level=0)
+        self.get_program(this_week)
+        self.client.post('/update-profile/', {'rest_days': 'monday'}, format='json')
+        self.assertEqual(list(WorkoutProgram.objects.filter(user=self.user).values_list('week_start', flat=True)),
+                         [this_week - datetime.timedelta(days=7)])
+        days = self.get_program(this_week)['days']
+        self.assertEqual([day['weekday'] for day in days if day['rest']], ['Monday'])
+
+    def test_bad_start(self):
+        response = self.client.get('/workout/api/user-program/', {'start': 'soon'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ExerciseSearchTests(TestCase):
+    """Ranked prefix search over name, body part, description and instructions."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('seeker', 'seeker@example.com', 'secret')
+        ExerciseLibrary.objects.bulk_create([
+            ExerciseLibrary(name='Romanian Deadlift', body_part='Legs', difficulty='Intermediate', impact_level='Medium',
+                            description='Hinge at the hips to load the hamstrings', instructions='Keep the bar close'),
+            ExerciseLibrary(name='Hamstring Curl', body_part='Legs', difficulty='Beginner', impact_level='Low',
+                            description='Machine curl', instructions='Curl the pad towards you'),
+            ExerciseLibrary(name='Kettlebell Swings', body_part='Legs', difficulty='Intermediate', impact_level='High',
+                            description='Explosive hinge', instructions='Drive the kettlebell with the hips'),
+            ExerciseLibrary(name='Plank', body_part='Core', difficulty='Beginner', impact_level='Low',
+                            description='Hold a straight line', instructions='Brace the core'),
+        ])
+
+    def setUp(self):
+        bump_catalogue_version(EXERCISES)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def search(self, **params):
+        response = self.client.get('/workout/api/exercises/search/', params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return json.loads(response.content)
+
+    def names(self, **params):
+        return [exercise['name'] for exercise in self.search(**params)['exercises']]
+
+    def test_ranking_and_prefixes(self):
+        for engine in ['fts5', 'like']:
+            with self.subTest(engine=engine), override_settings(EXERCISE_SEARCH=engine):
+                self.assertEqual(use_fts(), engine == 'fts5')
+                # Name hit first, then the description mention
+                self.assertEqual(self.names(q='hamstring'), ['Hamstring Curl', 'Romanian Deadlift'])
+                self.assertEqual(self.names(q='kettle'), ['Kettlebell Swings'])
+                self.assertEqual(sorted(self.names(q='HINGE hip')), ['Kettlebell Swings', 'Romanian Deadlift'])
+                self.assertEqual(self.names(q='hinge core'), [])
+
+    def test_filters_and_facets(self):
+        for engine in ['fts5', 'like']:
+            with self.subTest(engine=engine), override_settings(EXERCISE_SEARCH=engine):
+                data = self.search(q='ham', difficulty='beginner')
+                self.assertEqual([exercise['name'] for exercise in data['exercises']], ['Hamstring Curl'])
+                self.assertEqual(data['count'], 1)
+                # A facet ignores its own filter so the other choices stay visible
+                self.assertEqual(data['facets']['difficulty'], [
+                    {'value': 'Beginner', 'count': 1}, {'value': 'Intermediate', 'count': 1},
+                ])
+                self.assertEqual(data['facets']['impact_level'], [{'value': 'Low', 'count': 1}])
+                self.assertEqual(data['facets']['body_part'], [{'value': 'Legs', 'count': 1}])
+
+                data = self.search(q='legs', limit=1, offset=1)
+                self.assertEqual(data['count'], 3)
+                self.assertEqual(len(data['exercises']), 1)
+                self.assertIsNotNone(data['next'])
+
+    def test_index_follows_the_library(self):
+        self.assertTrue(use_fts())
+        ExerciseLibrary.objects.filter(name='Plank').update(instructions='Squeeze the hamstrings too')
+        self.assertEqual(self.names(q='hamstrings'), ['Romanian Deadlift', 'Plank'])
+        ExerciseLibrary.objects.filter(name='Romanian Deadlift').delete()
+        ExerciseLibrary.objects.create(name='Nordic Hamstring Curl', body_part='Legs', difficulty='Advanced')
+        bump_catalogue_version(EXERCISES)
+        self.assertEqual(sorted(self.names(q='hamstring')), ['Hamstring Curl', 'Nordic Hamstring Curl', 'Plank'])
+
+    def test_query_count(self):
+        with CaptureQueriesContext(connection) as captured:
+            self.search(q='curl')
+        # Facet counts, ranked page, page rows
+        self.assertEqual(len(captured), 3, [query['sql'] for query in captured])
+
+    def test_bad_query(self):
+        response = self.client.get('/workout/api/exercises/search/', {'q': '  "*" '})
+        self.assertEqual(response.status_code, 400)
+
+
+class ExerciseAlternativesTests(TestCase):
+    """Swaps come from the precomputed neighbour table, filtered per user."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('swapper', 'swapper@example.com', 'secret')
+        cls.profile = Profile.objects.create(user=cls.user, activity_level='moderate')
+        ExerciseLibrary.objects.bulk_create([
+            ExerciseLibrary(name='Squat', body_part='Legs', difficulty='Intermediate', impact_level='Medium'),
+            ExerciseLibrary(name='Lunge', body_part='Legs', difficulty='Intermediate', impact_level='Medium', reps=12),
+            ExerciseLibrary(name='Box Jump', body_part='Legs', difficulty='Intermediate', impact_level='High'),
+            ExerciseLibrary(name='Wall Sit', body_part='Legs', difficulty='Beginner', impact_level='Low', sets=0, reps=0),
+            ExerciseLibrary(name='Back Squat', body_part='Legs', difficulty='Advanced', impact_level='Medium', equipment_mask=2),
+            ExerciseLibrary(name='Plank', body_part='Core', difficulty='Intermediate', impact_level='Medium'),
+            ExerciseLibrary(name='Push-up', body_part='Chest', difficulty='Intermediate', impact_level='Medium'),
+        ])
+        cls.ids = dict(ExerciseLibrary.objects.values_list('name', 'id'))
+
+    def setUp(self):
+        bump_catalogue_version(EXERCISES)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def alternatives(self, name, queries=None, **params):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(f'/workout/api/exercises/{self.ids[name]}/alternatives/', params)
+        self.assertEqual(response.status_code, 200, response.data)
+        if queries is not None:
+            self.assertEqual(len(captured), queries, [query['sql'] for query in captured])
+        return [exercise['name'] for exercise in response.data['alternatives']]
+
+    def test_same_body_part_first(self):
+        names = self.alternatives('Squat', limit=10)
+        self.assertEqual(names[0], 'Lunge')
+        self.assertEqual(set(names[:4]), {'Lunge', 'Box Jump', 'Wall Sit', 'Back Squat'})
+        self.assertEqual(len(names), 6)
+        self.assertEqual(self.alternatives('Squat', limit=2), names[:2])
+
+    def test_user_restrictions(self):
+        self.assertIsNone(impact_restrictions('None, Pain Level: 0'))
+        self.assertEqual(impact_restrictions('Knees, None, Pain Level: 4'), ['Low', 'Medium'])
+        self.assertEqual(impact_restrictions("['Knees', 'Back']"), ['Low'])
+
+        Profile.objects.filter(pk=self.profile.pk).update(pain_and_injury='Knees, None, Pain Level: 4', equipment_mask=0)
+        names = self.alternatives('Squat', limit=10)
+        self.assertNotIn('Box Jump', names)
+        self.assertNotIn('Back Squat', names)
+        self.assertIn('Lunge', names)
+
+        Profile.objects.filter(pk=self.profile.pk).update(pain_and_injury='Knees, Back')
+        self.assertEqual(self.alternatives('Squat', limit=10), ['Wall Sit'])
+
+    def test_lookup_is_one_query_once_built(self):
+        self.alternatives('Squat')
+        # Just the profile
+        self.alternatives('Plank', queries=1)
+        response = self.client.get('/workout/api/exercises/999999/alternatives/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_save_updates_the_table_in_place(self):
+        self.alternatives('Squat')
+        plank = ExerciseLibrary.objects.get(name='Plank')
+        plank.body_part, plank.impact_level = 'Legs', 'Low'
+        plank.save()
+        # The save was folded in: no rebuild on the next lookup
+        self.assertIn('Plank', self.alternatives('Wall Sit', queries=1, limit=10)[:5])
+
+        fresh = SubstituteIndex()
+        fresh.build()
+        self.assertEqual(fresh.neighbours.tolist(), substitute_index.neighbours.tolist())
+
+    def test_new_exercise_is_appended(self):
+        index = SubstituteIndex(substitutes=3)
+        index.alternatives(self.ids['Squat'])
+        previous = catalogue_version(EXERCISES)
+        split_squat = ExerciseLibrary.objects.create(name='Split Squat', body_part='Legs', difficulty='Intermediate', impact_level='Medium')
+        index.exercise_saved(split_squat.pk, previous)
+        self.assertEqual(index._version, catalogue_version(EXERCISES))
+
+        fresh = SubstituteIndex(substitutes=3)
+        fresh.build()
+        self.assertEqual(fresh.neighbours.tolist(), index.neighbours.tolist())
+        _, alternatives = index.alternatives(split_squat.pk)
+        self.assertEqual(alternatives[0]['name'], 'Squat')
@@ -3,10 +3,15 @@ from . import views
 
 urlpatterns = [
     path('api/exercises/', views.get_exercises, name='get_exercises'),
+    path('api/exercises/search/', views.search_exercise_library, name='search_exercises'),
+    path('api/exercises/<int:exercise_id>/alternatives/', views.get_exercise_alternatives, name='get_exercise_alternatives'),
     path('api/master-workouts/', views.get_master_workouts, name='get_master_workouts'),
     path('api/update-exercise-routine/', views.update_exercise_routine, name='update_exercise_routine'),
     path('api/save-equipment/', views.save_equipment, name='save_equipment'),
+    path('api/save-equipment/bulk/', views.save_equipment_bulk, name='save_equipment_bulk'),
     path('api/user-workout/', views.get_user_workout, name='get_user_workout'),
+    path('api/user-program/', views.get_user_program, name='get_user_program'),
+    path('api/workout-cache-stats/', views.get_workout_cache_stats, name='get_workout_cache_stats'),
     path('get-profile/', views.get_user_profile, name='get_user_profile'),
     path('api/update-stretching/', views.update_stretching_preference, name='update_stretching_preference'),
 ]
@@ -1,15 +1,47 @@
-from .models import ExerciseLibrary, MasterWorkout, Equipment, WorkoutExercise
+import datetime
+
+from .models import ExerciseLibrary, MasterWorkout, WorkoutExercise, User
 from users.models import Profile
 from .serializers import ExerciseSerializer, MasterWorkoutSerializer
 
 from rest_framework.response import Response
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
-
-
-# GET API to fetch exercise database
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.renderers import BrowsableAPIRenderer
+
+from cufit.catalogue import EXERCISES, conditional_catalogue
+from cufit.fast_json import ORJSONRenderer, serializer_fields, serializer_rows
+from .equipment import apply_equipment, doable, owned_mask, parse_selection
+from .recommender import ACTIVITY_MAPPING, DEFAULT_EXERCISE_FILTERS, workout_cache
+from .scheduler import invalidate_stored_programs, week_program
+from .search import FACETS, search_exercises, search_terms
+from .substitutes import SUBSTITUTES, impact_restrictions, substitute_index
+
+
+class ExercisePagination(LimitOffsetPagination):
+    # Large enough that the current library still fits on one page
+    default_limit = 100
+    max_limit = 500
+
+
+def paginate_exercises(request, exercises):
+    """Return one page of ``exercises`` (a queryset or list) and its count/next/previous links."""
+    paginator = ExercisePagination()
+    page = paginator.paginate_queryset(exercises, request)
+    return page, {
+        'count': paginator.count,
+        'next': paginator.get_next_link(),
+        'previous': paginator.get_previous_link(),
+    }
+
+
+# GET API to fetch exercise database, ?limit=&offset= paginated.
+# ?equipment=dumbbells,barbell keeps what that equipment covers (?equipment=none: bodyweight only)
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@renderer_classes([ORJSONRenderer, BrowsableAPIRenderer])
+@conditional_catalogue(EXERCISES)
 def get_exercises(request):
     pain_and_injury = request.query_params.getlist('pain_and_injury', [])
 
@@ -20,18 +52,97 @@ def get_exercises(request):
     else:
         exercises = ExerciseLibrary.objects.all()
 
-    serializer = ExerciseSerializer(exercises, many=True)
-    return Response({"exercises": serializer.data})
+    equipment = [
+        slug.strip() for value in request.query_params.getlist('equipment') for slug in value.split(',') if slug.strip()
+    ]
+    if equipment:
+        try:
+            exercises = doable(exercises, owned_mask(equipment))
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
 
+    # Stable order for offsets; rows straight from values(), no model instances
+    exercises = exercises.order_by('name', 'id').values(*serializer_fields(ExerciseSerializer))
+    page, links = paginate_exercises(request, exercises)
+    return Response({"exercises": page, **links})
+
+
+# GET API for exercise search: ?q=kettle ham, ranked, every word a prefix;
+# ?difficulty=&impact_level=&body_part= narrow it, facets give the counts
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@renderer_classes([ORJSONRenderer, BrowsableAPIRenderer])
+@conditional_catalogue(EXERCISES)
+def search_exercise_library(request):
+    query = request.query_params.get('q', '')
+    if not search_terms(query):
+        return Response({"error": "q must contain at least one word"}, status=400)
+
+    paginator = ExercisePagination()
+    limit, offset = paginator.get_limit(request), paginator.get_offset(request)
+    filters = {facet: request.query_params.get(facet) for facet in FACETS}
+    exercises, count, facets = search_exercises(
+        query, filters, limit=limit, offset=offset, fields=serializer_fields(ExerciseSerializer)
+    )
+
+    # Links from the paginator, without handing it a list of every match
+    paginator.request, paginator.limit, paginator.offset, paginator.count = request, limit, offset, count
+    return Response({
+        "exercises": exercises,
+        "count": count,
+        "next": paginator.get_next_link(),
+        "previous": paginator.get_previous_link(),
+        "facets": facets,
+    })
+
+# GET API for "swap this exercise": precomputed nearest exercises, minus what the
+# user's pain/injury answers or equipment rule out. ?limit= up to SUBSTITUTES
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_exercise_alternatives(request, exercise_id):
+    try:
+        limit = min(max(int(request.query_params.get('limit', 5)), 1), SUBSTITUTES)
+    except ValueError:
+        return Response({'error': 'limit must be an integer'}, status=400)
+
+    try:
+        user_profile = Profile.objects.get(user=request.user)
+        impact_levels = impact_restrictions(user_profile.pain_and_injury)
+
+        found = substitute_index.alternatives(exercise_id, impact_levels, user_profile.equipment_mask, limit)
+        if found is None:
+            return Response({'error': 'Exercise not found'}, status=404)
+        exercise, alternatives = found
+
+        return Response({
+            'exercise': exercise,
+            'alternatives': alternatives,
+            'filters_applied': {
+                'impact_levels': impact_levels,
+                'equipment_mask': user_profile.equipment_mask,
+            }
+        })
+
+    except Profile.DoesNotExist:
+        return Response(
+            {'error': 'User profile not found. Please complete your profile first.'},
+            status=404
+        )
+    except Exception as e:
+        return Response(
+            {'error': str(e)},
+            status=500
+        )
 
 
 # GET API for master workout page
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@renderer_classes([ORJSONRenderer, BrowsableAPIRenderer])
+@conditional_catalogue(EXERCISES)
 def get_master_workouts(request):
     workouts = ExerciseLibrary.objects.all()
-    serializer = ExerciseSerializer(workouts, many=True)
-    return Response({"workout_master": serializer.data})
+    return Response({"workout_master": serializer_rows(workouts, ExerciseSerializer)})
 
 
 
@@ -60,31 +171,53 @@ def update_exercise_routine(request):
 def save_equipment(request):
     try:
         user = request.user
-        selected_equipment_str = request.data.get("workout_equipment", "")
-        selected_equipment = [item.strip() for item in selected_equipment_str.split(",") if item.strip()]
+        selected_equipment = parse_selection(request.data.get("workout_equipment", ""))
+        to_add, to_remove = apply_equipment({user.pk: selected_equipment})[user.pk]
+        if to_add or to_remove:
+            invalidate_stored_programs([user.pk])
 
-        new_equipment_set = set(selected_equipment)
-        existing_equipment_qs = Equipment.objects.filter(user=user)
-        existing_equipment_set = set(existing_equipment_qs.values_list('equipment_name', flat=True))
-
-        to_add = new_equipment_set - existing_equipment_set
-        to_remove = existing_equipment_set - new_equipment_set
+        return Response({
+            "message": "Equipment selection updated successfully!",
+            "added": to_add,
+            "removed": to_remove
+        }, status=200)
 
-        if to_remove:
-            Equipment.objects.filter(user=user, equipment_name__in=to_remove).delete()
+    except Exception as e:
+        return Response({"error": str(e)}, status=400)
 
-        for item in to_add:
-            Equipment.objects.create(user=user, equipment_name=item)
 
+# Bulk equipment onboarding: {"users": [{"user_id": 1, "workout_equipment": "dumbbells,barbell"}, ...]}
+@api_view(["POST"])
+@permission_classes([IsAdminUser])
+def save_equipment_bulk(request):
+    try:
+        entries = request.data.get("users")
+        if not isinstance(entries, list) or not all(isinstance(entry, dict) for entry in entries):
+            return Response({"error": "users must be a list of {user_id, workout_equipment} objects"}, status=400)
+
+        selections = {}
+        for entry in entries:
+            selections[int(entry["user_id"])] = parse_selection(entry.get("workout_equipment", ""))
+        unknown = selections.keys() - set(User.objects.filter(pk__in=list(selections)).values_list('pk', flat=True))
+        if unknown:
+            return Response({"error": f"Unknown user ids: {sorted(unknown)}"}, status=400)
+
+        changes = apply_equipment(selections)
+        invalidate_stored_programs(user_id for user_id, (added, removed) in changes.items() if added or removed)
         return Response({
-            "message": "Equipment selection updated successfully!",
-            "added": list(to_add),
-            "removed": list(to_remove)
+            "message": f"Equipment updated for {len(changes)} users",
+            "users": [
+                {"user_id": user_id, "added": added, "removed": removed}
+                for user_id, (added, removed) in changes.items()
+            ]
         }, status=200)
 
+    except (KeyError, TypeError, ValueError) as e:
+        return Response({"error": f"Invalid entry: {e}"}, status=400)
     except Exception as e:
         return Response({"error": str(e)}, status=400)
 
+# GET API for the personalized workout list, ?limit=&offset= paginated
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_user_workout(request):
@@ -93,131 +226,24 @@ def get_user_workout(request):
         user_profile = Profile.objects.get(user=request.user)
         activity_level = user_profile.activity_level.lower() if user_profile.activity_level else 'moderate'
 
-        # Map activity level to difficulty and impact level
-        activity_mapping = {
-            'sedentary': {
-                'difficulty': 'Beginner',
-                'impact_levels': ['Low']
-            },
-            'light': {
-                'difficulty': 'Beginner',
-                'impact_levels': ['Low', 'Medium']
-            },
-            'moderate': {
-                'difficulty': 'Intermediate',
-                'impact_levels': ['Low', 'Medium']
-            },
-            'very': {
-                'difficulty': 'Intermediate',
-                'impact_levels': ['Low', 'Medium', 'High']
-            },
-            'extra': {
-                'difficulty': 'Advanced',
-                'impact_levels': ['Medium', 'High']
-            },
-            'athlete': {
-                'difficulty': 'Advanced',
-                'impact_levels': ['High']
-            }
-        }
-
         # Get difficulty and impact levels based on activity level
-        exercise_filters = activity_mapping.get(activity_level, {
-            'difficulty': 'Intermediate',  # Default difficulty
-            'impact_levels': ['Low', 'Medium']  # Default impact levels
-        })
+        exercise_filters = ACTIVITY_MAPPING.get(activity_level, DEFAULT_EXERCISE_FILTERS)
 
         difficulty = exercise_filters['difficulty']
         impact_levels = exercise_filters['impact_levels']
 
-        # Get exercises based on difficulty and impact level
-        exercises = ExerciseLibrary.objects.filter(
-            difficulty=difficulty,
-            impact_level__in=impact_levels
-        ).values(
-            'id',
-            'name',
-            'body_part',
-            'difficulty',
-            'impact_level',
-            'description',
-            'duration',
-            'sets',
-            'reps',
-            'video_link',
-            'exercise_type',
-            'instructions'
-        ).order_by('impact_level', 'body_part')
-
-        # If no exercises found, try to get exercises with adjusted filters
-        if not exercises.exists():
-            print(f"No exercises found for difficulty '{difficulty}' and impact levels {impact_levels}")
-            
-            # Try to find exercises with the same difficulty but any impact level
-            exercises = ExerciseLibrary.objects.filter(
-                difficulty=difficulty
-            ).values(
-                'id',
-                'name',
-                'body_part',
-                'difficulty',
-                'impact_level',
-                'description',
-                'duration',
-                'sets',
-                'reps',
-                'video_link',
-                'exercise_type',
-                'instructions'
-            ).order_by('impact_level', 'body_part')
-
-            if not exercises.exists():
-                print("No exercises found with current difficulty, trying all difficulties")
-                # If still no exercises, get all exercises
-                exercises = ExerciseLibrary.objects.all().values(
-                    'id',
-                    'name',
-                    'body_part',
-                    'difficulty',
-                    'impact_level',
-                    'description',
-                    'duration',
-                    'sets',
-                    'reps',
-                    'video_link',
-                    'exercise_type',
-                    'instructions'
-                ).order_by('difficulty', 'impact_level', 'body_part')
-
-        # Add default values for fields that might be missing
-        def add_default_values(exercises):
-            result = []
-            for exercise in exercises:
-                exercise_dict = dict(exercise)
-                if 'description' not in exercise_dict or not exercise_dict['description']:
-                    exercise_dict['description'] = f"Exercise targeting {exercise_dict.get('body_part', 'full body')}"
-                if 'duration' not in exercise_dict or not exercise_dict['duration']:
-                    exercise_dict['duration'] = 10  # Default duration in minutes
-                if 'sets' not in exercise_dict or not exercise_dict['sets']:
-                    exercise_dict['sets'] = 3  # Default sets
-                if 'reps' not in exercise_dict or not exercise_dict['reps']:
-                    exercise_dict['reps'] = 10  # Default reps
-                if 'video_link' not in exercise_dict:
-                    exercise_dict['video_link'] = None  # Default video link
-                if 'instructions' not in exercise_dict or not exercise_dict['instructions']:
-                    exercise_dict['instructions'] = f"Perform the exercise with proper form targeting {exercise_dict.get('body_part', 'full body')}"
-                result.append(exercise_dict)
-            return result
-
-        processed_exercises = add_default_values(exercises)
+        exercises = workout_cache.exercises(difficulty, impact_levels, user_profile.equipment_mask)
+        page, links = paginate_exercises(request, exercises)
 
         return Response({
-            'exercises': processed_exercises,
+            'exercises': page,
+            **links,
             'filters_applied': {
                 'difficulty': difficulty,
                 'impact_levels': impact_levels,
                 'activity_level': activity_level,
-                'total_exercises_found': len(processed_exercises)
+                'equipment_mask': user_profile.equipment_mask,
+                'total_exercises_found': len(exercises)
             }
         })
 
@@ -233,6 +259,38 @@ def get_user_workout(request):
             status=500
         )
 
+# GET API for the week's program, ?start=YYYY-MM-DD picks another week
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_user_program(request):
+    try:
+        start = request.query_params.get('start')
+        start = datetime.date.fromisoformat(start) if start else datetime.date.today()
+    except ValueError:
+        return Response({'error': 'start must be a date in YYYY-MM-DD format.'}, status=400)
+
+    try:
+        user_profile = Profile.objects.get(user=request.user)
+        # Whole Monday-to-Sunday split in one response
+        return Response(week_program(request.user, start, user_profile))
+
+    except Profile.DoesNotExist:
+        return Response(
+            {'error': 'User profile not found. Please complete your profile first.'},
+            status=404
+        )
+    except Exception as e:
+        return Response(
+            {'error': str(e)},
+            status=500
+        )
+
+# Hit rates of this worker's personalized workout cache
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def get_workout_cache_stats(request):
+    return Response(workout_cache.stats())
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_user_profile(request):